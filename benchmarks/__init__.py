@@ -0,0 +1,17 @@
+"""
+Benchmarks for pyNSID run with airspeed velocity (asv)
+
+Run from the root of the repository with::
+
+    asv run
+    asv publish
+
+Results are stored per commit in ``.asv/results``. Compare the read / write
+throughput of two versions with::
+
+    asv continuous master HEAD
+    asv compare master HEAD
+
+Set the environment variable ``PYNSID_BENCH_LARGE`` to also benchmark
+datasets of several GB.
+"""
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for writing NSID main datasets and processing results
+
+Created on Sat Oct 17 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import os
+import tempfile
+import time
+import h5py
+
+from pyNSID.io.hdf_io import write_nsid_dataset, write_results
+
+from .utils import SIZES, LAYOUTS, get_shape, get_layout_kwargs, \
+    make_lazy_dataset
+
+
+class WriteNSIDDataset(object):
+    """
+    Time and throughput of write_nsid_dataset for datasets of different
+    sizes, dimensionalities and HDF5 chunkings
+    """
+    params = [list(SIZES), [2, 4], LAYOUTS]
+    param_names = ['size', 'ndim', 'layout']
+    number = 1
+    repeat = 3
+    timeout = 900
+
+    def setup(self, size, ndim, layout):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'write_nsid_dataset.h5')
+        self.dataset = make_lazy_dataset(get_shape(SIZES[size], ndim))
+        self.kwargs = get_layout_kwargs(layout)
+
+    def teardown(self, size, ndim, layout):
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+        os.rmdir(self.tmp_dir)
+
+    def _write(self):
+        with h5py.File(self.file_path, mode='w') as h5_file:
+            h5_group = h5_file.create_group('Measurement')
+            write_nsid_dataset(self.dataset, h5_group, main_data_name='data',
+                               **self.kwargs)
+
+    def time_write(self, size, ndim, layout):
+        self._write()
+
+    def track_write_MBps(self, size, ndim, layout):
+        start = time.perf_counter()
+        self._write()
+        return self.dataset.nbytes / 1024 ** 2 / (time.perf_counter() - start)
+
+    track_write_MBps.unit = 'MB/s'
+
+
+class WriteResults(object):
+    """
+    Cost of writing the results of a processing step that produces many
+    small datasets, with and without batching
+    """
+    params = [[1, 10, 100], [False, True]]
+    param_names = ['num_results', 'batched']
+    shape = (64, 64)
+
+    def setup(self, num_results, batched):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'write_results.h5')
+        self.results = []
+        for ind in range(num_results):
+            dataset = make_lazy_dataset(self.shape)
+            dataset.title = 'result_{:03d}'.format(ind)
+            self.results.append(dataset)
+
+    def teardown(self, num_results, batched):
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+        os.rmdir(self.tmp_dir)
+
+    def _write(self, batched):
+        with h5py.File(self.file_path, mode='w') as h5_file:
+            write_results(h5_file.create_group('Measurement'),
+                          dataset=self.results,
+                          attributes={'algorithm': 'benchmark'},
+                          process_name='Benchmark', batched=batched)
+
+    def time_write_results(self, num_results, batched):
+        self._write(batched)
+
+    def track_time_per_result(self, num_results, batched):
+        start = time.perf_counter()
+        self._write(batched)
+        return (time.perf_counter() - start) / num_results * 1E3
+
+    track_time_per_result.unit = 'milliseconds'
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the validation, discovery and reading of NSID main datasets
+
+Created on Sat Oct 17 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import os
+import tempfile
+import time
+import h5py
+
+from pyNSID.io.hdf_io import write_nsid_dataset
+from pyNSID.io.hdf_utils import check_if_main, read_h5py_dataset, \
+    get_all_main, write_main_index
+
+from .utils import make_many_dsets_file, write_raw_main, SlowFile, SIZES, \
+    LAYOUTS, get_shape, get_layout_kwargs, make_lazy_dataset
+
+
+class CheckIfMain(object):
+    """
+    Per-dataset cost of check_if_main on files with thousands of datasets
+    """
+    params = [100, 1000, 5000]
+    param_names = ['num_datasets']
+
+    def setup(self, num_datasets):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'check_if_main.h5')
+        make_many_dsets_file(self.file_path, num_datasets // 2,
+                             num_ancillary=num_datasets // 2)
+        self.h5_file = h5py.File(self.file_path, mode='r')
+        self.h5_dsets = []
+        self.h5_file.visititems(self._collect)
+
+    def _collect(self, name, obj):
+        if isinstance(obj, h5py.Dataset):
+            self.h5_dsets.append(obj)
+
+    def teardown(self, num_datasets):
+        self.h5_file.close()
+        os.remove(self.file_path)
+        os.rmdir(self.tmp_dir)
+
+    def time_check_all(self, num_datasets):
+        for h5_dset in self.h5_dsets:
+            check_if_main(h5_dset)
+
+    def track_time_per_dataset(self, num_datasets):
+        start = time.perf_counter()
+        for h5_dset in self.h5_dsets:
+            check_if_main(h5_dset)
+        return (time.perf_counter() - start) / len(self.h5_dsets) * 1E6
+
+    track_time_per_dataset.unit = 'microseconds'
+
+
+class ReadH5pyDataset(object):
+    """
+    Per-dataset latency of read_h5py_dataset on a file that emulates a slow
+    network file system. Every read from the file incurs a fixed latency
+    """
+    params = [0, 1E-4, 1E-3]
+    param_names = ['latency_s']
+    num_datasets = 20
+
+    def setup(self, latency_s):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'read_h5py_dataset.h5')
+        with h5py.File(self.file_path, mode='w') as h5_file:
+            for ind in range(self.num_datasets):
+                h5_group = h5_file.create_group('Measurement_{:03d}'
+                                                ''.format(ind))
+                write_raw_main(h5_group, shape=(4, 5, 6))
+                h5_group.create_group('metadata').attrs['index'] = ind
+        self.slow_file = SlowFile(self.file_path, latency=latency_s)
+        self.h5_file = h5py.File(self.slow_file, mode='r')
+        self.h5_dsets = [self.h5_file['Measurement_{:03d}/data'.format(ind)]
+                         for ind in range(self.num_datasets)]
+
+    def teardown(self, latency_s):
+        self.h5_file.close()
+        self.slow_file.close()
+        os.remove(self.file_path)
+        os.rmdir(self.tmp_dir)
+
+    def track_latency_per_dataset(self, latency_s):
+        start = time.perf_counter()
+        for h5_dset in self.h5_dsets:
+            read_h5py_dataset(h5_dset)
+        return (time.perf_counter() - start) / self.num_datasets * 1E3
+
+    track_latency_per_dataset.unit = 'milliseconds'
+
+    def track_file_reads_per_dataset(self, latency_s):
+        start = self.slow_file.num_reads
+        for h5_dset in self.h5_dsets:
+            read_h5py_dataset(h5_dset)
+        return (self.slow_file.num_reads - start) / self.num_datasets
+
+    track_file_reads_per_dataset.unit = 'reads'
+
+
+class GetAllMain(object):
+    """
+    Cost of finding all NSID main datasets in files with many objects, with
+    and without the index of main datasets
+    """
+    params = [[10, 100, 1000], [True, False]]
+    param_names = ['num_main', 'use_index']
+
+    def setup(self, num_main, use_index):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'get_all_main.h5')
+        make_many_dsets_file(self.file_path, num_main, num_ancillary=num_main)
+        with h5py.File(self.file_path, mode='r+') as h5_file:
+            write_main_index(h5_file)
+        self.h5_file = h5py.File(self.file_path, mode='r')
+
+    def teardown(self, num_main, use_index):
+        self.h5_file.close()
+        os.remove(self.file_path)
+        os.rmdir(self.tmp_dir)
+
+    def time_get_all_main(self, num_main, use_index):
+        get_all_main(self.h5_file, use_index=use_index)
+
+
+class ReadH5pyDatasetThroughput(object):
+    """
+    Time and throughput of read_h5py_dataset for datasets of different
+    sizes, dimensionalities and HDF5 chunkings
+    """
+    params = [list(SIZES), [2, 4], LAYOUTS]
+    param_names = ['size', 'ndim', 'layout']
+    number = 1
+    repeat = 3
+    timeout = 900
+
+    def setup(self, size, ndim, layout):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'read_throughput.h5')
+        dataset = make_lazy_dataset(get_shape(SIZES[size], ndim))
+        with h5py.File(self.file_path, mode='w') as h5_file:
+            write_nsid_dataset(dataset, h5_file.create_group('Measurement'),
+                               main_data_name='data',
+                               **get_layout_kwargs(layout))
+        self.h5_file = h5py.File(self.file_path, mode='r')
+        self.h5_main = self.h5_file['Measurement/data/data']
+
+    def teardown(self, size, ndim, layout):
+        self.h5_file.close()
+        os.remove(self.file_path)
+        os.rmdir(self.tmp_dir)
+
+    def time_read(self, size, ndim, layout):
+        read_h5py_dataset(self.h5_main)
+
+    def time_read_lazy_compute(self, size, ndim, layout):
+        read_h5py_dataset(self.h5_main, lazy=True).compute()
+
+    def track_read_MBps(self, size, ndim, layout):
+        start = time.perf_counter()
+        read_h5py_dataset(self.h5_main)
+        return self.h5_main.nbytes / 1024 ** 2 / (time.perf_counter() - start)
+
+    track_read_MBps.unit = 'MB/s'
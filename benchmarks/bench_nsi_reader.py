@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for reading all NSID main datasets in a file with NSIDReader
+
+Created on Sat Oct 17 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import os
+import tempfile
+import warnings
+import h5py
+
+from pyNSID.io.hdf_utils import write_main_index
+from pyNSID.io.nsi_reader import NSIDReader
+
+from .utils import make_many_dsets_file
+
+
+class ReadAll(object):
+    """
+    Cost of opening a file and reading all NSID main datasets within it
+    """
+    params = [[10, 100, 1000], [False, True]]
+    param_names = ['num_datasets', 'lazy']
+
+    def setup(self, num_datasets, lazy):
+        warnings.simplefilter('ignore', FutureWarning)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'read_all.h5')
+        make_many_dsets_file(self.file_path, num_datasets)
+        with h5py.File(self.file_path, mode='r+') as h5_file:
+            write_main_index(h5_file)
+
+    def teardown(self, num_datasets, lazy):
+        os.remove(self.file_path)
+        os.rmdir(self.tmp_dir)
+
+    def time_read_all(self, num_datasets, lazy):
+        reader = NSIDReader(self.file_path)
+        reader.read_all(lazy=lazy)
+        reader._h5_file.close()
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers that create synthetic NSID files for the benchmarks
+
+Created on Sat Oct 17 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import os
+import time
+import h5py
+import numpy as np
+import dask.array as da
+from sidpy import Dimension
+from sidpy.hdf.hdf_utils import write_simple_attrs
+
+from pyNSID.io.hdf_utils import _dataset_from_dask
+
+# Sizes of the synthetic datasets. Datasets of several GB are only used when
+# the environment variable PYNSID_BENCH_LARGE is set since they need as much
+# free disk space and take minutes per benchmark
+SIZES = {'64KB': 2 ** 16, '16MB': 2 ** 24, '1GB': 2 ** 30}
+if os.environ.get('PYNSID_BENCH_LARGE'):
+    SIZES['4GB'] = 2 ** 32
+
+LAYOUTS = ['contiguous', 'balanced', 'spectrum']
+
+
+def write_raw_main(h5_group, name='data', shape=(2, 3)):
+    """
+    Writes a NSID main dataset and its dimension scales with plain h5py calls
+
+    Parameters
+    ----------
+    h5_group : h5py.Group
+        Group to write into
+    name : str, optional. Default = 'data'
+        Name of the main dataset
+    shape : tuple, optional. Default = (2, 3)
+        Shape of the main dataset
+
+    Returns
+    -------
+    h5py.Dataset
+        Main dataset
+    """
+    h5_main = h5_group.create_dataset(name, data=np.random.random(shape))
+    write_simple_attrs(h5_main, {'quantity': 'quantity', 'units': 'units',
+                                 'main_data_name': name,
+                                 'pyNSID_version': 'benchmark',
+                                 'data_type': 'UNKNOWN',
+                                 'modality': 'modality', 'source': 'source'})
+    for ind, length in enumerate(shape):
+        dim_name = '{}_dim_{}'.format(name, ind)
+        h5_dim = h5_group.create_dataset(dim_name, data=np.arange(length))
+        write_simple_attrs(h5_dim, {'name': dim_name, 'units': 'units',
+                                    'quantity': 'quantity',
+                                    'dimension_type': 'UNKNOWN'})
+        h5_dim.make_scale(dim_name)
+        h5_main.dims[ind].label = dim_name
+        h5_main.dims[ind].attach_scale(h5_dim)
+    return h5_main
+
+
+def get_shape(num_bytes, ndim, itemsize=8):
+    """
+    Returns the shape of a dataset of roughly ``num_bytes`` bytes whose
+    dimensions are about as long as each other
+
+    Parameters
+    ----------
+    num_bytes : int
+        Desired size of the dataset in bytes
+    ndim : int
+        Number of dimensions
+    itemsize : int, optional. Default = 8
+        Size of each element in bytes
+
+    Returns
+    -------
+    tuple of int
+        Shape of the dataset
+    """
+    num_elems = max(1, num_bytes // itemsize)
+    side = max(1, int(round(num_elems ** (1. / ndim))))
+    shape = [side] * ndim
+    shape[0] = max(1, num_elems // side ** (ndim - 1))
+    return tuple(shape)
+
+
+def get_layout_kwargs(layout):
+    """
+    Returns the keyword arguments for write_nsid_dataset that produce the
+    requested layout of the main dataset in the file. Note that
+    write_nsid_dataset does not chunk datasets smaller than a single chunk,
+    whatever the access pattern
+
+    Parameters
+    ----------
+    layout : str
+        'contiguous' or one of the access patterns of
+        :func:`pyNSID.io.hdf_utils.get_h5_chunks`
+
+    Returns
+    -------
+    dict
+        Keyword arguments
+    """
+    if layout == 'contiguous':
+        return {'chunks': None}
+    return {'access_pattern': layout}
+
+
+def make_lazy_dataset(shape, chunks='auto'):
+    """
+    Creates a lazy sidpy.Dataset whose data are only computed when written.
+    The first half of the dimensions are spatial and the rest are spectral
+
+    Parameters
+    ----------
+    shape : tuple of int
+        Shape of the dataset
+    chunks : str or tuple, optional. Default = 'auto'
+        Shape of the dask chunks
+
+    Returns
+    -------
+    sidpy.Dataset
+        Dataset with dimensions and metadata
+    """
+    dataset = _dataset_from_dask(da.ones(shape, chunks=chunks))
+    dataset.title = 'benchmark'
+    dataset.units = 'counts'
+    dataset.quantity = 'intensity'
+    num_spatial = max(1, len(shape) // 2)
+    for ind, length in enumerate(shape):
+        dim_type = 'spatial' if ind < num_spatial else 'spectral'
+        dataset.set_dimension(ind, Dimension(np.arange(length),
+                                             'dim_{}'.format(ind),
+                                             units='a.u.',
+                                             dimension_type=dim_type))
+    dataset.metadata = {'instrument': 'benchmark', 'index': 0}
+    return dataset
+
+
+def make_many_dsets_file(file_path, num_main, num_ancillary=0):
+    """
+    Creates a HDF5 file with many small NSID main datasets and ancillary
+    (non-main) datasets
+
+    Parameters
+    ----------
+    file_path : str
+        Path of the file to create
+    num_main : int
+        Number of NSID main datasets
+    num_ancillary : int, optional. Default = 0
+        Number of ancillary datasets that are not NSID main datasets
+
+    Returns
+    -------
+    str
+        Path of the file
+    """
+    with h5py.File(file_path, 'w') as h5_file:
+        for ind in range(num_main):
+            h5_group = h5_file.create_group('Measurement_{:05d}'.format(ind))
+            write_raw_main(h5_group)
+        h5_group = h5_file.create_group('Ancillary')
+        for ind in range(num_ancillary):
+            h5_group.create_dataset('aux_{:05d}'.format(ind),
+                                    data=np.arange(4))
+    return file_path
+
+
+class SlowFile(object):
+    """
+    File-like object that adds a fixed latency to every read to emulate a
+    file on a slow network file system. Open with ``h5py.File(SlowFile(...))``
+    """
+
+    def __init__(self, file_path, latency=1E-3):
+        """
+        Parameters
+        ----------
+        file_path : str
+            Path of the file to open for reading
+        latency : float, optional. Default = 1E-3
+            Seconds added to every read
+        """
+        self._file = open(file_path, mode='rb')
+        self.latency = latency
+        self.num_reads = 0
+
+    def read(self, size=-1):
+        self.num_reads += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+        return self._file.read(size)
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=0):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
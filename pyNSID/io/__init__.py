@@ -10,9 +10,21 @@ Submodules
     hdf_utils
     hdf_io
     nsi_reader
+    multi_reader
+    nsi_appender
+    instrumentation
+    async_reader
 """
-from . import hdf_utils, hdf_io
+from . import hdf_utils, hdf_io, multi_reader, nsi_appender, instrumentation, \
+    async_reader
 from .nsi_reader import NSIDReader
+from .async_reader import AsyncNSIDReader
+from .multi_reader import read_nsid_files
+from .nsi_appender import NSIDAppender
+from .instrumentation import IOStats, register_io_callback, \
+    unregister_io_callback
 from .hdf_io import *
 
-__all__ = ['hdf_utils', 'hdf_io', 'NSIDReader']
\ No newline at end of file
+__all__ = ['hdf_utils', 'hdf_io', 'multi_reader', 'nsi_appender',
+           'instrumentation', 'async_reader', 'NSIDReader', 'AsyncNSIDReader',
+           'read_nsid_files', 'NSIDAppender', 'IOStats', 'register_io_callback', 'unregister_io_callback']
\ No newline at end of file
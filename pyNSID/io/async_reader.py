@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+Reader for NSID datasets whose methods can be awaited from asyncio code
+
+Created on Sat Oct 17 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import asyncio
+import functools
+import sys
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import h5py
+import numpy as np
+
+from .hdf_utils import read_h5py_dataset, get_all_main, get_region_slices, \
+    get_memmap, DimensionCache
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['AsyncNSIDReader']
+
+
+class AsyncNSIDReader(object):
+
+    def __init__(self, file_path, max_workers=4, max_pending=None,
+                 **kwargs):
+        """
+        Reads NSID main datasets from a HDF5 file without blocking the
+        asyncio event loop, e.g. in the handlers of a web service.
+
+        All HDF5 I/O runs in a dedicated pool of ``max_workers`` threads.
+        Each thread opens its own read-only handle to the file along with
+        its own cache of dimensions, so that concurrent requests never
+        share h5py objects across threads.
+
+        Parameters
+        ----------
+        file_path : str
+            Path to the HDF5 file
+        max_workers : int, optional. Default = 4
+            Number of threads, and therefore file handles, that read from
+            the file
+        max_pending : int, optional. Default = None
+            Maximum number of requests from each event loop submitted to
+            the threads at any time. Further requests wait in the event
+            loop. By default, four times ``max_workers``
+        kwargs : dict
+            Additional keyword arguments passed on to :class:`h5py.File`,
+            such as ``swmr=True``
+
+        Notes
+        -----
+        h5py allows only one thread at a time to call into the HDF5
+        library. Reading via HDF5 is therefore serialized across threads,
+        although the event loop stays responsive. Reads with
+        ``memmap=True`` bypass the HDF5 library and run concurrently. See
+        :func:`pyNSID.io.hdf_utils.get_memmap`
+
+        Use as a (async) context manager or call :meth:`close` (or await
+        :meth:`aclose`) to close the file handles.
+
+        The file is opened here to check that it is a HDF5 file, which
+        blocks the calling thread. Within coroutines, create the reader via
+        :meth:`open` instead.
+        """
+        self._setup(file_path, max_workers, max_pending, kwargs)
+        # Let h5py raise an OS error if a non-HDF5 file was provided
+        with h5py.File(file_path, mode='r', **kwargs):
+            pass
+
+    @classmethod
+    async def open(cls, file_path, max_workers=4, max_pending=None,
+                   **kwargs):
+        """
+        Creates a reader without blocking the event loop. The file is
+        checked by opening the handle of the first worker thread
+
+        Parameters
+        ----------
+        file_path : str
+            Path to the HDF5 file
+        max_workers : int, optional. Default = 4
+            See :class:`AsyncNSIDReader`
+        max_pending : int, optional. Default = None
+            See :class:`AsyncNSIDReader`
+        kwargs : dict
+            See :class:`AsyncNSIDReader`
+
+        Returns
+        -------
+        AsyncNSIDReader
+        """
+        reader = cls.__new__(cls)
+        reader._setup(file_path, max_workers, max_pending, kwargs)
+        try:
+            await reader._run(reader._get_h5_file)
+        except BaseException:
+            await reader.aclose()
+            raise
+        return reader
+
+    def _setup(self, file_path, max_workers, max_pending, kwargs):
+        """
+        Checks the inputs and sets up the threads without any file I/O
+        """
+        if not isinstance(file_path, (str, unicode)):
+            raise TypeError('file_path should be a string')
+        if not isinstance(max_workers, int) or max_workers < 1:
+            raise ValueError('max_workers should be a positive integer')
+        if max_pending is None:
+            max_pending = 4 * max_workers
+        if not isinstance(max_pending, int) or max_pending < 1:
+            raise ValueError('max_pending should be a positive integer')
+
+        self.file_path = file_path
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._file_kwargs = kwargs
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._local = threading.local()
+        self._handles = []
+        self._handles_lock = threading.Lock()
+        # One per event loop since asyncio primitives are bound to the loop
+        # they are first used in. Created within the loop upon first use
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._main_paths = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def aclose(self):
+        """
+        Closes the reader like :meth:`close` without blocking the event loop
+        while pending reads finish
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.close)
+
+    def close(self):
+        """
+        Waits for pending reads to finish and closes all file handles.
+        This blocks the calling thread. Use :meth:`aclose` within coroutines
+        """
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        with self._handles_lock:
+            for h5_file in self._handles:
+                h5_file.close()
+            self._handles = []
+
+    def _get_h5_file(self):
+        """
+        Returns the file handle of the calling worker thread, opening it
+        on first use
+
+        Returns
+        -------
+        h5py.File
+        """
+        h5_file = getattr(self._local, 'h5_file', None)
+        if h5_file is None:
+            h5_file = h5py.File(self.file_path, mode='r', **self._file_kwargs)
+            self._local.h5_file = h5_file
+            self._local.dim_cache = DimensionCache()
+            with self._handles_lock:
+                self._handles.append(h5_file)
+        return h5_file
+
+    def _get_h5_dataset(self, h5_path):
+        """
+        Returns the dataset at ``h5_path`` using the file handle of the
+        calling worker thread
+        """
+        h5_dset = self._get_h5_file()[h5_path]
+        if not isinstance(h5_dset, h5py.Dataset):
+            raise TypeError('{} is not a HDF5 dataset'.format(h5_path))
+        return h5_dset
+
+    async def _run(self, func, *args, **kwargs):
+        """
+        Runs ``func`` in a worker thread once fewer than ``max_pending``
+        requests of the running event loop are in flight
+        """
+        if self._executor is None:
+            raise ValueError('This reader has been closed')
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_pending)
+            self._semaphores[loop] = semaphore
+        async with semaphore:
+            return await loop.run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs))
+
+    def _read(self, h5_path, region=None, memmap=False):
+        return read_h5py_dataset(self._get_h5_dataset(h5_path), region=region,
+                                 memmap=memmap,
+                                 dim_cache=self._local.dim_cache)
+
+    def _read_slice(self, h5_path, region, memmap=False):
+        h5_dset = self._get_h5_dataset(h5_path)
+        slices = get_region_slices(h5_dset, region)
+        mem_map = get_memmap(h5_dset) if memmap else None
+        if mem_map is not None:
+            # Copy here so that the pages are read in the worker thread
+            # rather than when the array is first used in the event loop
+            return np.array(mem_map[slices])
+        return h5_dset[slices]
+
+    def _get_main_paths(self):
+        return [h5_dset.name for h5_dset in get_all_main(self._get_h5_file())]
+
+    async def get_main_paths(self):
+        """
+        Returns the paths of all NSID main datasets in the file. The file is
+        only searched the first time
+
+        Returns
+        -------
+        list of str
+        """
+        if self._main_paths is None:
+            self._main_paths = await self._run(self._get_main_paths)
+        return list(self._main_paths)
+
+    async def read(self, h5_path, region=None, memmap=False):
+        """
+        Reads a NSID main dataset
+
+        Parameters
+        ----------
+        h5_path : str
+            Path of the NSID main dataset within the file
+        region : tuple, list or dict, optional. Default = None
+            Region of interest to read instead of the entire dataset. See
+            :func:`pyNSID.io.hdf_utils.get_region_slices`
+        memmap : bool, optional. Default = False
+            Whether or not to memory-map the values of contiguous,
+            uncompressed datasets instead of reading them. See
+            :func:`pyNSID.io.hdf_utils.read_h5py_dataset`
+
+        Returns
+        -------
+        sidpy.Dataset
+            Dataset whose values are in memory or memory-mapped. Values
+            that are memory-mapped are read from disk by the thread that
+            computes them. Use :meth:`read_slice` to read them in a worker
+            thread instead
+        """
+        return await self._run(self._read, h5_path, region=region,
+                               memmap=memmap)
+
+    async def read_all(self, parent=None, memmap=False):
+        """
+        Reads all NSID main datasets in the file concurrently
+
+        Parameters
+        ----------
+        parent : str, optional. Default = None
+            Path of the group under which to read all datasets. By
+            default, all datasets in the file are read
+        memmap : bool, optional. Default = False
+            See :meth:`read`
+
+        Returns
+        -------
+        list of sidpy.Dataset
+        """
+        paths = await self.get_main_paths()
+        if parent is not None:
+            prefix = parent.rstrip('/') + '/'
+            paths = [path for path in paths if path.startswith(prefix)]
+        return list(await asyncio.gather(*[self.read(path, memmap=memmap)
+                                           for path in paths]))
+
+    async def read_slice(self, h5_path, region, memmap=False):
+        """
+        Reads only the values in a region of a dataset, without its
+        dimensions and metadata
+
+        Parameters
+        ----------
+        h5_path : str
+            Path of the dataset within the file
+        region : tuple, list or dict
+            Region of interest. See
+            :func:`pyNSID.io.hdf_utils.get_region_slices`
+        memmap : bool, optional. Default = False
+            If True, contiguous, uncompressed datasets are read via a
+            memory map of the file rather than via HDF5
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        return await self._run(self._read_slice, h5_path, region,
+                               memmap=memmap)
@@ -9,32 +9,156 @@ Created on Thu August 20 2020
 
 from __future__ import (division, print_function, unicode_literals,
                         absolute_import)
+import hashlib
+import json
 import sys
+import time
 from warnings import warn
 
 import h5py
 import numpy as np
 
-__all__ = ['create_empty_dataset', 'write_nsid_dataset', 'write_results']
+try:
+    import hdf5plugin
+except ImportError:
+    hdf5plugin = None
+
+__all__ = ['create_empty_dataset', 'write_nsid_dataset', 'write_results',
+           'get_compression_kwargs', 'benchmark_compression',
+           'register_metadata_container', 'get_results_hash', 'find_results',
+           'COMPRESSION_PROFILES', 'METADATA_CONTAINERS']
 
 from dask import array as da
 
 from sidpy import Dataset, Dimension
 from sidpy.base.num_utils import contains_integers
 from sidpy.hdf.hdf_utils import is_editable_h5, write_simple_attrs, \
-    write_book_keeping_attrs, write_dict_to_h5_group
+    write_dict_to_h5_group
 from sidpy.hdf.prov_utils import create_indexed_group
 from sidpy.base.dict_utils import flatten_dict
 
-from .hdf_utils import link_as_main, write_pynsid_book_keeping_attrs
+from pyNSID.__version__ import version as pynsid_version
+from .hdf_utils import link_as_main, write_pynsid_book_keeping_attrs, \
+    update_main_index, get_h5_chunks, DEFAULT_CHUNK_BYTES, _dataset_from_dask, \
+    get_mpi_comm
+from .instrumentation import record_call, count_chunks
 
 if sys.version_info.major == 3:
     unicode = str
 
+COMPRESSION_PROFILES = {'none': {},
+                        'fast': {'compression': 'lzf', 'shuffle': True},
+                        'balanced': {'compression': 'gzip',
+                                     'compression_opts': 4, 'shuffle': True},
+                        'max': {'compression': 'gzip', 'compression_opts': 9,
+                                'shuffle': True},
+                        # ID of the LZ4 filter registered by hdf5plugin
+                        'lz4': {'compression': 32004, 'shuffle': True}}
+"""h5py keyword arguments for each named compression profile. The 'lz4'
+profile requires the optional hdf5plugin package for writing and reading.
+The LZF filter of the 'fast' profile ships with h5py but not with the HDF5
+library, so such files can only be read via h5py and not by h5dump,
+HDFView or the C, Fortran or MATLAB readers. Use 'balanced' (gzip) for
+files shared with other HDF5 tools"""
+
+
+# h5py keyword arguments for filters which can only be applied to chunked
+# datasets
+_CHUNKED_FILTER_KWARGS = ('compression', 'shuffle', 'fletcher32',
+                          'scaleoffset')
+
+METADATA_CONTAINERS = ['metadata', 'original_metadata']
+"""Names of the dictionaries of sidpy.Dataset objects that are written as
+groups next to the main dataset. See :func:`register_metadata_container`"""
+
+
+def register_metadata_container(name):
+    """
+    Registers the name of an additional dictionary property of
+    sidpy.Dataset objects that should be written to HDF5 along with the
+    dataset, e.g. by a subclass of sidpy.Dataset
+
+    Parameters
+    ----------
+    name : str
+        Name of the property
+    """
+    if not isinstance(name, (str, unicode)):
+        raise TypeError('name should be a string')
+    name = name.strip()
+    if len(name) == 0 or name.startswith('_'):
+        raise ValueError('name should be a non-empty string that does not '
+                         'start with "_"')
+    if name not in METADATA_CONTAINERS:
+        METADATA_CONTAINERS.append(name)
+
 
-def create_empty_dataset(shape, h5_group, name='nDIM_Data'):
+def _get_metadata_containers(dataset):
     """
-    returns a h5py.Dataset filled with zeros according to required shape list.
+    Returns the dictionaries of the dataset that should be written to HDF5,
+    i.e. those named in :data:`METADATA_CONTAINERS`.
+    Other attributes and properties of the dataset are never evaluated
+    since some of them, such as ``T``, compute the data. Register the names
+    of custom dictionaries via :func:`register_metadata_container`
+
+    Parameters
+    ----------
+    dataset : sidpy.Dataset
+        Dataset being written
+
+    Returns
+    -------
+    dict
+        Dictionaries keyed by their name
+    """
+    containers = {}
+    for name in METADATA_CONTAINERS:
+        value = getattr(dataset, name, None)
+        if isinstance(value, dict):
+            containers[name] = value
+    return containers
+
+
+def get_compression_kwargs(profile):
+    """
+    Returns the h5py keyword arguments that apply the named compression
+    profile
+
+    Parameters
+    ----------
+    profile : str
+        One of 'none', 'fast', 'balanced', 'max', 'lz4'. Files written
+        with 'fast' (LZF) or 'lz4' can only be read via h5py (with
+        hdf5plugin for 'lz4'). See :data:`COMPRESSION_PROFILES`
+
+    Returns
+    -------
+    dict
+        Keyword arguments for :meth:`h5py.Group.create_dataset`
+    """
+    if profile not in COMPRESSION_PROFILES:
+        raise ValueError('compression profile should be one of {}. Provided:'
+                         ' {}'.format(list(COMPRESSION_PROFILES.keys()),
+                                      profile))
+    if profile == 'lz4' and hdf5plugin is None:
+        raise ImportError('The "lz4" compression profile requires the '
+                          'hdf5plugin package. Install it or use the '
+                          '"balanced" profile (gzip) instead')
+    return dict(COMPRESSION_PROFILES[profile])
+
+
+def create_empty_dataset(shape, h5_group, name='nDIM_Data', dtype=np.float64,
+                         fillvalue=0, dimensions=None,
+                         access_pattern='balanced',
+                         target_chunk_bytes=DEFAULT_CHUNK_BYTES, verbose=False,
+                         **kwargs):
+    """
+    returns a NSID main h5py.Dataset of the required shape that reads as
+    ``fillvalue`` until it is filled in.
+
+    Only the structure of the dataset is written. No data are computed or
+    written, so that even very large datasets can be preallocated instantly
+    and filled in incrementally, for example during an acquisition.
 
     Parameters
     ----------
@@ -44,6 +168,24 @@ def create_empty_dataset(shape, h5_group, name='nDIM_Data'):
         HDF5 group into which the datasets will be written into
     name: str, optional. Default: "nDIM_Data"
         Name of the main HDF5 dataset
+    dtype: numpy.dtype, optional. Default: numpy.float64
+        Data type of the main dataset
+    fillvalue: scalar, optional. Default: 0
+        Value returned when reading parts of the main dataset that have not
+        been written to yet
+    dimensions: list of sidpy.Dimension, optional. Default: None
+        Dimensions of the main dataset. Generic dimensions are used if not
+        provided
+    access_pattern: str, optional. Default: 'balanced'
+        Determines the shape of the HDF5 chunks. See
+        :func:`write_nsid_dataset`
+    target_chunk_bytes: int, optional. Default: 1 MB
+        Desired size of each HDF5 chunk in bytes
+    verbose: bool, optional. Default: False
+        Whether or not to write logs to standard out
+    kwargs: dict
+        Additional keyword arguments passed on to :func:`write_nsid_dataset`
+        such as ``chunks`` or ``compression_profile``
 
     Returns
     -------
@@ -55,12 +197,152 @@ def create_empty_dataset(shape, h5_group, name='nDIM_Data'):
     if not isinstance(h5_group, h5py.Group):
         raise TypeError('h5_group should be a h5py.Group object')
 
-    return write_nsid_dataset(Dataset.from_array(np.zeros(shape)),
-                              h5_group, name)
+    # Placeholder that describes the dataset without allocating memory
+    dataset = _dataset_from_dask(da.empty(tuple(shape), dtype=dtype))
+    if dimensions is not None:
+        if not isinstance(dimensions, (list, tuple)) or \
+                len(dimensions) != len(shape):
+            raise ValueError('dimensions should be a list of {} '
+                             'sidpy.Dimension objects'.format(len(shape)))
+        for ind, dim in enumerate(dimensions):
+            if not isinstance(dim, Dimension):
+                raise TypeError('dimensions should be sidpy.Dimension '
+                                'objects')
+            dataset.set_dimension(ind, dim)
+
+    return write_nsid_dataset(dataset, h5_group, main_data_name=name,
+                              verbose=verbose, access_pattern=access_pattern,
+                              target_chunk_bytes=target_chunk_bytes,
+                              write_data=False, fillvalue=fillvalue, **kwargs)
+
+
+def _stream_to_h5(sources, targets, max_in_flight_chunks=4, scheduler=None):
+    """
+    Streams the blocks of dask arrays into already-open HDF5 datasets.
+    The blocks are stored in batches of ``max_in_flight_chunks`` so that
+    only a bounded number of blocks are held in memory at any time.
+
+    Parameters
+    ----------
+    sources : list of dask.array.core.Array
+        Arrays to write
+    targets : list of h5py.Dataset
+        HDF5 datasets of the same shapes as ``sources`` to write into
+    max_in_flight_chunks : int, optional. Default = 4
+        Maximum number of blocks being computed and written at a time
+    scheduler : str, optional. Default = None
+        Dask scheduler to compute the blocks with. By default, the scheduler
+        configured via ``dask.config`` is used, which is the threaded
+        scheduler unless configured otherwise. The open HDF5 datasets cannot
+        be sent to other processes
+
+    Notes
+    -----
+    Each batch is computed separately. Tasks shared by blocks of different
+    batches, e.g. of rechunked or overlapping arrays, are computed once per
+    batch
+    """
+    if len(sources) == 0:
+        return
+    batch_size = max(1, int(max_in_flight_chunks))
+    kwargs = {} if scheduler is None else {'scheduler': scheduler}
+
+    blocks = []
+    for source, target in zip(sources, targets):
+        # Slice plain dask arrays rather than sidpy.Dataset objects, which
+        # copy their dimensions and metadata upon slicing
+        source = da.Array(source.dask, source.name, source.chunks,
+                          dtype=source.dtype)
+        blocks += [(source[slices], target, slices)
+                   for slices in da.core.slices_from_chunks(source.chunks)]
+
+    for start in range(0, len(blocks), batch_size):
+        batch = blocks[start: start + batch_size]
+        # h5py objects are not thread-safe, hence the lock
+        da.store([block[0] for block in batch],
+                 [block[1] for block in batch],
+                 regions=[block[2] for block in batch], lock=True, **kwargs)
+
+
+def _get_mpi_slab(length, rank, size, align=1):
+    """
+    Returns the contiguous range of a dimension that a MPI rank writes.
+    Boundaries between ranks fall on multiples of ``align``, e.g. the HDF5
+    chunk size, so that no two ranks write into the same chunk
+
+    Parameters
+    ----------
+    length : int
+        Length of the dimension
+    rank : int
+        Rank of this process
+    size : int
+        Number of ranks
+    align : int, optional. Default = 1
+        Boundaries are multiples of this number
+
+    Returns
+    -------
+    start, stop : int
+        Range of indices. Empty (start == stop) if this rank has nothing to
+        write
+    """
+    align = max(1, int(align))
+    num_blocks = int(np.ceil(length / align))
+    bounds = np.linspace(0, num_blocks, size + 1).astype(int) * align
+    return int(min(bounds[rank], length)), int(min(bounds[rank + 1], length))
+
+
+def _write_mpi_slabs(dataset, h5_main, comm):
+    """
+    Has each MPI rank compute and write its own slab of ``dataset`` along the
+    first dimension into ``h5_main`` using collective I/O.
+    Must be called by all ranks
+
+    Parameters
+    ----------
+    dataset : sidpy.Dataset
+        Dataset to write. Only the slab of this rank is computed
+    h5_main : h5py.Dataset
+        HDF5 dataset of the same shape in a file opened with the "mpio"
+        driver
+    comm : mpi4py.MPI.Comm
+        Communicator with which the file was opened
+    """
+    if dataset.ndim == 0:
+        start, stop = (0, 1) if comm.rank == 0 else (0, 0)
+    else:
+        align = 1 if h5_main.chunks is None else h5_main.chunks[0]
+        start, stop = _get_mpi_slab(dataset.shape[0], comm.rank, comm.size,
+                                    align=align)
+
+    if stop > start:
+        if dataset.ndim == 0:
+            selection = ()
+        else:
+            selection = (slice(start, stop),)
+        # Only this slab is computed
+        data = np.asarray(da.Array.__getitem__(dataset, selection))
+        with h5_main.collective:
+            h5_main[selection] = data
+    else:
+        # h5py skips empty writes, yet every rank must join collective I/O
+        file_space = h5_main.id.get_space()
+        file_space.select_none()
+        mem_space = h5py.h5s.create_simple((1,))
+        mem_space.select_none()
+        xfer_plist = h5py.h5p.create(h5py.h5p.DATASET_XFER)
+        xfer_plist.set_dxpl_mpio(h5py.h5fd.MPIO_COLLECTIVE)
+        h5_main.id.write(mem_space, file_space,
+                         np.zeros(1, dtype=h5_main.dtype), dxpl=xfer_plist)
 
 
 def write_nsid_dataset(dataset, h5_group, main_data_name='', verbose=False,
-                       **kwargs):
+                       update_index=True, max_in_flight_chunks=4,
+                       access_pattern='balanced',
+                       target_chunk_bytes=DEFAULT_CHUNK_BYTES,
+                       compression_profile=None, write_data=True,
+                       share_dimensions=False, **kwargs):
     """
     Writes the provided sid dataset as a 'Main' dataset with all appropriate
     linking.
@@ -76,13 +358,115 @@ def write_nsid_dataset(dataset, h5_group, main_data_name='', verbose=False,
         Use this to provide better context about the dataset in the HDF5 file
     verbose : bool, Optional. Default = False
         Whether or not to write logs to standard out
+    update_index : bool, Optional. Default = True
+        Whether or not to add the new main dataset to the index of main
+        datasets in the file, if the file has an index.
+        See :func:`pyNSID.io.hdf_utils.get_all_main`
+    max_in_flight_chunks : int, Optional. Default = 4
+        Maximum number of chunks of ``dataset`` that are computed and held
+        in memory at any time while writing
+    access_pattern : str, Optional. Default = 'balanced'
+        How the data will mostly be read. This determines the shape of the
+        HDF5 chunks. One of:
+
+        * 'image' - whole images (spatial dimensions) are read at a time
+        * 'spectrum' - whole spectra (spectral dimensions) are read at a time
+        * 'balanced' - arbitrary hyper-slabs are read
+
+        Set to None to let h5py decide. Ignored if ``chunks`` is provided
+        in ``kwargs``. See :func:`pyNSID.io.hdf_utils.get_h5_chunks`.
+        Datasets no larger than ``target_chunk_bytes`` are not chunked
+        unless compression or ``maxshape`` are requested. Such contiguous
+        datasets can be memory-mapped when read.
+        See :func:`pyNSID.io.hdf_utils.get_memmap`
+    target_chunk_bytes : int, Optional. Default = 1 MB
+        Desired size of each HDF5 chunk in bytes
+    compression_profile : str, Optional. Default = None
+        Named compression profile: 'none', 'fast', 'balanced', 'max' or
+        'lz4'. Files written with 'fast' (LZF) need h5py to be read, so
+        use 'balanced' (gzip) for files shared with other HDF5 tools.
+        See :func:`get_compression_kwargs`. Compression keyword arguments
+        provided in ``kwargs`` take precedence over the profile
+    write_data : bool, Optional. Default = True
+        If False, only the structure of the main dataset, its dimensions and
+        attributes are written. The values of ``dataset`` are not computed
+        and the main dataset holds the HDF5 fill value instead.
+        See :func:`create_empty_dataset`
+    share_dimensions : bool, Optional. Default = False
+        If True, dimensions identical (same name, attributes and values) to
+        those written by an earlier call with ``share_dimensions=True``
+        anywhere in the same file are attached instead of being written
+        again. Use this when writing many datasets over the same axes.
+        Note that the shared dimensions live in the group of the first
+        dataset that used them, so that group should not be deleted
     kwargs: dict
-        additional keyword arguments passed on to h5py when writing data
+        additional keyword arguments passed on to h5py when writing data.
+        For example, ``chunks`` to set the shape of HDF5 chunks explicitly.
+        If ``maxshape`` is provided, the dimensions that can be resized in
+        the main dataset can also be resized in their dimension datasets
+
+    Notes
+    -----
+    If the file was opened with the "mpio" driver (parallel HDF5), all ranks
+    must call this function with datasets of the same shape, dimensions
+    and metadata. Each rank computes and writes only its own slab of
+    ``dataset`` along the first dimension using collective I/O, so
+    ``dataset`` is best backed by a lazy dask array. Dimensions are written
+    by rank 0 only. The index of main datasets is not updated in parallel.
+    See :func:`pyNSID.io.hdf_utils.write_main_index`
 
     Return
     ------
     h5py dataset
     """
+    with record_call('write_nsid_dataset', h5_group) as call:
+        with call.phase('validation'):
+            _validate_write_args(dataset, h5_group, main_data_name,
+                                 verbose=verbose)
+
+        dim_scales = None
+        if share_dimensions:
+            dim_scales = _SharedDimensions(h5_group.file)
+
+        with call.phase('metadata'):
+            h5_main = _write_nsid_structure(
+                dataset, h5_group, main_data_name=main_data_name,
+                verbose=verbose, access_pattern=access_pattern,
+                target_chunk_bytes=target_chunk_bytes,
+                compression_profile=compression_profile,
+                dim_scales=dim_scales, **kwargs)
+
+        # now ask Dask to stream data into the open dataset
+        comm = get_mpi_comm(h5_main)
+        with call.phase('data'):
+            if write_data and comm is not None:
+                _write_mpi_slabs(dataset, h5_main, comm)
+            elif write_data:
+                _stream_to_h5([dataset], [h5_main],
+                              max_in_flight_chunks=max_in_flight_chunks)
+
+        dataset.h5_dataset = h5_main
+
+        # The index is a variable-length string dataset which cannot be
+        # written in parallel. get_all_main falls back to searching the file
+        # instead
+        if update_index and comm is None:
+            with call.phase('index'):
+                update_main_index(h5_main.parent, [h5_main])
+
+        if call:
+            call.add(objects_visited=len(h5_main.parent) + 1)
+            if write_data:
+                call.add(bytes_written=h5_main.nbytes,
+                         chunks_touched=count_chunks(h5_main))
+
+    return h5_main
+
+
+def _validate_write_args(dataset, h5_group, main_data_name, verbose=False):
+    """
+    Validates the arguments of :func:`write_nsid_dataset`
+    """
     if not isinstance(dataset, Dataset):
         raise TypeError('data to write should be sidpy Dataset')
     if not isinstance(h5_group, (h5py.Group, h5py.File)):
@@ -97,9 +481,149 @@ def write_nsid_dataset(dataset, h5_group, main_data_name='', verbose=False,
     if verbose:
         print('h5 group and file OK')
 
-    if not isinstance(main_data_name, str):
-        raise TypeError('main_data_name must be a string')
 
+def _get_dimension_key(dimension):
+    """
+    Returns a key that is identical for dimensions with the same name,
+    attributes and values
+
+    Parameters
+    ----------
+    dimension : sidpy.Dimension
+        Dimension
+
+    Returns
+    -------
+    tuple
+        Hashable key
+    """
+    values = np.ascontiguousarray(dimension.values)
+    return (dimension.name, dimension.units, dimension.quantity,
+            dimension.dimension_type.name, values.dtype.str, values.shape,
+            hashlib.md5(values.tobytes()).hexdigest())
+
+
+def _write_dimension(dimension, h5_group, comm=None, **kwargs):
+    """
+    Writes a sidpy.Dimension as a HDF5 dataset with NSID attributes
+
+    Parameters
+    ----------
+    dimension : sidpy.Dimension
+        Dimension to write
+    h5_group : h5py.Group
+        Group to write the dimension into
+    comm : mpi4py.MPI.Comm, optional. Default = None
+        Communicator of the file if it was opened with the "mpio" driver
+    kwargs : dict
+        Additional keyword arguments passed on to h5py
+
+    Returns
+    -------
+    h5py.Dataset
+        Dataset containing the values of the dimension
+    """
+    if comm is None:
+        h5_dim = h5_group.create_dataset(dimension.name,
+                                         data=dimension.values, **kwargs)
+    else:
+        # All ranks create the dataset but only rank 0 writes values
+        values = np.asarray(dimension.values)
+        h5_dim = h5_group.create_dataset(dimension.name, shape=values.shape,
+                                         dtype=values.dtype, **kwargs)
+        if comm.rank == 0:
+            h5_dim[()] = values
+    write_simple_attrs(h5_dim, {'name': dimension.name,
+                                'units': dimension.units,
+                                'quantity': dimension.quantity,
+                                'dimension_type':
+                                    dimension.dimension_type.name})
+    return h5_dim
+
+
+SHARED_DIMENSIONS_NAME = '_nsid_shared_dims'
+"""Name of the group whose attributes reference the dimension datasets that
+are shared between main datasets"""
+
+
+class _SharedDimensions(object):
+
+    def __init__(self, h5_file):
+        """
+        Registry of dimension datasets in a file that can be attached to
+        any main dataset with identical dimensions. Provides the ``get``
+        and item assignment of the dictionary of dimension datasets keyed by
+        :func:`_get_dimension_key` used by :func:`_write_nsid_structure`.
+        The registry is stored in the file as object references in the
+        attributes of a group at the root of the file
+
+        Parameters
+        ----------
+        h5_file : h5py.File
+            File containing the dimensions
+        """
+        self._h5_file = h5_file.file
+        self._h5_registry = None
+
+    @staticmethod
+    def _get_name(dim_key):
+        return hashlib.md5(repr(dim_key).encode('utf-8')).hexdigest()
+
+    def get(self, dim_key, default=None):
+        """
+        Returns the dimension dataset registered for ``dim_key`` or
+        ``default`` if there is none
+        """
+        h5_registry = self._h5_file.get(SHARED_DIMENSIONS_NAME)
+        if h5_registry is None:
+            return default
+        ref = h5_registry.attrs.get(self._get_name(dim_key))
+        if ref is None:
+            return default
+        try:
+            h5_dim = self._h5_file[ref]
+        except (ValueError, KeyError, RuntimeError):
+            return default
+        # Deleted datasets may still be reachable without a name
+        if h5_dim.name is None:
+            return default
+        return h5_dim
+
+    def __setitem__(self, dim_key, h5_dim):
+        if self._h5_registry is None:
+            self._h5_registry = self._h5_file.require_group(
+                SHARED_DIMENSIONS_NAME)
+        self._h5_registry.attrs.create(self._get_name(dim_key), h5_dim.ref,
+                                       dtype=h5py.ref_dtype)
+
+
+def _write_nsid_structure(dataset, h5_group, main_data_name='', verbose=False,
+                          access_pattern='balanced',
+                          target_chunk_bytes=DEFAULT_CHUNK_BYTES,
+                          compression_profile=None, dim_scales=None,
+                          book_keeping=True, **kwargs):
+    """
+    Creates the group, the empty main dataset, the dimensions and the
+    attributes of a NSID main dataset without writing the values of
+    ``dataset``. See :func:`write_nsid_dataset` for the parameters that are
+    not listed below
+
+    Parameters
+    ----------
+    dim_scales : dict, optional. Default = None
+        Dimension datasets already written, keyed by
+        :func:`_get_dimension_key`. Identical dimensions are attached
+        instead of being written again and new dimensions are added
+    book_keeping : bool, optional. Default = True
+        Whether or not to write book-keeping attributes to the new group and
+        main dataset. Only the pyNSID version is written to the main
+        dataset otherwise
+
+    Returns
+    -------
+    h5py.Dataset
+        Empty NSID main dataset
+    """
     if main_data_name == '':
         if dataset.title.strip() == '':
             main_data_name = 'nDim_Data'
@@ -115,17 +639,26 @@ def write_nsid_dataset(dataset, h5_group, main_data_name='', verbose=False,
 
     h5_group = h5_group.create_group(main_data_name)
 
-    write_book_keeping_attrs(h5_group)
-    write_pynsid_book_keeping_attrs(h5_group)
+    if book_keeping:
+        # Also writes the sidpy book-keeping attributes
+        write_pynsid_book_keeping_attrs(h5_group)
 
     #####################
     # Write Main Dataset
     ####################
-    if h5_group.file.driver == 'mpio':
+    if compression_profile is not None:
+        for key, val in get_compression_kwargs(compression_profile).items():
+            kwargs.setdefault(key, val)
+
+    comm = get_mpi_comm(h5_group)
+    if comm is not None and h5py.version.hdf5_version_tuple < (1, 10, 2):
         if kwargs.pop('compression', None) is not None:
             warn('This HDF5 file has been opened wth the "mpio" communicator. '
-                 'mpi4py does not allow creation of compressed datasets. '
+                 'HDF5 versions older than 1.10.2 do not allow parallel '
+                 'writes to compressed datasets. '
                  'Compression kwarg has been removed')
+            for key in ['compression_opts', 'shuffle']:
+                _ = kwargs.pop(key, None)
 
     if main_data_name in h5_group:
         raise ValueError('h5 dataset of that name already exists, choose '
@@ -133,6 +666,18 @@ def write_nsid_dataset(dataset, h5_group, main_data_name='', verbose=False,
 
     _ = kwargs.pop('dtype', None)
 
+    # Datasets that fit in a single chunk are kept contiguous so that they
+    # can be memory-mapped, unless the requested features require chunks
+    needs_chunks = dataset.nbytes > target_chunk_bytes or \
+        kwargs.get('maxshape') is not None or \
+        any([kwargs.get(key) for key in _CHUNKED_FILTER_KWARGS])
+    if 'chunks' not in kwargs and access_pattern is not None and needs_chunks:
+        kwargs['chunks'] = get_h5_chunks(dataset,
+                                         access_pattern=access_pattern,
+                                         target_bytes=target_chunk_bytes)
+        if verbose:
+            print('Using HDF5 chunks of shape: {}'.format(kwargs['chunks']))
+
     # step 1 - create the empty dataset:
     h5_main = h5_group.create_dataset(main_data_name,
                                       shape=dataset.shape,
@@ -143,30 +688,36 @@ def write_nsid_dataset(dataset, h5_group, main_data_name='', verbose=False,
               ''.format(h5_main, dataset))
         print('Dask array will be written to HDF5 dataset: "{}" in file: "{}"'
               ''.format(h5_main.name, h5_main.file.filename))
-    # Step 2 - now ask Dask to dump data to disk
-    da.to_hdf5(h5_main.file.filename, {h5_main.name: dataset})
-
-    if verbose:
-        print('Created dataset for Main')
 
     #################
     # Add Dimensions
     #################
     dimensional_dict = {}
+    maxshape = kwargs.get('maxshape', None)
 
     for i, this_dim in dataset._axes.items():
         if not isinstance(this_dim, Dimension):
             raise ValueError('Dimensions {} is not a sidpy Dimension')
 
-        this_dim_dset = h5_group.create_dataset(this_dim.name,
-                                                data=this_dim.values)
-        attrs_to_write = {'name': this_dim.name,
-                          'units': this_dim.units,
-                          'quantity': this_dim.quantity,
-                          'dimension_type': this_dim.dimension_type.name}
+        # Dimensions must be resizable along with the main dataset
+        dim_kwargs = {}
+        if maxshape is not None and maxshape[i] != dataset.shape[i]:
+            dim_kwargs = {'maxshape': (maxshape[i],), 'chunks': True}
 
-        write_simple_attrs(this_dim_dset, attrs_to_write)
+        dim_key = None
+        if dim_scales is not None and len(dim_kwargs) == 0:
+            dim_key = _get_dimension_key(this_dim)
+            h5_dim = dim_scales.get(dim_key)
+            if h5_dim is not None:
+                # Attach the identical dimension that was already written
+                dimensional_dict[i] = h5_dim
+                continue
+
+        this_dim_dset = _write_dimension(this_dim, h5_group, comm=comm,
+                                         **dim_kwargs)
         dimensional_dict[i] = this_dim_dset
+        if dim_key is not None:
+            dim_scales[dim_key] = this_dim_dset
 
     attrs_to_write = {'quantity': dataset.quantity,
                       'units': dataset.units,
@@ -176,28 +727,32 @@ def write_nsid_dataset(dataset, h5_group, main_data_name='', verbose=False,
                       'source': dataset.source}
 
     write_simple_attrs(h5_main, attrs_to_write)
-    write_pynsid_book_keeping_attrs(h5_main)
+    if book_keeping:
+        write_pynsid_book_keeping_attrs(h5_main)
+    else:
+        write_simple_attrs(h5_main, {'pyNSID_version': pynsid_version})
 
-    for attr_name in dir(dataset):
-        attr_val = getattr(dataset, attr_name)
-        if isinstance(attr_val, dict):
-            if verbose:
-                print('Writing attributes from property: {} of the '
-                      'sidpy.Dataset'.format(attr_name))
-            write_dict_to_h5_group(h5_group, attr_val, attr_name)
+    for attr_name, attr_val in _get_metadata_containers(dataset).items():
+        if verbose:
+            print('Writing attributes from property: {} of the '
+                  'sidpy.Dataset'.format(attr_name))
+        write_dict_to_h5_group(h5_group, attr_val, attr_name)
 
     # This will attach the dimensions
-    nsid_data_main = link_as_main(h5_main, dimensional_dict)
+    # The index is updated by write_nsid_dataset
+    nsid_data_main = link_as_main(h5_main, dimensional_dict,
+                                  update_index=False)
 
     if verbose:
         print('Successfully linked datasets - dataset should be main now')
 
-    dataset.h5_dataset = nsid_data_main
-
     return nsid_data_main
 
 
-def write_results(h5_group, dataset=None, attributes=None, process_name=None):
+def write_results(h5_group, dataset=None, attributes=None, process_name=None,
+                  compression_profile=None, batched=False,
+                  max_in_flight_chunks=4, write_data=True,
+                  source_dataset=None, status_attrs=None):
     """
     Writes results of a processing step back to HDF5 in NSID format
 
@@ -211,12 +766,49 @@ def write_results(h5_group, dataset=None, attributes=None, process_name=None):
         Metadata regarding processing step
     process_name : str, optional. Default = "Log_"
         Name of the prefix for group containing process results
+    compression_profile : str, optional. Default = None
+        Named compression profile applied to all datasets. Files written
+        with 'fast' (LZF) need h5py to be read, so use 'balanced' (gzip)
+        for files shared with other HDF5 tools. See
+        :func:`get_compression_kwargs`
+    batched : bool, optional. Default = False
+        Set to True when writing many datasets. The structure of all
+        datasets is created first and then all datasets are computed and
+        written in a single pass. Identical dimensions are written once and
+        shared by all datasets, and book-keeping attributes are only
+        written to the log group
+    max_in_flight_chunks : int, optional. Default = 4
+        Maximum number of chunks computed and held in memory at any time
+        when ``batched`` is True
+    write_data : bool, optional. Default = True
+        Set to False to only create the datasets, e.g. to fill them
+        incrementally as results are computed. See
+        :func:`write_nsid_dataset`
+    source_dataset : h5py.Dataset, optional. Default = None
+        Dataset from which the results were computed. Its path is written
+        as the ``source_dataset`` attribute of the log group
+    status_attrs : dict, optional. Default = None
+        Attributes describing the state of the results, such as the progress
+        of a computation that fills the datasets incrementally. These are
+        written to the log group along with ``results_hash``, before any
+        dataset is created, and are excluded from ``results_hash``
 
     Returns
     -------
     log_group : h5py.Group
         HDF5 group containing results
+
+    Notes
+    -----
+    The ``results_hash`` attribute of the log group identifies the process
+    name, attributes and source dataset. Use :func:`find_results` to find
+    the results of an identical computation before computing them again
     """
+    if source_dataset is not None and \
+            not isinstance(source_dataset, h5py.Dataset):
+        raise TypeError('source_dataset should be a h5py.Dataset object')
+    if status_attrs is not None and not isinstance(status_attrs, dict):
+        raise TypeError('status_attrs should be a dict')
 
     found_valid_dataset = False
 
@@ -250,14 +842,250 @@ def write_results(h5_group, dataset=None, attributes=None, process_name=None):
         log_name = log_name+process_name
 
     log_group = create_indexed_group(h5_group, log_name)
-    write_book_keeping_attrs(log_group)
+    # Also writes the sidpy book-keeping attributes
     write_pynsid_book_keeping_attrs(log_group)
+    lookup_attrs = {RESULTS_HASH_ATTR: get_results_hash(
+        process_name, attributes=attributes, source_dataset=source_dataset)}
+    if source_dataset is not None:
+        lookup_attrs['source_dataset'] = source_dataset.name
+    if status_attrs is not None:
+        lookup_attrs.update(status_attrs)
+    write_simple_attrs(log_group, lookup_attrs)
+    comm = get_mpi_comm(log_group)
 
-    if found_valid_dataset:
+    h5_main_dsets = []
+    if found_valid_dataset and batched:
+        dim_scales = {}
         for dset in dataset:
-            write_nsid_dataset(dset, log_group)
+            h5_main = _write_nsid_structure(
+                dset, log_group, dim_scales=dim_scales, book_keeping=False,
+                compression_profile=compression_profile)
+            dset.h5_dataset = h5_main
+            h5_main_dsets.append(h5_main)
+        if write_data and comm is None:
+            _stream_to_h5(dataset, h5_main_dsets,
+                          max_in_flight_chunks=max_in_flight_chunks)
+        elif write_data:
+            for dset, h5_main in zip(dataset, h5_main_dsets):
+                _write_mpi_slabs(dset, h5_main, comm)
+    elif found_valid_dataset:
+        for dset in dataset:
+            h5_main_dsets.append(write_nsid_dataset(
+                dset, log_group, update_index=False,
+                compression_profile=compression_profile,
+                write_data=write_data))
+
+    if found_valid_dataset and found_valid_attributes:
+        write_simple_attrs(log_group, flatten_dict(attributes))
 
-        if found_valid_attributes:
-            write_simple_attrs(log_group, flatten_dict(attributes))
+    if comm is None:
+        update_main_index(log_group, h5_main_dsets)
 
     return log_group
+
+
+RESULTS_HASH_ATTR = 'results_hash'
+
+
+def _get_object_address(h5_object):
+    """
+    Returns the address of the HDF5 object in its file or None if HDF5 does
+    not provide it
+    """
+    try:
+        return int(h5py.h5o.get_info(h5_object.id).addr)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _to_builtin(value):
+    """
+    Converts numpy and bytes values of attributes for hashing
+    """
+    if isinstance(value, np.ndarray):
+        return [value.dtype.str, value.tolist()]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return repr(value)
+
+
+def get_results_hash(process_name=None, attributes=None,
+                     source_dataset=None):
+    """
+    Returns a hash that identifies a computation by the name of the
+    process, its parameters and the dataset it was applied to
+
+    Parameters
+    ----------
+    process_name : str, optional. Default = None
+        Name of the process
+    attributes : dict, optional. Default = None
+        Parameters of the process
+    source_dataset : h5py.Dataset, optional. Default = None
+        Dataset from which the results are computed
+
+    Returns
+    -------
+    str
+        Hexadecimal MD5 hash
+
+    Notes
+    -----
+    The source dataset is identified by its path, shape, data type and
+    location in the file, but not by its values. Results computed from a
+    dataset whose values were changed in place are therefore considered
+    identical
+    """
+    if attributes is None:
+        attributes = {}
+    if not isinstance(attributes, dict):
+        raise TypeError('attributes should be a dictionary')
+    source = None
+    if source_dataset is not None:
+        if not isinstance(source_dataset, h5py.Dataset):
+            raise TypeError('source_dataset should be a h5py.Dataset object')
+        source = [source_dataset.name, list(source_dataset.shape),
+                  source_dataset.dtype.str,
+                  _get_object_address(source_dataset)]
+    parameters = sorted(flatten_dict(attributes).items())
+    payload = json.dumps([process_name, parameters, source],
+                         default=_to_builtin)
+    return hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+
+def find_results(h5_group, process_name=None, attributes=None,
+                 source_dataset=None):
+    """
+    Finds the results of identical computations written by
+    :func:`write_results` into ``h5_group``. Only attributes of the groups
+    in ``h5_group`` are read
+
+    Parameters
+    ----------
+    h5_group : h5py.Group
+        Group into which the results were written
+    process_name : str, optional. Default = None
+        Name of the process
+    attributes : dict, optional. Default = None
+        Parameters of the process
+    source_dataset : h5py.Dataset, optional. Default = None
+        Dataset from which the results were computed
+
+    Returns
+    -------
+    list of h5py.Group
+        Matching log groups, oldest first
+    """
+    if not isinstance(h5_group, h5py.Group):
+        raise TypeError('h5_group should be a h5py.Group object')
+    results_hash = get_results_hash(process_name, attributes=attributes,
+                                    source_dataset=source_dataset)
+    prefix = 'Log_'
+    if process_name is not None:
+        prefix += process_name
+    matches = []
+    for name in sorted(h5_group):
+        if not name.startswith(prefix):
+            continue
+        h5_log = h5_group[name]
+        if not isinstance(h5_log, h5py.Group):
+            continue
+        value = h5_log.attrs.get(RESULTS_HASH_ATTR)
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        if value == results_hash:
+            matches.append(h5_log)
+    return matches
+
+
+def benchmark_compression(dataset, profiles=None, sample_bytes=64 * 1024 ** 2,
+                          access_pattern='balanced', verbose=False):
+    """
+    Writes a sample of the provided dataset with each compression profile
+    and reports the throughput and compression ratio of each profile. Use
+    this to pick a suitable profile for data from a given instrument.
+
+    Parameters
+    ----------
+    dataset : sidpy.Dataset
+        Dataset representative of the data that will be written
+    profiles : list of str, optional. Default = None
+        Names of compression profiles to benchmark. By default, all profiles
+        in :data:`COMPRESSION_PROFILES` are benchmarked, except for 'lz4'
+        when hdf5plugin is not installed
+    sample_bytes : int, optional. Default = 64 MB
+        Approximate size of the sample taken from the start of ``dataset``
+        along its first dimension
+    access_pattern : str, optional. Default = 'balanced'
+        Used for selecting HDF5 chunks. See
+        :func:`pyNSID.io.hdf_utils.get_h5_chunks`
+    verbose : bool, optional. Default = False
+        Whether or not to print the results
+
+    Returns
+    -------
+    dict
+        For each profile: 'write_MBps' and 'read_MBps' - the throughput of
+        writing and reading the sample, and 'ratio' - the size of the raw
+        sample divided by the size of the compressed sample
+
+    Notes
+    -----
+    Data are written to an in-memory HDF5 file so that the numbers reflect
+    the cost of the compression filters rather than that of the storage
+    """
+    if not isinstance(dataset, Dataset):
+        raise TypeError('dataset should be a sidpy.Dataset object')
+    if profiles is None:
+        profiles = [profile for profile in COMPRESSION_PROFILES
+                    if profile != 'lz4' or hdf5plugin is not None]
+    for profile in profiles:
+        _ = get_compression_kwargs(profile)
+
+    # Take a leading slab of the dataset no larger than sample_bytes
+    chunks = get_h5_chunks(dataset, access_pattern=access_pattern)
+    if dataset.ndim > 0:
+        slab_bytes = dataset.nbytes // max(1, dataset.shape[0])
+        num_rows = int(min(dataset.shape[0],
+                           max(1, sample_bytes // max(1, slab_bytes))))
+        sample = np.array(dataset[:num_rows])
+        if chunks is not None:
+            chunks = (min(chunks[0], num_rows),) + tuple(chunks[1:])
+    else:
+        sample = np.array(dataset)
+    mega_bytes = sample.nbytes / 1024 ** 2
+
+    results = {}
+    for profile in profiles:
+        h5_file = h5py.File('compression_{}.h5'.format(profile), mode='w',
+                            driver='core', backing_store=False)
+        try:
+            # A new Dataset each time since writing links it to the file
+            sid_sample = Dataset.from_array(sample, name='sample')
+            t_start = time.perf_counter()
+            h5_main = write_nsid_dataset(sid_sample, h5_file, update_index=False,
+                                         main_data_name='sample',
+                                         compression_profile=profile,
+                                         chunks=chunks)
+            h5_file.flush()
+            write_time = time.perf_counter() - t_start
+
+            t_start = time.perf_counter()
+            _ = h5_main[()]
+            read_time = time.perf_counter() - t_start
+
+            stored_bytes = h5_main.id.get_storage_size()
+        finally:
+            h5_file.close()
+
+        results[profile] = {'write_MBps': mega_bytes / max(write_time, 1E-9),
+                            'read_MBps': mega_bytes / max(read_time, 1E-9),
+                            'ratio': sample.nbytes / max(stored_bytes, 1)}
+        if verbose:
+            print('{}: write {:.1f} MB/s, read {:.1f} MB/s, ratio {:.2f}'
+                  ''.format(profile, results[profile]['write_MBps'],
+                            results[profile]['read_MBps'],
+                            results[profile]['ratio']))
+    return results
@@ -8,25 +8,311 @@ Created on Tue Aug  3 21:14:25 2020
 @author: Gerd Duscher, and Suhas Somnath
 """
 from __future__ import division, print_function, absolute_import, unicode_literals
+import hashlib
+import socket
+import string
 import sys
+from platform import platform
+from collections import OrderedDict
 from warnings import warn
 import h5py
 import numpy as np
+from dask import array as da
 
 from sidpy.base.dict_utils import nest_dict
+from sidpy.base.string_utils import get_time_stamp
 # from sidpy.base.string_utils import validate_single_string_arg
 from sidpy.hdf.hdf_utils import get_attr, copy_dataset, write_simple_attrs, \
     write_book_keeping_attrs
 from sidpy.hdf import hdf_utils as hut
 from sidpy import Dimension, Dataset
+from sidpy.sid.dataset import view_subclass
+from sidpy.sid.dimension import DimensionType
+from sidpy import __version__ as sidpy_version
 
 from pyNSID.__version__ import version as pynsid_version
+from .instrumentation import record_call, count_chunks
 
 if sys.version_info.major == 3:
     unicode = str
 
 
-def get_all_main(parent, verbose=False):
+NSID_INDEX_NAME = '_nsid_main_index'
+"""Name of the HDF5 dataset at the root of the file listing the paths of all
+NSID main datasets in the file"""
+
+
+def _hash_names(names):
+    """
+    Order-independent hash of HDF5 dataset names. Names can be added to or
+    removed from an existing hash by XOR-ing their hash into it
+
+    Parameters
+    ----------
+    names : iterable of str
+        Absolute paths of HDF5 datasets
+
+    Returns
+    -------
+    int
+        64 bit hash of the names
+    """
+    checksum = 0
+    for name in names:
+        digest = hashlib.md5(name.encode('utf-8')).hexdigest()
+        checksum ^= int(digest[:16], 16)
+    return checksum
+
+
+def _get_dataset_names(h5_group):
+    """
+    Returns the absolute paths of all datasets within the provided group
+    except for the NSID index itself. Only object headers are visited.
+    No attributes or data are read
+
+    Parameters
+    ----------
+    h5_group : h5py.Group
+        Group to walk
+
+    Returns
+    -------
+    list of str
+        Absolute paths of all datasets under ``h5_group``
+    """
+    prefix = h5_group.name.rstrip('/') + '/'
+    names = []
+
+    def __append(name, info):
+        if info.type == h5py.h5o.TYPE_DATASET:
+            if isinstance(name, bytes):
+                name = name.decode('utf-8')
+            names.append(prefix + name)
+
+    h5py.h5o.visit(h5_group.id, __append, info=True)
+    return [name for name in names if name != '/' + NSID_INDEX_NAME]
+
+
+def get_tree_checksum(h5_file):
+    """
+    Computes a checksum of the names of all datasets in the HDF5 file.
+    Only the object headers are walked. No attributes or data are read
+
+    Parameters
+    ----------
+    h5_file : h5py.File or h5py.Group
+        File (or object within the file) to compute the checksum for
+
+    Returns
+    -------
+    str
+        Hexadecimal checksum of the tree
+    """
+    if not isinstance(h5_file, (h5py.Group, h5py.File)):
+        raise TypeError('h5_file should be a h5py.File or h5py.Group object')
+    return '{:016x}'.format(_hash_names(_get_dataset_names(h5_file.file)))
+
+
+def _sort_paths(paths):
+    """
+    Returns the unique paths in the order in which :meth:`h5py.Group.visititems`
+    visits them
+    """
+    return sorted(set(paths), key=lambda path: path.split('/'))
+
+
+def write_main_index(h5_file, main_dsets=None, checksum=None):
+    """
+    Writes (or overwrites) the index of NSID main datasets in the file.
+    The index is used by :func:`get_all_main` to avoid walking and
+    validating every object in the file
+
+    Parameters
+    ----------
+    h5_file : h5py.File or h5py.Group
+        File (or object within the file) to index
+    main_dsets : list of h5py.Dataset or str, optional. Default = None
+        Main datasets in the file. By default, the entire file is searched
+    checksum : str, optional. Default = None
+        Checksum of the tree. By default, this is computed from the file
+
+    Returns
+    -------
+    h5py.Dataset
+        Dataset containing the absolute paths of the main datasets
+    """
+    if not isinstance(h5_file, (h5py.Group, h5py.File)):
+        raise TypeError('h5_file should be a h5py.File or h5py.Group object')
+    h5_file = h5_file.file
+    if main_dsets is None:
+        main_dsets = get_all_main(h5_file, use_index=False)
+    if checksum is None:
+        checksum = get_tree_checksum(h5_file)
+
+    paths = _sort_paths([item.name if isinstance(item, h5py.Dataset) else item
+                         for item in main_dsets])
+
+    h5_index = h5_file.get(NSID_INDEX_NAME)
+    if isinstance(h5_index, h5py.Dataset) and h5_index.maxshape == (None,):
+        h5_index.resize((len(paths),))
+    else:
+        if h5_index is not None:
+            del h5_file[NSID_INDEX_NAME]
+        h5_index = h5_file.create_dataset(NSID_INDEX_NAME,
+                                          shape=(len(paths),),
+                                          maxshape=(None,), chunks=True,
+                                          dtype=h5py.special_dtype(vlen=unicode))
+    if len(paths) > 0:
+        h5_index[:] = paths
+    write_simple_attrs(h5_index, {'tree_checksum': checksum,
+                                  'pyNSID_version': pynsid_version})
+    return h5_index
+
+
+def _get_main_index(h5_object):
+    """
+    Returns the index of main datasets in the file if it exists and can be
+    modified
+
+    Parameters
+    ----------
+    h5_object : h5py.Dataset, h5py.Group or h5py.File
+        Object within the HDF5 file
+
+    Returns
+    -------
+    h5py.Dataset or None
+    """
+    h5_index = h5_object.file.get(NSID_INDEX_NAME)
+    if not isinstance(h5_index, h5py.Dataset) or \
+            h5_index.maxshape != (None,) or \
+            h5_index.file.mode != 'r+':
+        return None
+    return h5_index
+
+
+def _append_to_main_index(h5_index, main_dsets):
+    """
+    Appends the paths of main datasets to the index without rewriting the
+    paths already in the index. Repeated paths are ignored when the index
+    is read
+
+    Parameters
+    ----------
+    h5_index : h5py.Dataset
+        Index of main datasets
+    main_dsets : list of h5py.Dataset
+        Main datasets to add to the index
+    """
+    if len(main_dsets) == 0:
+        return
+    if get_mpi_comm(h5_index) is not None:
+        # Variable-length strings cannot be written in parallel.
+        # Mark the index as out of date instead
+        write_simple_attrs(h5_index, {'tree_checksum': ''})
+        return
+    num_paths = h5_index.shape[0]
+    h5_index.resize((num_paths + len(main_dsets),))
+    h5_index[num_paths:] = [dset.name for dset in main_dsets]
+
+
+def update_main_index(h5_new_group, main_dsets):
+    """
+    Adds freshly written NSID main datasets to the index in the file, if
+    the file has an index. Only the objects within ``h5_new_group`` are
+    walked and only the new paths are written.
+
+    Files without an index are indexed by :func:`write_main_index`.
+    Datasets created outside of pyNSID make the index out of date. Such an
+    index is ignored by :func:`get_all_main` until it is rebuilt
+
+    Parameters
+    ----------
+    h5_new_group : h5py.Group
+        Newly created group which contains all datasets created since the
+        index was last updated
+    main_dsets : list of h5py.Dataset
+        Main datasets that were written within ``h5_new_group``
+
+    Returns
+    -------
+    h5py.Dataset or None
+        Dataset containing the absolute paths of the main datasets. None if
+        the file has no index
+    """
+    if not isinstance(h5_new_group, h5py.Group):
+        raise TypeError('h5_new_group should be a h5py.Group object')
+    h5_index = _get_main_index(h5_new_group)
+    if h5_index is None:
+        return None
+
+    checksum = get_attr(h5_index, 'tree_checksum')
+    if checksum != '':
+        checksum = int(checksum, 16)
+        checksum ^= _hash_names(_get_dataset_names(h5_new_group))
+        write_simple_attrs(h5_index,
+                           {'tree_checksum': '{:016x}'.format(checksum)})
+    _append_to_main_index(h5_index, main_dsets)
+    return h5_index
+
+
+def _read_index_paths(h5_index):
+    """
+    Returns the paths stored in the NSID index as a list of str
+    """
+    return [path.decode('utf-8') if isinstance(path, bytes) else path
+            for path in h5_index[()]]
+
+
+def _get_main_from_index(h5_file, checksum, verbose=False):
+    """
+    Returns all main datasets in the file according to the index in the
+    file if the index exists and is consistent with the file
+
+    Parameters
+    ----------
+    h5_file : h5py.File
+        File to search within
+    checksum : str
+        Current checksum of the tree. See :func:`get_tree_checksum`
+    verbose : bool, optional. Default = False
+        Whether or not to print debugging statements
+
+    Returns
+    -------
+    list of h5py.Dataset or None
+        None if the file has no index or the index is out of date
+    """
+    h5_index = h5_file.get(NSID_INDEX_NAME)
+    if not isinstance(h5_index, h5py.Dataset) or \
+            'tree_checksum' not in h5_index.attrs:
+        return None
+    if get_attr(h5_index, 'tree_checksum') != checksum:
+        if verbose:
+            print('Index of main datasets is out of date')
+        return None
+
+    main_list = []
+    for path in _sort_paths(_read_index_paths(h5_index)):
+        obj = h5_file.get(path)
+        if not isinstance(obj, h5py.Dataset) or not check_if_main(obj):
+            if verbose:
+                print('Indexed object: {} is no longer a main dataset'
+                      ''.format(path))
+            return None
+        main_list.append(obj)
+    return main_list
+
+
+def _can_write_index(h5_file):
+    """
+    Whether or not the index of main datasets can be (re)built in the file
+    """
+    return h5_file.mode == 'r+' and not h5_file.swmr_mode and \
+        get_mpi_comm(h5_file) is None
+
+
+def get_all_main(parent, verbose=False, use_index=True, build_index=False):
     """
     Simple function to recursively print the contents of an hdf5 group
     Parameters
@@ -35,96 +321,782 @@ def get_all_main(parent, verbose=False):
         HDF5 Group to search within
     verbose : bool, optional. Default = False
         If true, extra print statements (usually for debugging) are enabled
+    use_index : bool, optional. Default = True
+        If true and ``parent`` is the root of the file, the index of main
+        datasets is used when present and consistent with the file.
+        Otherwise, every object in ``parent`` is checked. Searches within
+        groups always check every object in the group
+    build_index : bool, optional. Default = False
+        If true, ``parent`` is the root of the file and the file is
+        writable, the index of main datasets is written to the file when it
+        is missing or out of date. The file is never modified otherwise
     Returns
     -------
     main_list : list of h5py.Dataset
         The datasets found in the file that meet the 'Main Data' criteria.
+
+    Notes
+    -----
+    The index is created by :func:`write_main_index` (or with
+    ``build_index=True``) and kept up to date by
+    :func:`pyNSID.io.hdf_io.write_nsid_dataset`,
+    :func:`pyNSID.io.hdf_io.write_results`, :func:`link_as_main` and
+    :func:`write_pynsid_book_keeping_attrs`.
+    Datasets turned into main datasets in place by other means, e.g. by
+    writing attributes or attaching scales via h5py, are only found after
+    the index is rebuilt via :func:`write_main_index` or with
+    ``use_index=False``
     """
     if not isinstance(parent, (h5py.Group, h5py.File)):
         raise TypeError('parent should be a h5py.File or h5py.Group object')
 
-    main_list = list()
-
-    def __check(name, obj):
-        if verbose:
-            print(name, obj)
-        if isinstance(obj, h5py.Dataset):
+    h5_file = parent.file
+    is_root = parent.name == '/'
+    use_index = use_index and is_root
+    build_index = build_index and is_root and _can_write_index(h5_file)
+    checksum = None
+
+    with record_call('get_all_main', parent) as call:
+        if use_index or build_index:
+            has_index = use_index and NSID_INDEX_NAME in h5_file
+            if has_index or build_index:
+                with call.phase('index'):
+                    checksum = get_tree_checksum(h5_file)
+                    if has_index:
+                        main_list = _get_main_from_index(h5_file, checksum,
+                                                         verbose=verbose)
+                    else:
+                        main_list = None
+                if main_list is not None:
+                    if verbose:
+                        print('Found {} `Main` datasets in the index'
+                              ''.format(len(main_list)))
+                    call.add(objects_visited=len(main_list) + 1)
+                    return main_list
+
+        main_list = list()
+        visited = [0]
+
+        def __check(name, obj):
+            visited[0] += 1
             if verbose:
-                print(name, 'is an HDF5 Dataset.')
-            ismain = check_if_main(obj)
-            if ismain:
+                print(name, obj)
+            if isinstance(obj, h5py.Dataset):
                 if verbose:
-                    print(name, 'is a `Main` dataset.')
-                # TODO: Upconvert to sidpy.Dataset object with new function
-                main_list.append(obj)
+                    print(name, 'is an HDF5 Dataset.')
+                ismain = check_if_main(obj)
+                if ismain:
+                    if verbose:
+                        print(name, 'is a `Main` dataset.')
+                    # TODO: Upconvert to sidpy.Dataset object with new function
+                    main_list.append(obj)
 
-    if verbose:
-        print('Checking the group {} for `Main` datasets.'.format(parent.name))
-    parent.visititems(__check)
+        if verbose:
+            print('Checking the group {} for `Main` datasets.'
+                  ''.format(parent.name))
+        with call.phase('walk'):
+            parent.visititems(__check)
+        call.add(objects_visited=visited[0])
+
+        if build_index:
+            if verbose:
+                print('Writing the index of main datasets')
+            with call.phase('index'):
+                write_main_index(h5_file, main_dsets=main_list,
+                                 checksum=checksum)
 
     return main_list
 
 
-def read_h5py_dataset(dset):
+def get_dask_chunks(dset, chunks='auto'):
+    """
+    Returns dask chunks for the provided HDF5 dataset that are aligned with
+    the chunk layout of the dataset on disk
+
+    Parameters
+    ----------
+    dset : h5py.Dataset
+        HDF5 dataset that will be wrapped in a dask array
+    chunks : str, int, or tuple, optional. Default = 'auto'
+        Chunks requested for the dask array. When set to 'auto', dask picks
+        chunk sizes that are whole multiples of the HDF5 chunks of ``dset``
+
+    Returns
+    -------
+    tuple
+        Normalized dask chunks
+    """
     if not isinstance(dset, h5py.Dataset):
-        raise TypeError('can only read single Dataset, use read_all_in_group or read_all function instead')
+        raise TypeError('dset should be a h5py.Dataset object')
+    return da.core.normalize_chunks(chunks, shape=dset.shape,
+                                    dtype=dset.dtype,
+                                    previous_chunks=dset.chunks)
 
-    if not check_if_main(dset):
-        raise TypeError('can only read NSID datasets, not general one, try to import with from_array')
 
-    # create vanilla dask array
-    dataset = Dataset.from_array(np.array(dset))
+DEFAULT_CHUNK_BYTES = 1024 ** 2
+"""Default target size in bytes of HDF5 chunks chosen by
+:func:`get_h5_chunks`"""
 
-    if 'title' in dset.attrs:
-        dataset.title = dset.attrs['title']
-    else:
-        dataset.title = dset.name
+ACCESS_PATTERNS = {'image': (DimensionType.SPATIAL, DimensionType.RECIPROCAL),
+                   'spectrum': (DimensionType.SPECTRAL,
+                                DimensionType.TEMPORAL),
+                   'balanced': None}
+"""Types of dimensions kept whole within each HDF5 chunk for each access
+pattern. All dimensions are treated equally for 'balanced'"""
 
-    if 'units' in dset.attrs:
-        dataset.units = dset.attrs['units']
-    else:
-        dataset.units = 'generic'
 
-    if 'quantity' in dset.attrs:
-        dataset.quantity = dset.attrs['quantity']
-    else:
-        dataset.quantity = 'generic'
+def _align_chunk(chunk, dask_chunk, length):
+    """
+    Adjusts the length of a HDF5 chunk along one dimension such that dask
+    blocks never straddle two HDF5 chunks. The HDF5 chunk is made a multiple
+    of the dask chunk or a divisor of the dask chunk, as long as this does not
+    shrink the HDF5 chunk by more than half
+    """
+    if chunk >= length:
+        return length
+    if chunk >= dask_chunk:
+        return (chunk // dask_chunk) * dask_chunk
+    for divisor in range(chunk, max(1, chunk // 2) - 1, -1):
+        if dask_chunk % divisor == 0:
+            return divisor
+    return chunk
+
+
+def get_h5_chunks(dataset, access_pattern='balanced',
+                  target_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Picks the shape of HDF5 chunks for writing the provided dataset based on
+    the types of its dimensions and the expected pattern of access
 
-    if 'data_type' in dset.attrs:
-        dataset.data_type = dset.attrs['data_type']
-    else:
-        dataset.data_type = 'generic'
+    Parameters
+    ----------
+    dataset : sidpy.Dataset
+        Dataset that will be written
+    access_pattern : str, optional. Default = 'balanced'
+        How the data will mostly be read:
+
+        * 'image' - whole images, i.e. all spatial and reciprocal dimensions
+          are kept whole within each chunk
+        * 'spectrum' - whole spectra, i.e. all spectral and temporal
+          dimensions are kept whole within each chunk
+        * 'balanced' - arbitrary hyper-slabs. All dimensions are split
+          evenly
+
+        Falls back to 'balanced' if the dataset has no dimensions of the
+        requested types
+    target_bytes : int, optional. Default = 1 MB
+        Desired size of each chunk in bytes
 
-    if 'modality' in dset.attrs:
-        dataset.modality = dset.attrs['modality']
-    else:
-        dataset.modality = 'generic'
+    Returns
+    -------
+    tuple or None
+        Shape of the HDF5 chunks. None if the dataset cannot be chunked
 
-    if 'source' in dset.attrs:
-        dataset.source = dset.attrs['source']
+    Notes
+    -----
+    Chunks are aligned with the dask chunks of ``dataset`` where possible
+    so that no block written by dask straddles two HDF5 chunks
+    """
+    if not isinstance(dataset, Dataset):
+        raise TypeError('dataset should be a sidpy.Dataset object')
+    if access_pattern not in ACCESS_PATTERNS:
+        raise ValueError('access_pattern should be one of {}. Provided: {}'
+                         ''.format(list(ACCESS_PATTERNS.keys()),
+                                   access_pattern))
+    if not isinstance(target_bytes, int) or target_bytes < 1:
+        raise ValueError('target_bytes should be a positive integer')
+
+    shape = dataset.shape
+    if len(shape) == 0 or 0 in shape:
+        return None
+    target_size = max(1, target_bytes // dataset.dtype.itemsize)
+
+    whole_types = ACCESS_PATTERNS[access_pattern]
+    if whole_types is None:
+        keep_whole = [True] * len(shape)
     else:
-        dataset.source = 'generic'
-
-    dataset.axes = {}
-
-    for dim in range(np.array(dset).ndim):
-        try:
-            label = dset.dims[dim].keys()[-1]
-            name = dset.dims[dim][label].name
-            dim_dict = {'quantity': 'generic', 'units': 'generic', 'dimension_type': 'generic'}
-            dim_dict.update(dict(dset.parent[name].attrs))
-
-            dataset.set_dimension(dim, Dimension(np.array(dset.parent[name][()]),
-                                                 dset.dims[dim].label,
-                                                 dim_dict['quantity'], dim_dict['units'],
-                                                 dim_dict['dimension_type']))
-        except ValueError:
-            print('dimension {} not NSID type using generic'.format(dim))
-
-    for key in dset.parent:
-        if isinstance(dset.parent[key], h5py.Group):
+        keep_whole = []
+        for ind in range(len(shape)):
+            dim = dataset._axes.get(ind)
+            dim_type = getattr(dim, 'dimension_type', DimensionType.UNKNOWN)
+            keep_whole.append(dim_type in whole_types)
+        if not any(keep_whole):
+            keep_whole = [True] * len(shape)
+
+    chunks = [length if whole else 1
+              for length, whole in zip(shape, keep_whole)]
+
+    # Halve the longest dimension until the chunk is small enough
+    while np.prod(chunks, dtype=np.int64) > target_size and max(chunks) > 1:
+        ind = int(np.argmax(chunks))
+        chunks[ind] = int(np.ceil(chunks[ind] / 2))
+
+    # Grow the remaining dimensions, fastest varying first, to fill the chunk
+    for ind in reversed(range(len(shape))):
+        if keep_whole[ind]:
+            continue
+        others = np.prod(chunks, dtype=np.int64) // chunks[ind]
+        chunks[ind] = int(max(1, min(shape[ind], target_size // others)))
+
+    return tuple(_align_chunk(chunk, dask_chunk, length)
+                 for chunk, dask_chunk, length in zip(chunks,
+                                                      dataset.chunksize,
+                                                      shape))
+
+
+def _dataset_from_dask(dask_array):
+    """
+    Views the provided dask array as a sidpy.Dataset with generic attributes
+    and dimensions without computing it.
+
+    Parameters
+    ----------
+    dask_array : dask.array.core.Array
+        Dask array to view as a sidpy.Dataset
+
+    Returns
+    -------
+    sidpy.Dataset
+        Dataset with generic attributes and dimensions
+    """
+    dataset = view_subclass(dask_array, Dataset)
+
+    dataset.data_type = 'UNKNOWN'
+    dataset.title = 'generic'
+    for dim in range(dataset.ndim):
+        if dim < len(string.ascii_lowercase):
+            name = string.ascii_lowercase[dim]
+        else:
+            name = 'dim_{}'.format(dim)
+        dataset.set_dimension(dim, Dimension(np.arange(dataset.shape[dim]),
+                                             name))
+    dataset.metadata = {}
+    dataset.original_metadata = {}
+    return dataset
+
+
+def _lazy_load_dataset(dset, chunks='auto', slices=None):
+    """
+    Wraps the provided HDF5 dataset in a sidpy.Dataset without reading any
+    data. Values are only read from the file when computed.
+
+    Parameters
+    ----------
+    dset : h5py.Dataset
+        HDF5 dataset to wrap
+    chunks : str, int, or tuple, optional. Default = 'auto'
+        Chunks for the underlying dask array. See :func:`get_dask_chunks`
+    slices : tuple of slice, optional. Default = None
+        Region of ``dset`` to wrap. See :func:`get_region_slices`
+
+    Returns
+    -------
+    sidpy.Dataset
+        Dataset with generic attributes and dimensions
+    """
+    # h5py objects are not thread-safe, hence the lock.
+    # name=False avoids tokenizing (hashing) the contents of the file
+    dask_array = da.from_array(dset, chunks=get_dask_chunks(dset, chunks),
+                               lock=True, name=False)
+    if slices is not None:
+        dask_array = dask_array[slices]
+    return _dataset_from_dask(dask_array)
+
+
+# File drivers that store a HDF5 file as a single regular file on disk
+MEMMAP_DRIVERS = ['sec2', 'stdio', 'direct']
+
+
+def get_memmap(dset):
+    """
+    Maps the raw bytes of a contiguous, uncompressed HDF5 dataset in the
+    file into memory without going through the HDF5 library
+
+    Parameters
+    ----------
+    dset : h5py.Dataset
+        HDF5 dataset
+
+    Returns
+    -------
+    numpy.memmap or None
+        Read-only array backed by the file. None if the dataset cannot be
+        memory-mapped, e.g. because it is chunked, compressed, stored in
+        external files, has no storage allocated yet, has data of variable
+        length or is in a file that is not a regular file on disk
+
+    Notes
+    -----
+    Open files are flushed before mapping them so that the map reflects
+    all data written so far. Data written through h5py after mapping may
+    not be visible in the map.
+    """
+    if not isinstance(dset, h5py.Dataset):
+        raise TypeError('dset should be a h5py.Dataset object')
+    if dset.chunks is not None or dset.compression is not None or \
+            dset.external is not None or dset.dtype.hasobject or \
+            dset.file.driver not in MEMMAP_DRIVERS:
+        return None
+    if h5py.check_vlen_dtype(dset.dtype) is not None or dset.size == 0:
+        return None
+    offset = dset.id.get_offset()
+    if offset is None:
+        return None
+    if dset.file.mode != 'r':
+        dset.file.flush()
+    return np.memmap(dset.file.filename, dtype=dset.dtype, mode='r',
+                     offset=offset, shape=dset.shape)
+
+
+def _memmap_dataset(dset, chunks='auto', slices=None):
+    """
+    Wraps the memory-mapped values of the provided HDF5 dataset in a
+    sidpy.Dataset. Values are read from the file by the operating system
+    when accessed. See :func:`get_memmap`
+
+    Parameters
+    ----------
+    dset : h5py.Dataset
+        Contiguous, uncompressed HDF5 dataset
+    chunks : str, int, or tuple, optional. Default = 'auto'
+        Chunks for the underlying dask array. See :func:`get_dask_chunks`
+    slices : tuple of slice, optional. Default = None
+        Region of ``dset`` to wrap. See :func:`get_region_slices`
+
+    Returns
+    -------
+    sidpy.Dataset or None
+        None if ``dset`` cannot be memory-mapped
+    """
+    mem_map = get_memmap(dset)
+    if mem_map is None:
+        return None
+    if slices is not None:
+        # A view into the map. Nothing is read
+        mem_map = mem_map[slices]
+    # No lock needed since the HDF5 library is not involved.
+    # name=False avoids tokenizing (hashing) the contents of the file
+    dask_array = da.from_array(mem_map,
+                               chunks=da.core.normalize_chunks(
+                                   chunks, shape=mem_map.shape,
+                                   dtype=mem_map.dtype),
+                               name=False)
+    return _dataset_from_dask(dask_array)
+
+
+def _skeleton_dataset(dset, chunks='auto', slices=None):
+    """
+    Creates a sidpy.Dataset with the shape, dtype and chunks of the provided
+    HDF5 dataset using only the metadata of the dataset.
+
+    Parameters
+    ----------
+    dset : h5py.Dataset
+        HDF5 dataset to mimic
+    chunks : str, int, or tuple, optional. Default = 'auto'
+        Chunks for the underlying dask array. See :func:`get_dask_chunks`
+    slices : tuple of slice, optional. Default = None
+        Region of ``dset`` to mimic. See :func:`get_region_slices`
+
+    Returns
+    -------
+    sidpy.Dataset
+        Dataset whose values are uninitialized placeholders
+    """
+    dask_array = da.empty(dset.shape, dtype=dset.dtype,
+                          chunks=get_dask_chunks(dset, chunks))
+    if slices is not None:
+        dask_array = dask_array[slices]
+    return _dataset_from_dask(dask_array)
+
+
+def get_region_slices(dset, region):
+    """
+    Converts a region of interest into one slice per dimension of a NSID
+    main dataset
+
+    Parameters
+    ----------
+    dset : h5py.Dataset
+        NSID main dataset
+    region : tuple, list or dict
+        Region of interest. Either a tuple / list with one entry per leading
+        dimension or a dictionary keyed by the index or name of dimensions.
+        Each entry can be:
+
+        * a slice of indices, e.g. ``slice(10, 74)``
+        * an int - a single index. The dimension is retained with length 1
+        * a (start, stop) tuple of values of the dimension. All positions
+          whose values are between start and stop (inclusive) are selected
+        * None - the entire dimension
+
+        Dimensions that are not specified are read entirely
+
+    Returns
+    -------
+    tuple of slice
+        One slice with a positive step per dimension of ``dset``
+    """
+    if not isinstance(dset, h5py.Dataset):
+        raise TypeError('dset should be a h5py.Dataset object')
+    if isinstance(region, slice):
+        region = (region,)
+    if isinstance(region, (list, tuple)):
+        if len(region) > dset.ndim:
+            raise ValueError('region has {} entries but the dataset only has '
+                             '{} dimensions'.format(len(region), dset.ndim))
+        region = dict(enumerate(region))
+    if not isinstance(region, dict):
+        raise TypeError('region should be a tuple, list or dict')
+
+    labels = [dset.dims[dim].label for dim in range(dset.ndim)]
+    slices = [slice(0, length, 1) for length in dset.shape]
+    for key, item in region.items():
+        if isinstance(key, (str, unicode)):
+            if key not in labels:
+                raise KeyError('{} is not a dimension of {}. Available '
+                               'dimensions are: {}'.format(key, dset.name,
+                                                           labels))
+            dim = labels.index(key)
+        elif isinstance(key, (int, np.integer)) and -dset.ndim <= key < \
+                dset.ndim:
+            dim = int(key) % dset.ndim
+        else:
+            raise KeyError('Invalid dimension: {}'.format(key))
+        length = dset.shape[dim]
+
+        if item is None:
+            slc = slice(None)
+        elif isinstance(item, slice):
+            slc = item
+        elif isinstance(item, (int, np.integer)):
+            if not -length <= item < length:
+                raise IndexError('Index {} is out of bounds for dimension {} '
+                                 'of length {}'.format(item, dim, length))
+            item = int(item) % length
+            slc = slice(item, item + 1)
+        elif isinstance(item, (list, tuple)) and len(item) == 2:
+            values = dset.dims[dim][len(dset.dims[dim]) - 1][()]
+            low, high = sorted(item)
+            indices = np.where((values >= low) & (values <= high))[0]
+            if len(indices) == 0:
+                raise ValueError('No values of dimension {} lie between {} and'
+                                 ' {}'.format(labels[dim], low, high))
+            slc = slice(int(indices[0]), int(indices[-1]) + 1)
+        else:
+            raise TypeError('Region for dimension {} should be a slice, int, '
+                            '(start, stop) tuple or None. Provided: {}'
+                            ''.format(dim, item))
+
+        start, stop, step = slc.indices(length)
+        if step < 1:
+            raise ValueError('Only positive steps are supported')
+        if len(range(start, stop, step)) == 0:
+            raise ValueError('Region for dimension {} is empty'.format(dim))
+        slices[dim] = slice(start, stop, step)
+    return tuple(slices)
+
+
+def _copy_dimension(dimension, name=None, values=None):
+    """
+    Returns a new sidpy.Dimension with the attributes of ``dimension``
+
+    Parameters
+    ----------
+    dimension : sidpy.Dimension
+        Dimension to copy
+    name : str, optional. Default = None
+        Name of the new dimension. By default, the name of ``dimension``
+    values : array-like, optional. Default = None
+        Values of the new dimension. By default, a copy of the values of
+        ``dimension``
+
+    Returns
+    -------
+    sidpy.Dimension
+        Copy of ``dimension``
+    """
+    if name is None:
+        name = dimension.name
+    if values is None:
+        values = np.array(dimension.values)
+    return Dimension(values, name, dimension.quantity, dimension.units,
+                     dimension.dimension_type)
+
+
+DIMENSION_CACHE_SIZE = 128
+"""Default maximum number of dimensions held in a :class:`DimensionCache`"""
+
+
+class DimensionCache(object):
+
+    def __init__(self, max_size=DIMENSION_CACHE_SIZE):
+        """
+        Least-recently-used cache of sidpy.Dimension objects decoded from
+        the dimension scales in a HDF5 file. Use one cache per file so that
+        dimension scales shared by many main datasets are read only once.
+
+        Parameters
+        ----------
+        max_size : int, optional. Default = 128
+            Maximum number of dimensions held in the cache
+
+        Notes
+        -----
+        Dimension scales are identified by their HDF5 object ID. A cached
+        dimension is discarded if the length of its scale changes.
+        Other changes to the scale are not detected.
+        """
+        if not isinstance(max_size, (int, np.integer)) or max_size < 1:
+            raise ValueError('max_size should be a positive integer')
+        self.max_size = int(max_size)
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, h5_dim):
+        item = self._cache.get(h5_dim.id)
+        return item is not None and item[1] == h5_dim.shape
+
+    def clear(self):
+        """
+        Removes all dimensions from the cache
+        """
+        self._cache.clear()
+
+    def get(self, h5_dim, name=None):
+        """
+        Returns a copy of the dimension decoded from the dimension scale
+
+        Parameters
+        ----------
+        h5_dim : h5py.Dataset
+            Dimension scale
+        name : str, optional. Default = None
+            Name of the returned dimension. By default, the name of the
+            cached dimension
+
+        Returns
+        -------
+        sidpy.Dimension or None
+            Copy of the cached dimension or None if the scale is not cached
+        """
+        if h5_dim not in self:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._cache.move_to_end(h5_dim.id)
+        # A copy since sidpy.Dataset objects may alter their dimensions
+        return _copy_dimension(self._cache[h5_dim.id][0], name=name)
+
+    def put(self, h5_dim, dimension):
+        """
+        Adds the dimension decoded from the dimension scale to the cache
+
+        Parameters
+        ----------
+        h5_dim : h5py.Dataset
+            Dimension scale
+        dimension : sidpy.Dimension
+            Dimension decoded from ``h5_dim``
+        """
+        if not isinstance(dimension, Dimension):
+            raise TypeError('dimension should be a sidpy.Dimension object')
+        self._cache[h5_dim.id] = (dimension, h5_dim.shape)
+        self._cache.move_to_end(h5_dim.id)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+
+def read_nsid_attrs(dset, dim_cache=None):
+    """
+    Reads the attributes of a NSID main dataset, its dimension scales and the
+    metadata groups next to it in a single pass. Each HDF5 object is opened
+    only once, which matters most for files on slow (network) file systems.
+
+    Parameters
+    ----------
+    dset : h5py.Dataset
+        NSID main dataset
+    dim_cache : DimensionCache, optional. Default = None
+        The attributes of dimension scales already in this cache are not
+        read
+
+    Returns
+    -------
+    dict
+        'attrs' : dict - attributes of ``dset``
+        'dimensions' : list - a (h5py.Dataset, label, dict of attributes)
+        tuple per dimension. The dataset and attributes are those of the
+        last attached dimension scale or (None, label, {}) if no scale is
+        attached. The attributes are None for scales in ``dim_cache``
+        'groups' : dict - attributes of each group in the parent group of
+        ``dset`` keyed by the name of the group
+    """
+    if not isinstance(dset, h5py.Dataset):
+        raise TypeError('dset should be a h5py.Dataset object')
+    dimensions = []
+    for dim in range(dset.ndim):
+        dim_proxy = dset.dims[dim]
+        num_scales = len(dim_proxy)
+        if num_scales == 0:
+            dimensions.append((None, dim_proxy.label, {}))
+            continue
+        h5_dim = dim_proxy[num_scales - 1]
+        if dim_cache is not None and h5_dim in dim_cache:
+            dim_attrs = None
+        else:
+            dim_attrs = dict(h5_dim.attrs)
+        dimensions.append((h5_dim, dim_proxy.label, dim_attrs))
+
+    groups = {}
+    for key, h5_obj in dset.parent.items():
+        if isinstance(h5_obj, h5py.Group):
+            groups[key] = dict(h5_obj.attrs)
+
+    return {'attrs': dict(dset.attrs), 'dimensions': dimensions,
+            'groups': groups}
+
+
+def read_h5py_dataset(dset, lazy=False, chunks='auto',
+                      read_metadata_only=False, region=None, dim_cache=None,
+                      memmap=False):
+    """
+    Reads a NSID main HDF5 dataset into a sidpy.Dataset
+
+    Parameters
+    ----------
+    dset : h5py.Dataset
+        NSID main dataset to read
+    lazy : bool, optional. Default = False
+        If True, the returned sidpy.Dataset wraps ``dset`` directly and no
+        data is read until the dataset is computed. The HDF5 file must
+        remain open for as long as the sidpy.Dataset is in use.
+        If False, the entire dataset is read into memory
+    chunks : str, int, or tuple, optional. Default = 'auto'
+        Chunks of the dask array when ``lazy`` is True. By default, chunks
+        are aligned with the chunks of ``dset`` on disk
+    read_metadata_only : bool, optional. Default = False
+        If True, none of the values of ``dset`` are read. The returned
+        sidpy.Dataset has the shape, dtype, attributes, dimensions and
+        metadata of ``dset`` but its values are uninitialized placeholders.
+        Use this to catalog files quickly. Takes precedence over ``lazy``
+    region : tuple, list or dict, optional. Default = None
+        Region of interest to read instead of the entire dataset. Only this
+        hyper-slab is read from the file and the dimensions are sliced
+        accordingly. See :func:`get_region_slices` for the accepted forms
+    dim_cache : DimensionCache, optional. Default = None
+        Cache of dimensions already read from the same file. Dimension
+        scales shared by several datasets are only read once when the same
+        cache is used to read all of them
+    memmap : bool, optional. Default = False
+        If True and ``dset`` is contiguous and uncompressed, the values of
+        the returned sidpy.Dataset are memory-mapped from the file rather
+        than read through the HDF5 library, regardless of ``lazy``. Values
+        are then read on access, without copies, and repeated reads are
+        served from the page cache of the operating system, even across
+        processes. Falls back to ``lazy`` otherwise. See :func:`get_memmap`
+
+    Returns
+    -------
+    sidpy.Dataset
+        Dataset with the values, dimensions and metadata of ``dset``
+    """
+    with record_call('read_h5py_dataset', dset) as call:
+        return _read_h5py_dataset(dset, call, lazy=lazy, chunks=chunks,
+                                  read_metadata_only=read_metadata_only,
+                                  region=region, dim_cache=dim_cache,
+                                  memmap=memmap)
+
+
+def _read_h5py_dataset(dset, call, lazy=False, chunks='auto',
+                       read_metadata_only=False, region=None, dim_cache=None,
+                       memmap=False):
+    """
+    Reads a NSID main HDF5 dataset into a sidpy.Dataset. See
+    :func:`read_h5py_dataset`. ``call`` is the object returned by
+    :func:`pyNSID.io.instrumentation.record_call` that records measurements
+    """
+    if not isinstance(dset, h5py.Dataset):
+        raise TypeError('can only read single Dataset, use read_all_in_group or read_all function instead')
+
+    with call.phase('validation'):
+        is_main = check_if_main(dset)
+    if not is_main:
+        raise TypeError('can only read NSID datasets, not general one, try to import with from_array')
+
+    slices = None
+    if region is not None:
+        slices = get_region_slices(dset, region)
+
+    with call.phase('data'):
+        dataset = None
+        if memmap and not read_metadata_only:
+            dataset = _memmap_dataset(dset, chunks=chunks, slices=slices)
+        if dataset is not None:
+            # Values are only read from the file when accessed
+            lazy = True
+        elif read_metadata_only:
+            dataset = _skeleton_dataset(dset, chunks=chunks, slices=slices)
+        elif lazy:
+            dataset = _lazy_load_dataset(dset, chunks=chunks, slices=slices)
+        elif slices is not None:
+            # Only the hyper-slab is read from the file
+            dataset = Dataset.from_array(dset[slices])
+        else:
+            # create vanilla dask array
+            dataset = Dataset.from_array(np.array(dset))
+    if call and not (read_metadata_only or lazy):
+        call.add(bytes_read=dataset.nbytes,
+                 chunks_touched=count_chunks(dset, slices))
+
+    with call.phase('metadata'):
+        nsid_attrs = read_nsid_attrs(dset, dim_cache=dim_cache)
+        main_attrs = nsid_attrs['attrs']
+
+        dataset.title = main_attrs.get('title', dset.name)
+        for key in ['units', 'quantity', 'data_type', 'modality', 'source']:
+            setattr(dataset, key, main_attrs.get(key, 'generic'))
+
+        dataset.axes = {}
+
+        for dim, (h5_dim, label, dim_attrs) in \
+                enumerate(nsid_attrs['dimensions']):
+            try:
+                if h5_dim is None:
+                    raise ValueError('No dimension scale attached')
+                this_dim = None
+                if dim_cache is not None:
+                    this_dim = dim_cache.get(h5_dim, name=label)
+                if this_dim is None:
+                    dim_dict = {'quantity': 'generic', 'units': 'generic', 'dimension_type': 'generic'}
+                    dim_dict.update(dim_attrs)
+                    this_dim = Dimension(np.array(h5_dim[()]), label,
+                                         dim_dict['quantity'], dim_dict['units'],
+                                         dim_dict['dimension_type'])
+                    if call:
+                        call.add(bytes_read=h5_dim.nbytes)
+                    if dim_cache is not None:
+                        dim_cache.put(h5_dim, this_dim)
+                        this_dim = _copy_dimension(this_dim)
+                if slices is not None:
+                    this_dim = _copy_dimension(this_dim,
+                                               values=this_dim.values[slices[dim]])
+                dataset.set_dimension(dim, this_dim)
+            except ValueError:
+                print('dimension {} not NSID type using generic'.format(dim))
+
+        for key, group_attrs in nsid_attrs['groups'].items():
             if key[0] != '_':
-                setattr(dataset, key, nest_dict(dset.parent[key].attrs))
+                setattr(dataset, key, nest_dict(group_attrs))
+
+    if call:
+        num_scales = sum([h5_dim is not None
+                          for h5_dim, _, _ in nsid_attrs['dimensions']])
+        call.add(objects_visited=1 + num_scales + len(nsid_attrs['groups']))
 
     dataset.h5_dataset = dset
     dataset.h5_filename = dset.file.filename
@@ -161,6 +1133,167 @@ def find_dataset(h5_group, dset_name):
     return datasets
 
 
+MAIN_ATTRS = ('quantity', 'units', 'main_data_name', 'pyNSID_version',
+              'data_type', 'modality', 'source')
+"""Attributes that every NSID main dataset must have"""
+
+DIMENSION_ATTRS = ('dimension_type', 'name', 'quantity', 'units')
+"""Attributes that every dimension scale of a NSID main dataset must have"""
+
+
+class MainValidationReport(object):
+    """
+    Outcome of validating a HDF5 dataset against the NSID main dataset
+    criteria. Evaluates to True only if the dataset is a main dataset
+    """
+
+    def __init__(self, name, is_main=True, failed_check=None, message='',
+                 dimension=None):
+        """
+        Parameters
+        ----------
+        name : str
+            Name of the object that was validated
+        is_main : bool, optional. Default = True
+            Whether or not the object is a NSID main dataset
+        failed_check : str, optional. Default = None
+            Name of the first check that failed. One of 'type',
+            'attributes', 'attribute_type', 'dimensions', 'dimension_type',
+            'dimension_shape', 'dimension_attributes'
+        message : str, optional. Default = ''
+            Human readable explanation of the failure
+        dimension : int, optional. Default = None
+            Index of the dimension that failed validation, if applicable
+        """
+        self.name = name
+        self.is_main = is_main
+        self.failed_check = failed_check
+        self.message = message
+        self.dimension = dimension
+
+    def __bool__(self):
+        return self.is_main
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        if self.is_main:
+            return '{} is a NSID main dataset'.format(self.name)
+        return '{} is not a NSID main dataset. {}'.format(self.name,
+                                                          self.message)
+
+    def to_dict(self):
+        """
+        Returns
+        -------
+        dict
+            Contents of this report
+        """
+        return {'name': self.name, 'is_main': self.is_main,
+                'failed_check': self.failed_check, 'message': self.message,
+                'dimension': self.dimension}
+
+
+def _as_str(value):
+    """
+    Decodes byte strings read from HDF5 attributes. Returns None if the value
+    is not a string
+    """
+    if isinstance(value, (bytes, np.bytes_)):
+        return value.decode('utf-8')
+    if isinstance(value, (str, unicode)):
+        return value
+    return None
+
+
+def validate_main(h5_main):
+    """
+    Validates the provided object against the NSID main dataset criteria.
+    Validation stops at the first failed check. Only attributes and object
+    headers are read. The values of the dimension scales are never read.
+
+    Parameters
+    ----------
+    h5_main : h5py.Dataset
+        Dataset of interest
+
+    Returns
+    -------
+    MainValidationReport
+        Evaluates to True only if ``h5_main`` is a NSID main dataset
+    """
+    if not isinstance(h5_main, h5py.Dataset):
+        return MainValidationReport(str(h5_main), is_main=False,
+                                    failed_check='type',
+                                    message='Not a HDF5 Dataset object')
+    name = h5_main.name
+
+    # Cheapest possible rejection of dimension scales and other ancillary
+    # datasets before fetching the names of all attributes in a single call
+    if 'main_data_name' not in h5_main.attrs:
+        return MainValidationReport(name, is_main=False,
+                                    failed_check='attributes',
+                                    message='Missing mandatory attributes: '
+                                            "['main_data_name']")
+    attr_names = set(h5_main.attrs)
+    missing = [att for att in MAIN_ATTRS if att not in attr_names]
+    if len(missing) > 0:
+        return MainValidationReport(name, is_main=False,
+                                    failed_check='attributes',
+                                    message='Missing mandatory attributes: '
+                                            '{}'.format(missing))
+    for attr_name in MAIN_ATTRS:
+        val = h5_main.attrs[attr_name]
+        if _as_str(val) is None:
+            return MainValidationReport(name, is_main=False,
+                                        failed_check='attribute_type',
+                                        message='Attribute {} found to be {}.'
+                                                ' Expected a string'
+                                                ''.format(attr_name, val))
+
+    main_shape = h5_main.shape
+    for ind, dimension in enumerate(h5_main.dims):
+        # Only count the attached scales. Do not read their values
+        num_scales = len(dimension)
+        if num_scales < 1:
+            return MainValidationReport(name, is_main=False,
+                                        failed_check='dimensions',
+                                        message='No dimension scale attached '
+                                                'to dimension {}'.format(ind),
+                                        dimension=ind)
+        h5_dim_dset = dimension[num_scales - 1]
+        if not isinstance(h5_dim_dset, h5py.Dataset):
+            return MainValidationReport(name, is_main=False,
+                                        failed_check='dimension_type',
+                                        message='Dimension scale {} is not a '
+                                                'dataset'.format(ind),
+                                        dimension=ind)
+        # dimensional scale has to be 1D and of the same length as the
+        # shape of the dataset
+        if len(h5_dim_dset.shape) != 1 or \
+                h5_dim_dset.shape[0] != main_shape[ind]:
+            return MainValidationReport(name, is_main=False,
+                                        failed_check='dimension_shape',
+                                        message='Dimension scale {} has shape'
+                                                ' {}. Expected ({},)'
+                                                ''.format(ind,
+                                                          h5_dim_dset.shape,
+                                                          main_shape[ind]),
+                                        dimension=ind)
+        dim_attr_names = set(h5_dim_dset.attrs)
+        missing = [att for att in DIMENSION_ATTRS
+                   if att not in dim_attr_names]
+        if len(missing) > 0:
+            return MainValidationReport(name, is_main=False,
+                                        failed_check='dimension_attributes',
+                                        message='Dimension scale {} is missing'
+                                                ' attributes: {}'
+                                                ''.format(ind, missing),
+                                        dimension=ind)
+
+    return MainValidationReport(name)
+
+
 def check_if_main(h5_main, verbose=False):
     """
     Checks the input dataset to see if it has all the necessary
@@ -182,87 +1315,40 @@ def check_if_main(h5_main, verbose=False):
         Whether or not to print statements
     Returns
     -------
-    success : Boolean
-        True if all tests pass
-    """
-    if not isinstance(h5_main, h5py.Dataset):
-        if verbose:
-            print('{} is not an HDF5 Dataset object.'.format(h5_main))
-        return False
-
-    number_of_dims = 0
-    for dim in h5_main.dims:
-        if np.array(dim.values()).size > 0:
-            number_of_dims += 1
-
-    if len(h5_main.shape) != number_of_dims:
-        if verbose:
-            print('Main data does not have full set of dimension scales. '
-                  'Provided object has shape: {} but only {} dimensional '
-                  'scales'.format(h5_main.shape, len(h5_main.dims)))
-        return False
+    success : MainValidationReport
+        Evaluates to True if all tests pass. See :func:`validate_main`
 
-    # h5_name = h5_main.name.split('/')[-1]
-    h5_group = h5_main.parent
-
-    # success = True
-
-    # Check for Datasets
-
-    attrs_names = ['dimension_type', 'name', 'quantity', 'units']
-
-    # Check for all required attributes in dataset
-    main_attrs_names = ['quantity', 'units', 'main_data_name', 'pyNSID_version', 'data_type', 'modality', 'source']
-    main_attr_success = np.all([att in h5_main.attrs for att in main_attrs_names])
+    Notes
+    -----
+    This function used to return a bool. The report is not equal to True
+    or False, so test its truthiness, e.g. ``if check_if_main(h5_dset):``
+    or ``bool(check_if_main(h5_dset))``, rather than comparing it with
+    ``==`` or ``is``
+    """
+    with record_call('check_if_main', h5_main) as call:
+        with call.phase('validation'):
+            report = validate_main(h5_main)
+        if call:
+            call.add(objects_visited=_count_validated_objects(h5_main, report))
     if verbose:
-        print('All Attributes in dataset: ', main_attr_success)
-    if not main_attr_success:
-        if verbose:
-            print('{} does not have the mandatory attributes'.format(h5_main.name))
-        return False
+        print(report)
+    return report
 
-    for attr_name in main_attrs_names:
-        val = get_attr(h5_main, attr_name)
-        if not isinstance(val, (str, unicode)):
-            if verbose:
-                print('Attribute {} of {} found to be {}. Expected a string'.format(attr_name, h5_main.name, val))
-            return False
-
-    length_success = []
-    dset_success = []
-    attr_success = []
-    # Check for Validity of Dimensional Scales
-    for i, dimension in enumerate(h5_main.dims):
-        # check for all required attributes
-        h5_dim_dset = h5_group[dimension.label]
-
-        attr_success.append(np.all([att in h5_dim_dset.attrs for att in attrs_names]))
-        dset_success.append(np.all([attr_success, isinstance(h5_dim_dset, h5py.Dataset)]))
-        # dimensional scale has to be 1D
-        if len(h5_dim_dset.shape) == 1:
-            # and of the same length as the shape of the dataset
-            length_success.append(h5_main.shape[i] == h5_dim_dset.shape[0])
-        else:
-            length_success.append(False)
-    # We have the list now and can get error messages according to which dataset is bad or not.
-    if np.all([np.all(attr_success), np.all(length_success), np.all(dset_success)]):
-        if verbose:
-            print('Dimensions: All Attributes: ', np.all(attr_success))
-            print('Dimensions: All Correct Length: ', np.all(length_success))
-            print('Dimensions: All h5 Datasets: ', np.all(dset_success))
-    else:
-        if False in length_success:
-            print('length of dimension scale {} is wrong'.format(length_success.index(False)))
-        if False in attr_success:
-            print('attributes in dimension scale {} are wrong'.format(attr_success.index(False)))
-        if False in dset_success:
-            print('dimension scale {} is not a dataset'.format(dset_success.index(False)))
-        return False
 
-    return main_attr_success
+def _count_validated_objects(h5_main, report):
+    """
+    Returns the number of HDF5 objects opened by :func:`validate_main`
+    """
+    if report.failed_check == 'type':
+        return 0
+    if report:
+        return 1 + len(h5_main.shape)
+    if report.dimension is not None:
+        return 2 + report.dimension
+    return 1
 
 
-def link_as_main(h5_main, dim_dict):
+def link_as_main(h5_main, dim_dict, update_index=True):
     """
     Attaches datasets as h5 Dimensional Scales to  `h5_main`
 
@@ -271,6 +1357,9 @@ def link_as_main(h5_main, dim_dict):
     h5_main : h5py.Dataset
         N-dimensional Dataset which will have the references added as h5 Dimensional Scales
     dim_dict: dictionary with dimensional order as key and items are datasets to be used as h5 Dimensional Scales
+    update_index : bool, optional. Default = True
+        Whether or not to add `h5_main` to the index of main datasets in the
+        file, if the file has an index. See :func:`get_all_main`
 
     Returns
     -------
@@ -320,10 +1409,22 @@ def link_as_main(h5_main, dim_dict):
         this_dim_dset.make_scale(this_dim_dset.attrs['name'])
         h5_main.dims[int(i)].label = this_dim_dset.attrs['name']
         h5_main.dims[int(i)].attach_scale(this_dim_dset)
-        
+
+    if update_index:
+        _add_if_main(h5_main)
     return h5_main
 
 
+def _add_if_main(h5_dset):
+    """
+    Adds the dataset to the index of main datasets in the file if the file
+    has an index and the dataset is a main dataset
+    """
+    h5_index = _get_main_index(h5_dset)
+    if h5_index is not None and check_if_main(h5_dset):
+        _append_to_main_index(h5_index, [h5_dset])
+
+
 def validate_h5_dimension(h5_dim, dim_length):
     """
     Validates a dimension already present in an HDF5 file.
@@ -462,6 +1563,26 @@ def validate_main_and_dims(main_shape, dim_dict, h5_parent_group):
     return all(dimensions_correct)
 
 
+def get_mpi_comm(h5_object):
+    """
+    Returns the MPI communicator with which the file containing the HDF5
+    object was opened
+
+    Parameters
+    ----------
+    h5_object : h5py.Dataset, h5py.Group or h5py.File
+        Object within the HDF5 file
+
+    Returns
+    -------
+    mpi4py.MPI.Comm or None
+        Communicator if the file was opened with the "mpio" driver, else None
+    """
+    if h5_object.file.driver != 'mpio':
+        return None
+    return h5_object.file.id.get_access_plist().get_fapl_mpio()[0]
+
+
 def write_pynsid_book_keeping_attrs(h5_object):
     """
     Writes book-keeping information to the HDF5 object
@@ -473,6 +1594,24 @@ def write_pynsid_book_keeping_attrs(h5_object):
     Returns
     -------
 
+    Notes
+    -----
+    In files opened with the "mpio" driver, this must be called by all
+    ranks. The attributes of rank 0 are written since attributes must be
+    identical on all ranks
     """
-    write_book_keeping_attrs(h5_object)
+    comm = get_mpi_comm(h5_object)
+    if comm is None:
+        write_book_keeping_attrs(h5_object)
+    else:
+        attrs = None
+        if comm.rank == 0:
+            attrs = {'machine_id': socket.getfqdn(),
+                     'timestamp': get_time_stamp(),
+                     'platform': platform(),
+                     'sidpy_version': sidpy_version}
+        write_simple_attrs(h5_object, comm.bcast(attrs, root=0))
     write_simple_attrs(h5_object, {'pyNSID_version': pynsid_version})
+    # pyNSID_version is one of the attributes of main datasets
+    if isinstance(h5_object, h5py.Dataset):
+        _add_if_main(h5_object)
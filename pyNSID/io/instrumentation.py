@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in measurements of the time, data volume and number of HDF5 objects
+involved in the I/O functions of pyNSID
+
+Created on Sat Oct 17 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import json
+import threading
+import time
+
+import numpy as np
+
+__all__ = ['IOStats', 'register_io_callback', 'unregister_io_callback']
+
+_LOCK = threading.Lock()
+_RECORDERS = []
+_CALLBACKS = []
+_LOCAL = threading.local()
+
+
+class _NullCall(object):
+    """
+    Stand-in for :class:`IOCall` when instrumentation is disabled so that
+    instrumented functions pay almost nothing for it
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def __bool__(self):
+        return False
+
+    __nonzero__ = __bool__
+
+    def phase(self, name):
+        return self
+
+    def add(self, **kwargs):
+        pass
+
+
+_NULL_CALL = _NullCall()
+
+
+class _Phase(object):
+    """
+    Adds the time spent within the context to a phase of an IOCall
+    """
+
+    def __init__(self, phases, name):
+        self._phases = phases
+        self._name = name
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._phases[self._name] = self._phases.get(self._name, 0) + \
+            time.perf_counter() - self._start
+        return False
+
+
+class IOCall(object):
+
+    COUNTERS = ('bytes_read', 'bytes_written', 'objects_visited',
+                'chunks_touched')
+
+    def __init__(self, function, h5_object=None):
+        """
+        Measurements of a single call to an instrumented function
+
+        Parameters
+        ----------
+        function : str
+            Name of the instrumented function
+        h5_object : h5py.Dataset or h5py.Group, optional. Default = None
+            HDF5 object the function was called on
+        """
+        self.function = function
+        self.target = None
+        self.depth = 0
+        self.start = None
+        self.duration_s = 0
+        self.phases = {}
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.error = None
+        self._h5_object = h5_object
+        self._start = None
+
+    def __bool__(self):
+        return True
+
+    __nonzero__ = __bool__
+
+    def __enter__(self):
+        if self._h5_object is not None:
+            try:
+                self.target = self._h5_object.name
+            except (AttributeError, ValueError):
+                self.target = None
+            self._h5_object = None
+        self.depth = getattr(_LOCAL, 'depth', 0)
+        _LOCAL.depth = self.depth + 1
+        self.start = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.duration_s = time.perf_counter() - self._start
+        _LOCAL.depth = self.depth
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        _dispatch(self.to_dict())
+        return False
+
+    def phase(self, name):
+        """
+        Returns a context manager that adds the time spent within it to the
+        named phase of this call, e.g. 'metadata' or 'data'
+
+        Parameters
+        ----------
+        name : str
+            Name of the phase
+
+        Returns
+        -------
+        context manager
+        """
+        return _Phase(self.phases, name)
+
+    def add(self, **kwargs):
+        """
+        Increments the counters of this call
+
+        Parameters
+        ----------
+        kwargs : dict
+            Increments for any of ``bytes_read``, ``bytes_written``,
+            ``objects_visited`` and ``chunks_touched``
+        """
+        for key, value in kwargs.items():
+            if key not in self.counters:
+                raise KeyError('Unknown counter: {}. Available counters: {}'
+                               ''.format(key, self.COUNTERS))
+            self.counters[key] += int(value)
+
+    def to_dict(self):
+        """
+        Returns the measurements as a dictionary of JSON serializable values
+
+        Returns
+        -------
+        dict
+        """
+        record = {'function': self.function, 'target': self.target,
+                  'depth': self.depth, 'start': self.start,
+                  'duration_s': self.duration_s, 'error': self.error,
+                  'phases': dict(self.phases)}
+        record.update(self.counters)
+        return record
+
+
+def record_call(function, h5_object=None):
+    """
+    Returns the object that records a call to an instrumented function.
+    Use as a context manager around the body of the function
+
+    Parameters
+    ----------
+    function : str
+        Name of the instrumented function
+    h5_object : h5py.Dataset or h5py.Group, optional. Default = None
+        HDF5 object the function was called on
+
+    Returns
+    -------
+    IOCall
+        Evaluates to False if no :class:`IOStats` is active and no callback
+        is registered. Only compute measurements when it evaluates to True
+    """
+    if not _RECORDERS and not _CALLBACKS:
+        return _NULL_CALL
+    return IOCall(function, h5_object=h5_object)
+
+
+def _dispatch(record):
+    """
+    Hands the record of a finished call to all active IOStats objects and
+    registered callbacks
+    """
+    with _LOCK:
+        recorders = list(_RECORDERS)
+        callbacks = list(_CALLBACKS)
+    for recorder in recorders:
+        recorder._append(record)
+    for callback in callbacks:
+        callback(record)
+
+
+def count_chunks(h5_dset, slices=None):
+    """
+    Returns the number of HDF5 chunks of a dataset that intersect with a
+    selection
+
+    Parameters
+    ----------
+    h5_dset : h5py.Dataset
+        Dataset
+    slices : tuple of slice, optional. Default = None
+        Selection with one slice per dimension. The entire dataset by
+        default
+
+    Returns
+    -------
+    int
+        Number of chunks. 0 for datasets that are not chunked
+    """
+    if h5_dset.chunks is None:
+        return 0
+    if slices is None:
+        slices = [slice(0, length) for length in h5_dset.shape]
+    num_chunks = 1
+    for item, length, chunk in zip(slices, h5_dset.shape, h5_dset.chunks):
+        start, stop, _ = item.indices(length)
+        if stop <= start:
+            return 0
+        num_chunks *= (stop - 1) // chunk - start // chunk + 1
+    return num_chunks
+
+
+def register_io_callback(callback):
+    """
+    Registers a function that is called with the measurements of every call
+    to an instrumented function, e.g. to forward them to a monitoring system
+
+    Parameters
+    ----------
+    callback : callable
+        Called with a dictionary as described in :class:`IOStats`
+
+    Notes
+    -----
+    Callbacks are called in the thread that made the call. Exceptions raised
+    by callbacks are not caught
+    """
+    if not callable(callback):
+        raise TypeError('callback should be callable')
+    with _LOCK:
+        if callback not in _CALLBACKS:
+            _CALLBACKS.append(callback)
+
+
+def unregister_io_callback(callback):
+    """
+    Removes a function registered via :func:`register_io_callback`
+
+    Parameters
+    ----------
+    callback : callable
+        Registered function
+    """
+    with _LOCK:
+        if callback not in _CALLBACKS:
+            raise ValueError('callback was not registered')
+        _CALLBACKS.remove(callback)
+
+
+class IOStats(object):
+
+    def __init__(self):
+        """
+        Records measurements of the I/O functions of pyNSID called within
+        its context:
+
+        * :func:`pyNSID.io.hdf_io.write_nsid_dataset`
+        * :func:`pyNSID.io.hdf_utils.read_h5py_dataset`
+        * :func:`pyNSID.io.hdf_utils.get_all_main`
+        * :func:`pyNSID.io.hdf_utils.check_if_main`
+
+        Each call is recorded as a dictionary with the following keys:
+
+        * function - name of the function
+        * target - path of the HDF5 object the function was called on
+        * depth - number of instrumented calls this call was nested in,
+          e.g. 1 for ``check_if_main`` called by ``get_all_main``
+        * start - time at which the call started, in seconds since epoch
+        * duration_s - duration of the call in seconds
+        * error - name of the exception raised by the call, if any
+        * phases - seconds spent in each phase of the call such as
+          'validation', 'metadata', 'data' or 'index'. 'data' includes
+          computing the dask graph of datasets being written
+        * bytes_read, bytes_written - data read or written, excluding
+          HDF5 metadata
+        * objects_visited - HDF5 objects opened or created
+        * chunks_touched - HDF5 chunks of the main dataset read or written
+
+        Examples
+        --------
+        >>> with IOStats() as stats:
+        ...     dataset = read_h5py_dataset(h5_main)
+        >>> print(stats.to_json(indent=2))
+
+        Notes
+        -----
+        Measurements are only taken while at least one IOStats is active or
+        a callback is registered via :func:`register_io_callback`.
+        Calls made by any thread are recorded. Data of lazily read datasets
+        are read when computed and are therefore not counted
+        """
+        self.calls = []
+
+    def __enter__(self):
+        with _LOCK:
+            _RECORDERS.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        with _LOCK:
+            _RECORDERS.remove(self)
+        return False
+
+    def __len__(self):
+        return len(self.calls)
+
+    def _append(self, record):
+        self.calls.append(record)
+
+    def clear(self):
+        """
+        Discards all recorded calls
+        """
+        self.calls = []
+
+    def summary(self):
+        """
+        Totals of the recorded measurements per function
+
+        Returns
+        -------
+        dict
+            Number of calls, total duration, total time per phase and
+            totals of the counters keyed by the name of the function
+        """
+        summary = {}
+        for record in self.calls:
+            totals = summary.setdefault(record['function'],
+                                        {'num_calls': 0, 'duration_s': 0,
+                                         'phases': {}})
+            totals['num_calls'] += 1
+            totals['duration_s'] += record['duration_s']
+            for name, duration in record['phases'].items():
+                totals['phases'][name] = totals['phases'].get(name, 0) + \
+                    duration
+            for key in IOCall.COUNTERS:
+                totals[key] = totals.get(key, 0) + record[key]
+        return summary
+
+    def to_dict(self):
+        """
+        Returns the recorded calls and their summary
+
+        Returns
+        -------
+        dict
+            'calls' - list of the recorded calls and 'summary' - see
+            :meth:`summary`
+        """
+        return {'calls': [dict(record) for record in self.calls],
+                'summary': self.summary()}
+
+    def to_json(self, **kwargs):
+        """
+        Returns the recorded calls and their summary as a JSON string
+
+        Parameters
+        ----------
+        kwargs : dict
+            Keyword arguments passed on to :func:`json.dumps`
+
+        Returns
+        -------
+        str
+        """
+        return json.dumps(self.to_dict(), default=_to_builtin, **kwargs)
+
+
+def _to_builtin(value):
+    """
+    Converts numpy scalars that json cannot serialize
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError('Object of type {} is not JSON serializable'
+                    ''.format(type(value).__name__))
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Reading NSID datasets from many HDF5 files in parallel
+
+Created on Sat Oct 17 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import glob
+import sys
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import h5py
+import numpy as np
+from sidpy import Dataset, Dimension
+
+from .hdf_utils import get_all_main, read_h5py_dataset, DimensionCache
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['read_nsid_files']
+
+
+def _get_file_paths(file_paths):
+    """
+    Expands the provided path, glob pattern or list of paths / patterns into
+    a list of paths while preserving the order of the inputs
+
+    Parameters
+    ----------
+    file_paths : str or list of str
+        Path(s) or glob pattern(s)
+
+    Returns
+    -------
+    list of str
+        Paths to files
+    """
+    if isinstance(file_paths, (str, unicode)):
+        file_paths = [file_paths]
+    if not isinstance(file_paths, (list, tuple)):
+        raise TypeError('file_paths should be a str or a list of str')
+    expanded = []
+    for item in file_paths:
+        if not isinstance(item, (str, unicode)):
+            raise TypeError('file_paths should be a str or a list of str. '
+                            'Found object of type: {}'.format(type(item)))
+        if glob.has_magic(item):
+            expanded += sorted(glob.glob(item))
+        else:
+            expanded.append(item)
+    return expanded
+
+
+def _dataset_to_dict(dataset, group_names):
+    """
+    Packs the values and attributes of a sidpy.Dataset into a dictionary of
+    picklable objects so that it can be sent across processes
+
+    Parameters
+    ----------
+    dataset : sidpy.Dataset
+        Dataset read from a file
+    group_names : list of str
+        Names of the metadata groups that were set as attributes of
+        ``dataset`` by :func:`read_h5py_dataset`
+
+    Returns
+    -------
+    dict
+        Picklable contents of ``dataset``
+    """
+    axes = []
+    for ind in range(dataset.ndim):
+        dim = dataset._axes[ind]
+        axes.append({'values': dim.values, 'name': dim.name,
+                     'quantity': dim.quantity, 'units': dim.units,
+                     'dimension_type': dim.dimension_type.name})
+    return {'values': np.array(dataset),
+            'title': dataset.title, 'units': dataset.units,
+            'quantity': dataset.quantity,
+            'data_type': dataset.data_type.name,
+            'modality': dataset.modality, 'source': dataset.source,
+            'axes': axes,
+            'groups': dict([(name, getattr(dataset, name))
+                            for name in group_names]),
+            'h5_filename': dataset.h5_filename,
+            'h5_dataset_name': dataset.h5_dataset_name}
+
+
+def _dataset_from_dict(payload):
+    """
+    Rebuilds a sidpy.Dataset from the output of :func:`_dataset_to_dict`
+
+    Parameters
+    ----------
+    payload : dict
+        Picklable contents of a sidpy.Dataset
+
+    Returns
+    -------
+    sidpy.Dataset
+        Dataset. Note that it is not linked to the HDF5 dataset
+    """
+    dataset = Dataset.from_array(payload['values'])
+    for key in ['title', 'units', 'quantity', 'data_type', 'modality',
+                'source']:
+        setattr(dataset, key, payload[key])
+    for ind, axis in enumerate(payload['axes']):
+        dataset.set_dimension(ind, Dimension(axis['values'], axis['name'],
+                                             axis['quantity'], axis['units'],
+                                             axis['dimension_type']))
+    for name, value in payload['groups'].items():
+        setattr(dataset, name, value)
+    dataset.h5_filename = payload['h5_filename']
+    dataset.h5_dataset_name = payload['h5_dataset_name']
+    return dataset
+
+
+def _read_file(file_path, lazy=False):
+    """
+    Reads all NSID main datasets in a file. Unless ``lazy``, the values are
+    read into memory and the file is closed. Otherwise, the file is left
+    open for the lazily loaded datasets.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the HDF5 file
+    lazy : bool, optional. Default = False
+        See :func:`pyNSID.io.hdf_utils.read_h5py_dataset`
+
+    Returns
+    -------
+    list of sidpy.Dataset
+        Datasets in the file
+    """
+    h5_file = h5py.File(file_path, mode='r')
+    dim_cache = DimensionCache()
+    try:
+        datasets = [read_h5py_dataset(h5_dset, lazy=lazy, dim_cache=dim_cache)
+                    for h5_dset in get_all_main(h5_file)]
+    except Exception:
+        h5_file.close()
+        raise
+    if not lazy:
+        h5_file.close()
+    return datasets
+
+
+def _read_file_to_dicts(file_path):
+    """
+    Reads all NSID main datasets in a file into picklable dictionaries.
+    Meant to be run in a separate process. The file is closed after reading.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the HDF5 file
+
+    Returns
+    -------
+    list of dict
+        Contents of the datasets. See :func:`_dataset_to_dict`
+    """
+    with h5py.File(file_path, mode='r') as h5_file:
+        payloads = []
+        dim_cache = DimensionCache()
+        for h5_dset in get_all_main(h5_file):
+            dataset = read_h5py_dataset(h5_dset, dim_cache=dim_cache)
+            group_names = [key for key in h5_dset.parent
+                           if isinstance(h5_dset.parent[key], h5py.Group)
+                           and key[0] != '_']
+            payloads.append(_dataset_to_dict(dataset, group_names))
+    return payloads
+
+
+def read_nsid_files(file_paths, lazy=False, executor='thread',
+                    max_workers=None, verbose=False):
+    """
+    Reads all NSID main datasets from many HDF5 files using a pool of threads
+    or processes
+
+    Parameters
+    ----------
+    file_paths : str or list of str
+        Path(s) to HDF5 files. Glob patterns such as ``'data/*.h5'`` are
+        expanded and sorted
+    lazy : bool, optional. Default = False
+        If True, data are not read from the files until computed.
+        Only supported with ``executor='thread'``.
+        See :func:`pyNSID.io.hdf_utils.read_h5py_dataset`.
+        Files are closed after reading unless ``lazy`` is True. The caller
+        is then responsible for closing each file once its datasets are no
+        longer needed, e.g. via ``dataset.h5_dataset.file.close()``
+    executor : str, optional. Default = 'thread'
+        'thread' to read files using a pool of threads or 'process' to read
+        files in separate processes. Processes are not limited by the
+        global interpreter lock. However, datasets read in other processes
+        are not linked to their HDF5 datasets (``h5_dataset`` is not set).
+        Unless ``lazy``, the ``h5_dataset`` of datasets read by threads
+        refers to a closed file. Use ``h5_filename`` and
+        ``h5_dataset_name`` to locate the data instead
+    max_workers : int, optional. Default = None
+        Number of threads or processes. By default, this is chosen by
+        :mod:`concurrent.futures`
+    verbose : bool, optional. Default = False
+        Whether or not to print the files that could not be read
+
+    Returns
+    -------
+    datasets : list
+        One entry per file in the same order as ``file_paths``. Each entry
+        is a list of sidpy.Dataset objects or None if the file could not be
+        read
+    errors : dict
+        Exception raised for each file that could not be read, keyed by the
+        path to the file
+    """
+    file_paths = _get_file_paths(file_paths)
+    if executor not in ['thread', 'process']:
+        raise ValueError('executor should be "thread" or "process". '
+                         'Provided: {}'.format(executor))
+    if lazy and executor == 'process':
+        raise ValueError('lazy loading is only supported with '
+                         'executor="thread"')
+
+    if executor == 'thread':
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+    else:
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+
+    with pool:
+        if executor == 'thread':
+            futures = [pool.submit(_read_file, path, lazy=lazy)
+                       for path in file_paths]
+        else:
+            futures = [pool.submit(_read_file_to_dicts, path)
+                       for path in file_paths]
+
+        datasets = []
+        errors = {}
+        for path, future in zip(file_paths, futures):
+            try:
+                result = future.result()
+            except Exception as excp:
+                if verbose:
+                    print('Could not read {}: {}'.format(path, excp))
+                errors[path] = excp
+                datasets.append(None)
+                continue
+            if executor == 'process':
+                result = [_dataset_from_dict(payload) for payload in result]
+            datasets.append(result)
+
+    return datasets, errors
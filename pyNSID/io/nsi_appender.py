@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Writer that grows a NSID dataset along its first dimension as data arrive
+
+Created on Sat Oct 17 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import sys
+
+import h5py
+import numpy as np
+from dask import array as da
+from sidpy import Dimension
+
+from .hdf_io import write_nsid_dataset
+from .hdf_utils import _dataset_from_dask, DEFAULT_CHUNK_BYTES
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['NSIDAppender']
+
+
+class NSIDAppender(object):
+
+    def __init__(self, h5_group, frame_shape, main_data_name='nDIM_Data',
+                 dtype=np.float64, leading_dimension=None, dimensions=None,
+                 frames_per_chunk=None, growth_factor=2., verbose=False,
+                 **kwargs):
+        """
+        Writes frames, e.g. from a detector, one or a few at a time into a
+        NSID main dataset whose first dimension grows as frames are appended
+
+        Parameters
+        ----------
+        h5_group : h5py.Group
+            Parent group under which the datasets will be created
+        frame_shape : list or tuple of int
+            Shape of a single frame
+        main_data_name : str, optional. Default = 'nDIM_Data'
+            Name of the main dataset
+        dtype : numpy.dtype, optional. Default = numpy.float64
+            Data type of the main dataset
+        leading_dimension : sidpy.Dimension, optional. Default = None
+            Dimension along which frames are appended. Only its name, units,
+            quantity and dimension type are used. The values are set via
+            :meth:`append`. By default, a generic dimension named 'frame'
+        dimensions : list of sidpy.Dimension, optional. Default = None
+            Dimensions of a single frame. Generic dimensions are used if not
+            provided
+        frames_per_chunk : int, optional. Default = None
+            Number of frames in each HDF5 chunk. By default, as many frames
+            as fit into 1 MB
+        growth_factor : float, optional. Default = 2
+            Factor by which the space reserved in the file grows when it is
+            filled up. Larger values require fewer resizes
+        verbose : bool, optional. Default = False
+            Whether or not to write logs to standard out
+        kwargs : dict
+            Additional keyword arguments passed on to
+            :func:`pyNSID.io.hdf_io.write_nsid_dataset` such as
+            ``compression_profile``
+
+        Notes
+        -----
+        The datasets are only created in the file when the first frames are
+        appended. Call :meth:`flush` to trim the space reserved for frames
+        that have not yet arrived and to write the data to disk. The main
+        dataset is a valid NSID main dataset after every flush.
+        Use as a context manager to flush upon exiting.
+        The HDF5 file is not closed by this object.
+        """
+        if not isinstance(h5_group, h5py.Group):
+            raise TypeError('h5_group should be a h5py.Group object')
+        if not isinstance(frame_shape, (list, tuple)) or \
+                not all([isinstance(item, (int, np.integer)) and item > 0
+                         for item in frame_shape]):
+            raise ValueError('frame_shape should be a list of positive '
+                             'integers')
+        if not isinstance(main_data_name, (str, unicode)):
+            raise TypeError('main_data_name should be a string')
+        if leading_dimension is None:
+            leading_dimension = Dimension(np.arange(1), 'frame')
+        if not isinstance(leading_dimension, Dimension):
+            raise TypeError('leading_dimension should be a sidpy.Dimension')
+        if dimensions is not None:
+            if not isinstance(dimensions, (list, tuple)) or \
+                    len(dimensions) != len(frame_shape):
+                raise ValueError('dimensions should be a list of {} '
+                                 'sidpy.Dimension objects'
+                                 ''.format(len(frame_shape)))
+            for dim, length in zip(dimensions, frame_shape):
+                if not isinstance(dim, Dimension):
+                    raise TypeError('dimensions should be sidpy.Dimension '
+                                    'objects')
+                if len(dim) != length:
+                    raise ValueError('Dimension: {} has length: {} but the '
+                                     'frames have length: {}'
+                                     ''.format(dim.name, len(dim), length))
+        if growth_factor <= 1:
+            raise ValueError('growth_factor should be larger than 1')
+
+        self.frame_shape = tuple(frame_shape)
+        self.dtype = np.dtype(dtype)
+        if frames_per_chunk is None:
+            frame_bytes = self.dtype.itemsize * int(np.prod(self.frame_shape))
+            frames_per_chunk = max(1, DEFAULT_CHUNK_BYTES // frame_bytes)
+        self.frames_per_chunk = int(frames_per_chunk)
+        self.growth_factor = growth_factor
+        self.verbose = verbose
+
+        self._h5_group = h5_group
+        self._main_data_name = main_data_name
+        self._leading_dimension = leading_dimension
+        self._dimensions = dimensions
+        self._kwargs = kwargs
+
+        self.h5_dataset = None
+        self._h5_axis = None
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+    def _create(self, capacity):
+        """
+        Creates the main dataset with room for ``capacity`` frames along with
+        its dimensions
+
+        Parameters
+        ----------
+        capacity : int
+            Initial length of the first dimension
+        """
+        shape = (capacity,) + self.frame_shape
+        # Placeholder that describes the dataset without allocating memory
+        dataset = _dataset_from_dask(da.empty(shape, dtype=self.dtype))
+        lead = self._leading_dimension
+        dataset.set_dimension(0, Dimension(np.arange(capacity), lead.name,
+                                           lead.quantity, lead.units,
+                                           lead.dimension_type))
+        if self._dimensions is not None:
+            for ind, dim in enumerate(self._dimensions):
+                dataset.set_dimension(ind + 1, dim)
+        self.h5_dataset = write_nsid_dataset(
+            dataset, self._h5_group, main_data_name=self._main_data_name,
+            verbose=self.verbose, write_data=False,
+            chunks=(self.frames_per_chunk,) + self.frame_shape,
+            maxshape=(None,) + self.frame_shape, **self._kwargs)
+        self._h5_axis = self.h5_dataset.parent[lead.name]
+
+    def _resize(self, length):
+        """
+        Resizes the main dataset and the leading dimension in step
+
+        Parameters
+        ----------
+        length : int
+            New length of the first dimension
+        """
+        if self.verbose:
+            print('Resizing {} from {} to {} frames'
+                  ''.format(self.h5_dataset.name, self.h5_dataset.shape[0],
+                            length))
+        self.h5_dataset.resize(length, axis=0)
+        self._h5_axis.resize((length,))
+
+    def append(self, frames, axis_values=None):
+        """
+        Appends one or more frames to the end of the main dataset
+
+        Parameters
+        ----------
+        frames : array-like
+            A single frame of shape ``frame_shape`` or a batch of frames of
+            shape ``(num_frames,) + frame_shape``
+        axis_values : array-like, optional. Default = None
+            Values of the leading dimension for these frames. By default,
+            the index of each frame
+
+        Returns
+        -------
+        int
+            Number of frames written so far
+        """
+        frames = np.asarray(frames, dtype=self.dtype)
+        if frames.shape == self.frame_shape:
+            frames = frames[np.newaxis]
+        if frames.shape[1:] != self.frame_shape:
+            raise ValueError('frames should be of shape: {} or (N, {}). '
+                             'Provided shape: {}'
+                             ''.format(self.frame_shape, self.frame_shape,
+                                       frames.shape))
+        num_frames = frames.shape[0]
+        if axis_values is None:
+            axis_values = np.arange(self._length, self._length + num_frames)
+        axis_values = np.atleast_1d(np.asarray(axis_values))
+        if axis_values.shape != (num_frames,):
+            raise ValueError('axis_values should have one value per frame')
+        if num_frames == 0:
+            return self._length
+
+        stop = self._length + num_frames
+        if self.h5_dataset is None:
+            self._create(max(num_frames, self.frames_per_chunk))
+        elif stop > self.h5_dataset.shape[0]:
+            # Grow geometrically so that resizes are rare
+            self._resize(max(stop, int(np.ceil(self.h5_dataset.shape[0] *
+                                               self.growth_factor))))
+
+        self.h5_dataset[self._length: stop] = frames
+        self._h5_axis[self._length: stop] = axis_values
+        self._length = stop
+        return self._length
+
+    def flush(self):
+        """
+        Trims the main dataset and leading dimension to the frames written
+        so far and flushes the file to disk
+        """
+        if self.h5_dataset is None:
+            return
+        if self.h5_dataset.shape[0] != self._length:
+            self._resize(self._length)
+        self.h5_dataset.file.flush()
@@ -12,7 +12,8 @@ import sys
 import h5py
 import sidpy
 
-from pyNSID.io.hdf_utils import get_all_main, read_h5py_dataset, check_if_main
+from pyNSID.io.hdf_utils import get_all_main, read_h5py_dataset, check_if_main, \
+    DimensionCache
 
 if sys.version_info.major == 3:
     unicode = str
@@ -20,7 +21,7 @@ if sys.version_info.major == 3:
 
 class NSIDReader(sidpy.Reader):
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, mode='r'):
         """
         Creates an instance of NSIDReader which can read one or more HDF5
         datasets formatted according to NSID into sidpy.Dataset objects
@@ -30,12 +31,20 @@ class NSIDReader(sidpy.Reader):
         file_path : str, h5py.File, or h5py.Group
             Path to a HDF5 file or a handle to an open HDF5 file or group
             object
+        mode : str, optional. Default = 'r'
+            Mode in which the HDF5 file is opened. Use 'r+' to be able to
+            write into the file via ``self._h5_file``
 
         Notes
         -----
         Please consider using the ``self._h5_file`` object to get handles to
         specific datasets or sub-trees that need to be read instead of opening
         the file again outside the context of this Reader.
+
+        The file is only searched for NSID main datasets when they are first
+        needed, i.e. in ``can_read()`` or ``read_all()``. The datasets found
+        are remembered for the lifetime of this Reader. So are the
+        dimensions read from the file.
         """
 
         warn('This Reader will eventually be moved to the ScopeReaders package'
@@ -46,12 +55,28 @@ class NSIDReader(sidpy.Reader):
 
 
         # Let h5py raise an OS error if a non-HDF5 file was provided
-        self._h5_file = h5py.File(file_path, mode='r+')
+        self._h5_file = h5py.File(file_path, mode=mode)
 
-        self._main_dsets = get_all_main(self._h5_file, verbose=False)
+        self._main_dsets = None
+        # Dimensions shared by several datasets are only read once
+        self._dim_cache = DimensionCache()
 
         # DO NOT close HDF5 file. Dask array will fail if you do so.
 
+    def _get_main_dsets(self):
+        """
+        Returns the NSID main datasets in the file. The file is only searched
+        the first time this method is called.
+
+        Returns
+        -------
+        list of h5py.Dataset
+            NSID main datasets in the file
+        """
+        if self._main_dsets is None:
+            self._main_dsets = get_all_main(self._h5_file, verbose=False)
+        return self._main_dsets
+
     def can_read(self):
         """
         Checks whether or not this Reader can read the provided file
@@ -62,9 +87,9 @@ class NSIDReader(sidpy.Reader):
             True if this Reader can read the provided file and if this file
             contains at least one NSID-formatted main dataset. Else, False
         """
-        return len(self._main_dsets) > 0
+        return len(self._get_main_dsets()) > 0
 
-    def read(self, h5_object=None):
+    def read(self, h5_object=None, lazy=False, region=None):
         """
         Reads all available NSID main datasets or the specified h5_object
 
@@ -73,23 +98,34 @@ class NSIDReader(sidpy.Reader):
         h5_object : h5py.Dataset or h5py.Group
             HDF5 Dataset to read or the HDF5 group under which to read all
             datasets
+        lazy : bool, optional. Default = False
+            If True, data are not read from the file until computed.
+            See :func:`pyNSID.io.hdf_utils.read_h5py_dataset`
+        region : tuple, list or dict, optional. Default = None
+            Region of interest to read when ``h5_object`` is a h5py.Dataset.
+            Only this region is read from the file.
+            See :func:`pyNSID.io.hdf_utils.get_region_slices`
 
         Returns
         -------
         sidpy.Dataset or list of sidpy.Dataset objects
             Datasets present in the provided file
         """
+        if region is not None and not isinstance(h5_object, h5py.Dataset):
+            raise ValueError('region can only be specified when reading a '
+                             'single h5py.Dataset')
         if h5_object is None:
-            return self.read_all(recursive=True)
+            return self.read_all(recursive=True, lazy=lazy)
         if not isinstance(h5_object, (h5py.Group, h5py.Dataset)):
             raise TypeError('Provided h5_object was not a h5py.Dataset or '
                             'h5py.Group object but was of type: {}'
                             ''.format(type(h5_object)))
         self.__validate_obj_in_same_file(h5_object)
         if isinstance(h5_object, h5py.Dataset):
-            return read_h5py_dataset(h5_object)
+            return read_h5py_dataset(h5_object, lazy=lazy, region=region,
+                                     dim_cache=self._dim_cache)
         else:
-            return self.read_all(parent=h5_object)
+            return self.read_all(parent=h5_object, lazy=lazy)
 
     def __validate_obj_in_same_file(self, h5_object):
         """
@@ -112,7 +148,7 @@ class NSIDReader(sidpy.Reader):
                           ''.format(h5_object.file.filename,
                                     self._h5_file.filename))
 
-    def read_all(self, recursive=True, parent=None):
+    def read_all(self, recursive=True, parent=None, lazy=False):
         """
         Reads all HDF5 datasets formatted according to NSID specifications.
 
@@ -123,6 +159,9 @@ class NSIDReader(sidpy.Reader):
         parent : h5py.Group, Default = None
             HDF5 group under which to read all available datasets.
             By default, all datasets within the HDF5 file are read.
+        lazy : bool, optional. Default = False
+            If True, data are not read from the file until computed.
+            See :func:`pyNSID.io.hdf_utils.read_h5py_dataset`
 
         Returns
         -------
@@ -139,7 +178,7 @@ class NSIDReader(sidpy.Reader):
             h5_group = parent
 
         if recursive:
-            list_of_main = self._main_dsets
+            list_of_main = self._get_main_dsets()
         else:
             list_of_main = []
             for key in h5_group:
@@ -150,5 +189,6 @@ class NSIDReader(sidpy.Reader):
         # Go through each of the identified
         list_of_datasets = []
         for dset in list_of_main:
-            list_of_datasets.append(read_h5py_dataset(dset))
+            list_of_datasets.append(read_h5py_dataset(
+                dset, lazy=lazy, dim_cache=self._dim_cache))
         return list_of_datasets
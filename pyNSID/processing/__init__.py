@@ -7,8 +7,9 @@ Submodules
 .. autosummary::
     :toctree: _autosummary
 
+    process
 """
 
-#from .process import Process
+from .process import Process
 
-__all__ = []
+__all__ = ['Process']
@@ -0,0 +1,598 @@
+# -*- coding: utf-8 -*-
+"""
+Base class for computations that are applied to every position of a NSID
+main dataset
+
+Created on Sat Oct 17 2026
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import h5py
+import numpy as np
+import dask
+from dask import array as da
+from sidpy import Dimension, Dataset
+from sidpy.hdf.hdf_utils import get_attr
+from sidpy.sid.dimension import DimensionType
+
+from ..io.hdf_io import write_results, find_results
+from ..io.hdf_utils import check_if_main, read_h5py_dataset, get_all_main, \
+    _dataset_from_dask, _copy_dimension
+
+if sys.version_info.major == 3:
+    unicode = str
+
+__all__ = ['Process', 'SCHEDULERS', 'get_completed_rows']
+
+SCHEDULERS = ['threads', 'processes', 'dask']
+
+POSITION_DIMENSION_TYPES = (DimensionType.SPATIAL, DimensionType.RECIPROCAL)
+
+# Attribute of the results group holding the [start, stop) rows of the
+# source dataset whose results have been written
+COMPLETED_ROWS_ATTR = 'completed_rows'
+
+
+def _merge_ranges(ranges):
+    """
+    Merges overlapping and adjacent [start, stop) ranges
+
+    Parameters
+    ----------
+    ranges : array-like
+        Ranges as rows of [start, stop)
+
+    Returns
+    -------
+    numpy.ndarray
+        Sorted, disjoint ranges of shape (N, 2)
+    """
+    merged = []
+    for start, stop in sorted([tuple(item) for item in ranges]):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], stop)
+        else:
+            merged.append([start, stop])
+    return np.array(merged, dtype=np.int64).reshape(-1, 2)
+
+
+def get_completed_rows(h5_results_grp):
+    """
+    Returns the rows of the source dataset whose results have been written
+    into the results group of a Process
+
+    Parameters
+    ----------
+    h5_results_grp : h5py.Group
+        Results group written by :meth:`Process.compute`
+
+    Returns
+    -------
+    numpy.ndarray
+        Sorted, disjoint [start, stop) ranges of rows of shape (N, 2).
+        Empty if the group does not record progress
+    """
+    if COMPLETED_ROWS_ATTR not in h5_results_grp.attrs:
+        return np.zeros((0, 2), dtype=np.int64)
+    return np.array(h5_results_grp.attrs[COMPLETED_ROWS_ATTR],
+                    dtype=np.int64).reshape(-1, 2)
+
+
+def _map_positions(func, positions, args, kwargs):
+    """
+    Applies a function to each position in a batch of positions. Module
+    level so that it can be sent to worker processes
+
+    Parameters
+    ----------
+    func : callable
+        Function applied to each position
+    positions : numpy.ndarray
+        Data of the positions stacked along the first axis
+    args : tuple
+        Additional positional arguments to ``func``
+    kwargs : dict
+        Additional keyword arguments to ``func``
+
+    Returns
+    -------
+    list
+        Output of ``func`` for each position
+    """
+    return [func(position, *args, **kwargs) for position in positions]
+
+
+class Process(object):
+
+    def __init__(self, h5_main, process_name=None, parms_dict=None,
+                 num_pos_dims=None, cores=None, scheduler='threads',
+                 max_mem_mb=1024, mem_multiplier=1.0, h5_target_group=None,
+                 verbose=False):
+        """
+        Applies a computation, such as fitting a model, to every position of
+        a NSID main dataset and writes the results back to HDF5.
+
+        The data are read, computed and written in chunks of positions along
+        the first dimension so that memory stays bounded regardless of the
+        size of the dataset.
+
+        Subclasses implement:
+
+        * :meth:`_create_results_datasets` - returns placeholders that
+          describe the results, e.g. via :meth:`_get_results_placeholder`
+        * :meth:`_map_function` - computes the results for a single
+          position, or :meth:`_unit_computation` - computes the results for
+          a chunk of positions at once
+
+        Parameters
+        ----------
+        h5_main : h5py.Dataset
+            NSID main dataset to process
+        process_name : str, optional. Default = None
+            Name of the process. The results are written into a group named
+            ``Log_<process_name>_<index>``. By default, the name of the class
+        parms_dict : dict, optional. Default = None
+            Parameters of the computation. Written as attributes of the
+            results group
+        num_pos_dims : int, optional. Default = None
+            Number of leading dimensions of ``h5_main`` that are positions.
+            The remaining dimensions make up the data at each position. By
+            default, the leading spatial or reciprocal dimensions and at
+            least the first dimension
+        cores : int, optional. Default = None
+            Number of workers. By default, the number of CPU cores
+        scheduler : str, optional. Default = 'threads'
+            How the positions are distributed among the workers:
+
+            * 'threads' - a pool of threads. Best for functions that release
+              the GIL, such as most numpy and scipy routines
+            * 'processes' - a pool of processes. :meth:`_map_function` must
+              then be a ``staticmethod`` that can be pickled
+            * 'dask' - the active dask scheduler, e.g. a distributed Client
+
+        max_mem_mb : float, optional. Default = 1024
+            Maximum memory in MB used for each chunk of positions
+        mem_multiplier : float, optional. Default = 1
+            Memory needed by the computation and its results as a multiple
+            of the size of the source data. Used to size the chunks
+        h5_target_group : h5py.Group, optional. Default = None
+            Group in which the results are written. By default, the parent
+            group of ``h5_main``
+        verbose : bool, optional. Default = False
+            Whether or not to print logs
+        """
+        if not isinstance(h5_main, h5py.Dataset):
+            raise TypeError('h5_main should be a h5py.Dataset object')
+        if not check_if_main(h5_main):
+            raise TypeError('h5_main should be a NSID main dataset')
+        if process_name is None:
+            process_name = self.__class__.__name__
+        if not isinstance(process_name, (str, unicode)):
+            raise TypeError('process_name should be a string')
+        if parms_dict is None:
+            parms_dict = {}
+        if not isinstance(parms_dict, dict):
+            raise TypeError('parms_dict should be a dictionary')
+        if scheduler not in SCHEDULERS:
+            raise ValueError('scheduler should be one of {}. Provided: {}'
+                             ''.format(SCHEDULERS, scheduler))
+        if h5_target_group is None:
+            h5_target_group = h5_main.parent
+        if not isinstance(h5_target_group, h5py.Group):
+            raise TypeError('h5_target_group should be a h5py.Group object')
+        if h5_target_group.file != h5_main.file:
+            raise ValueError('h5_target_group should be in the same file as '
+                             'h5_main')
+        if max_mem_mb <= 0 or mem_multiplier <= 0:
+            raise ValueError('max_mem_mb and mem_multiplier should be '
+                             'positive')
+
+        self.h5_main = h5_main
+        # Dimensions and metadata without reading the data
+        self.dataset = read_h5py_dataset(h5_main, read_metadata_only=True)
+        self.process_name = process_name
+        self.parms_dict = parms_dict
+        self.verbose = verbose
+
+        if num_pos_dims is None:
+            num_pos_dims = 1
+            while num_pos_dims < h5_main.ndim and \
+                    self.dataset._axes[num_pos_dims].dimension_type in \
+                    POSITION_DIMENSION_TYPES:
+                num_pos_dims += 1
+        if not isinstance(num_pos_dims, (int, np.integer)) or \
+                not 1 <= num_pos_dims <= h5_main.ndim:
+            raise ValueError('num_pos_dims should be an integer between 1 and'
+                             ' {}'.format(h5_main.ndim))
+        self.num_pos_dims = int(num_pos_dims)
+        self.pos_shape = h5_main.shape[:self.num_pos_dims]
+        self.spec_shape = h5_main.shape[self.num_pos_dims:]
+
+        if cores is None:
+            cores = os.cpu_count() or 1
+        self.cores = max(1, int(cores))
+        self.scheduler = scheduler
+        self.max_mem_mb = max_mem_mb
+        self.mem_multiplier = mem_multiplier
+        self.rows_per_chunk = self._get_rows_per_chunk()
+
+        self.h5_target_group = h5_target_group
+        self.h5_results_grp = None
+        self.h5_results = None
+        self._executor = None
+        # Additional arguments passed on to _map_function
+        self._map_args = ()
+        self._map_kwargs = {}
+
+        if self.verbose:
+            print('Processing {} positions of shape {} in chunks of {} rows '
+                  'with {} {} workers'
+                  ''.format(self.pos_shape, self.spec_shape,
+                            self.rows_per_chunk, self.cores, self.scheduler))
+
+    def _get_rows_per_chunk(self):
+        """
+        Returns the number of rows along the first dimension that are read,
+        computed and written at once. Aligned with the HDF5 chunks of the
+        source dataset where possible
+
+        Returns
+        -------
+        int
+        """
+        row_bytes = self.h5_main.dtype.itemsize * \
+            int(np.prod(self.h5_main.shape[1:]))
+        rows = int(self.max_mem_mb * 1024 ** 2 //
+                   max(1, row_bytes * self.mem_multiplier))
+        rows = min(max(1, rows), self.h5_main.shape[0])
+        h5_chunks = self.h5_main.chunks
+        if h5_chunks is not None and rows > h5_chunks[0]:
+            rows -= rows % h5_chunks[0]
+        return rows
+
+    def _get_results_placeholder(self, title, result_shape=(),
+                                 dtype=np.float32, dimensions=None):
+        """
+        Returns a placeholder for a results dataset that has the position
+        dimensions of the source dataset followed by ``result_shape``
+
+        Parameters
+        ----------
+        title : str
+            Name of the results dataset
+        result_shape : tuple of int, optional. Default = ()
+            Shape of the results at each position
+        dtype : numpy.dtype, optional. Default = numpy.float32
+            Data type of the results
+        dimensions : list of sidpy.Dimension, optional. Default = None
+            Dimensions of the results at each position. Generic
+            dimensions are used if not provided
+
+        Returns
+        -------
+        sidpy.Dataset
+            Placeholder whose values are never computed
+        """
+        result_shape = tuple(result_shape)
+        if dimensions is None:
+            dimensions = [Dimension(np.arange(length), 'result_{}'.format(ind))
+                          for ind, length in enumerate(result_shape)]
+        if len(dimensions) != len(result_shape):
+            raise ValueError('Provide one dimension per axis of result_shape')
+        shape = self.pos_shape + result_shape
+        dataset = _dataset_from_dask(da.empty(shape, dtype=dtype))
+        dataset.title = title
+        for ind in range(self.num_pos_dims):
+            dataset.set_dimension(ind, _copy_dimension(self.dataset._axes[ind]))
+        for ind, dim in enumerate(dimensions):
+            dataset.set_dimension(self.num_pos_dims + ind, dim)
+        return dataset
+
+    def _create_results_datasets(self):
+        """
+        Returns placeholders describing the results datasets. The first
+        dimensions of each must be the position dimensions of the source
+        dataset, see :meth:`_get_results_placeholder`
+
+        Returns
+        -------
+        sidpy.Dataset or list of sidpy.Dataset
+        """
+        raise NotImplementedError('Please override the _create_results_'
+                                  'datasets method specific to your process')
+
+    @staticmethod
+    def _map_function(position, *args, **kwargs):
+        """
+        Computes the results for the data at a single position
+
+        Parameters
+        ----------
+        position : numpy.ndarray
+            Data at a single position, of shape ``spec_shape``
+        args, kwargs
+            ``self._map_args`` and ``self._map_kwargs``
+
+        Returns
+        -------
+        array-like or tuple of array-like
+            Results at this position. One item per results dataset if there
+            are several results datasets
+        """
+        raise NotImplementedError('Please override the _map_function or '
+                                  '_unit_computation method specific to your '
+                                  'process')
+
+    def _read_data_chunk(self, start, stop):
+        """
+        Reads the data in rows ``start`` to ``stop`` of the source dataset
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        return self.h5_main[start:stop]
+
+    def _unit_computation(self, data):
+        """
+        Computes the results for a chunk of positions by applying
+        :meth:`_map_function` to each position on the chosen scheduler.
+        Override to compute all positions in a chunk at once instead
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+            Data of the chunk of positions
+
+        Returns
+        -------
+        list of array-like
+            Results of the chunk, one item per results dataset
+        """
+        positions = data.reshape((-1,) + self.spec_shape)
+        # A few batches per worker keep the workers busy with little overhead
+        batches = np.array_split(positions, min(len(positions),
+                                                4 * self.cores))
+        func, args, kwargs = self._map_function, self._map_args, \
+            self._map_kwargs
+
+        if self.cores == 1 or len(batches) == 1:
+            outputs = [_map_positions(func, batch, args, kwargs)
+                       for batch in batches]
+        elif self.scheduler == 'dask':
+            outputs = dask.compute(*[dask.delayed(_map_positions)(
+                func, batch, args, kwargs) for batch in batches])
+        else:
+            futures = [self._executor.submit(_map_positions, func, batch,
+                                             args, kwargs)
+                       for batch in batches]
+            outputs = [future.result() for future in futures]
+        outputs = [item for batch in outputs for item in batch]
+
+        if len(self.h5_results) == 1:
+            return [np.asarray(outputs)]
+        return [np.asarray([item[ind] for item in outputs])
+                for ind in range(len(self.h5_results))]
+
+    def _write_results_chunk(self, start, stop, results):
+        """
+        Writes the results for rows ``start`` to ``stop``
+
+        Parameters
+        ----------
+        start, stop : int
+            Rows of the source dataset
+        results : list of array-like
+            Results of the chunk, one item per results dataset
+        """
+        if len(results) != len(self.h5_results):
+            raise ValueError('Expected {} results but got {}'
+                             ''.format(len(self.h5_results), len(results)))
+        for h5_result, result in zip(self.h5_results, results):
+            shape = (stop - start,) + h5_result.shape[1:]
+            h5_result[start:stop] = np.reshape(result, shape)
+
+    def _create_results_group(self):
+        """
+        Creates the results group and empty results datasets in the file
+        """
+        placeholders = self._create_results_datasets()
+        if isinstance(placeholders, Dataset):
+            placeholders = [placeholders]
+        for dataset in placeholders:
+            if dataset.shape[:self.num_pos_dims] != self.pos_shape:
+                raise ValueError('Results dataset: {} has shape: {}. The '
+                                 'leading dimensions should match the '
+                                 'positions: {}'.format(dataset.title,
+                                                        dataset.shape,
+                                                        self.pos_shape))
+        # Recorded before the results datasets exist so that the group is
+        # never mistaken for complete results after a crash
+        no_progress = {COMPLETED_ROWS_ATTR: np.zeros((0, 2), dtype=np.int64)}
+        self.h5_results_grp = write_results(self.h5_target_group,
+                                            dataset=placeholders,
+                                            attributes=self.parms_dict,
+                                            process_name=self.process_name,
+                                            write_data=False,
+                                            source_dataset=self.h5_main,
+                                            status_attrs=no_progress)
+        self.h5_results = [dataset.h5_dataset for dataset in placeholders]
+
+    def _is_complete(self, h5_grp):
+        """
+        Checks whether a results group holds the results for all positions
+        """
+        return get_completed_rows(h5_grp).tolist() == \
+            [[0, self.h5_main.shape[0]]]
+
+    def _find_previous_results(self):
+        """
+        Returns the most recent complete and the most recent interrupted
+        results groups of this process for the same source dataset and
+        parameters. Groups that do not record their progress were not
+        written by :meth:`compute` and are ignored
+
+        Returns
+        -------
+        tuple of h5py.Group or None
+            Complete and partial results groups. None if not found
+        """
+        complete, partial = None, None
+        for h5_grp in find_results(self.h5_target_group,
+                                   process_name=self.process_name,
+                                   attributes=self.parms_dict,
+                                   source_dataset=self.h5_main):
+            if COMPLETED_ROWS_ATTR not in h5_grp.attrs:
+                continue
+            if self._is_complete(h5_grp):
+                complete = h5_grp
+            else:
+                partial = h5_grp
+        return complete, partial
+
+    def _use_results_group(self, h5_results_grp):
+        """
+        Uses the results datasets of a previous computation, either to
+        return them or to continue writing into them
+
+        Parameters
+        ----------
+        h5_results_grp : h5py.Group
+            Results group returned by :meth:`_find_previous_results`
+        """
+        placeholders = self._create_results_datasets()
+        if isinstance(placeholders, Dataset):
+            placeholders = [placeholders]
+        h5_dsets = get_all_main(h5_results_grp)
+        self.h5_results = []
+        for dataset in placeholders:
+            matches = [h5_dset for h5_dset in h5_dsets
+                       if get_attr(h5_dset, 'main_data_name') ==
+                       dataset.title and h5_dset.shape == dataset.shape]
+            if len(matches) != 1:
+                raise ValueError('Could not find results dataset: {} in '
+                                 'results group: {}'
+                                 ''.format(dataset.title,
+                                           h5_results_grp.name))
+            self.h5_results.append(matches[0])
+        self.h5_results_grp = h5_results_grp
+
+    def _record_progress(self, start, stop):
+        """
+        Records that the results for rows ``start`` to ``stop`` have been
+        written and flushes them to disk so that the computation can resume
+        from here after a crash
+        """
+        completed = get_completed_rows(self.h5_results_grp).tolist()
+        self.h5_results_grp.attrs[COMPLETED_ROWS_ATTR] = \
+            _merge_ranges(completed + [[start, stop]])
+        self.h5_main.file.flush()
+
+    def _get_chunks(self):
+        """
+        Returns the (start, stop) rows of the chunks that are computed
+
+        Returns
+        -------
+        list of tuple
+        """
+        num_rows = self.h5_main.shape[0]
+        return [(start, min(start + self.rows_per_chunk, num_rows))
+                for start in range(0, num_rows, self.rows_per_chunk)]
+
+    def test(self, index=0):
+        """
+        Computes the results for a single position without writing them.
+        Useful to check the parameters before processing the entire dataset
+
+        Parameters
+        ----------
+        index : int or tuple of int, optional. Default = 0
+            Index of the position, either flattened or one per position
+            dimension
+
+        Returns
+        -------
+        Results of :meth:`_map_function` at this position
+        """
+        if isinstance(index, (int, np.integer)):
+            index = np.unravel_index(index, self.pos_shape)
+        return self._map_function(self.h5_main[tuple(index)],
+                                  *self._map_args, **self._map_kwargs)
+
+    def compute(self, resume=True, override=False):
+        """
+        Computes the results for all positions, chunk by chunk, writing
+        each chunk to the file as soon as it is computed
+
+        Parameters
+        ----------
+        resume : bool, optional. Default = True
+            If True and the file contains results of this process for the
+            same source dataset and parameters whose computation was
+            interrupted, only the positions that are missing are computed
+            and written into that results group. Otherwise, a new results
+            group is created
+        override : bool, optional. Default = False
+            If False and the file already contains the complete results of
+            this process for the same source dataset and parameters, these
+            results are returned without computing anything. Set to True to
+            compute the results again
+
+        Returns
+        -------
+        h5py.Group
+            Group containing the results
+
+        Notes
+        -----
+        The rows of the source dataset whose results have been written are
+        recorded in the ``completed_rows`` attribute of the results group
+        after every chunk. See :func:`get_completed_rows`
+        """
+        h5_complete_grp, h5_partial_grp = self._find_previous_results()
+        if not override and h5_complete_grp is not None:
+            if self.verbose:
+                print('Returning existing results in {}'
+                      ''.format(h5_complete_grp.name))
+            self._use_results_group(h5_complete_grp)
+            return self.h5_results_grp
+        if not resume:
+            h5_partial_grp = None
+        if h5_partial_grp is None:
+            self._create_results_group()
+        else:
+            self._use_results_group(h5_partial_grp)
+        completed = get_completed_rows(self.h5_results_grp)
+        chunks = [(start, stop) for start, stop in self._get_chunks()
+                  if not np.any((completed[:, 0] <= start) &
+                                (completed[:, 1] >= stop))]
+        if self.verbose and h5_partial_grp is not None:
+            print('Resuming computation in {}. {} chunks remaining'
+                  ''.format(h5_partial_grp.name, len(chunks)))
+
+        if self.cores > 1 and self.scheduler == 'threads':
+            self._executor = ThreadPoolExecutor(max_workers=self.cores)
+        elif self.cores > 1 and self.scheduler == 'processes':
+            self._executor = ProcessPoolExecutor(max_workers=self.cores)
+        try:
+            for ind, (start, stop) in enumerate(chunks):
+                t_start = time.perf_counter()
+                data = self._read_data_chunk(start, stop)
+                results = self._unit_computation(data)
+                self._write_results_chunk(start, stop, results)
+                self._record_progress(start, stop)
+                if self.verbose:
+                    print('Computed chunk {} of {}: rows {} - {} in {:.2f} s'
+                          ''.format(ind + 1, len(chunks), start, stop,
+                                    time.perf_counter() - t_start))
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+            self._executor = None
+
+        return self.h5_results_grp
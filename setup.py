@@ -63,7 +63,8 @@ setup(
     # include_package_data=True,
     # https://setuptools.readthedocs.io/en/latest/setuptools.html#declaring-dependencies
     extras_require={
-        'MPI':  ["mpi4py"]
+        'MPI':  ["mpi4py"],
+        'compression': ["hdf5plugin"]
     },
     # If there are data files included in your packages that need to be
     # installed, specify them here.  If using Python 2.6 or less, then these
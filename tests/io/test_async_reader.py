@@ -0,0 +1,184 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import asyncio
+import os
+import sys
+import threading
+import unittest
+import h5py
+import numpy as np
+import sidpy
+from sidpy import Dimension
+
+sys.path.append("../pyNSID/")
+
+from pyNSID.io.async_reader import AsyncNSIDReader
+from pyNSID.io.hdf_io import write_nsid_dataset
+
+
+def write_image(h5_group, name='Image', shape=(20, 8), **kwargs):
+    data = np.random.random(shape)
+    dataset = sidpy.Dataset.from_array(data, name=name)
+    dataset.set_dimension(0, Dimension(np.linspace(0, 1.9, shape[0]), 'x',
+                                       units='nm', dimension_type='spatial'))
+    dataset.set_dimension(1, Dimension(np.arange(shape[1]), 'y', units='nm',
+                                       dimension_type='spatial'))
+    return write_nsid_dataset(dataset, h5_group, **kwargs), data
+
+
+class TestAsyncNSIDReader(unittest.TestCase):
+
+    def setUp(self):
+        self.file_path = 'test_async_reader.h5'
+        self.images = {}
+        with h5py.File(self.file_path, mode='w') as h5_file:
+            for ind in range(3):
+                h5_grp = h5_file.create_group('Measurement_{:03d}'.format(ind))
+                h5_main, data = write_image(h5_grp, name='Image_{}'.format(ind),
+                                            chunks=(5, 8) if ind else None)
+                self.images[h5_main.name] = data
+
+    def tearDown(self):
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+
+    def test_read(self):
+        path = '/Measurement_000/Image_0/Image_0'
+
+        async def run():
+            async with AsyncNSIDReader(self.file_path, max_workers=2) as reader:
+                self.assertEqual(sorted(await reader.get_main_paths()),
+                                 sorted(self.images))
+                results = await reader.read(path), \
+                    await reader.read(path, region={'x': slice(2, 6)},
+                                      memmap=True)
+                handles = list(reader._handles)
+            self.assertTrue(all([not h5_file.id.valid for h5_file in handles]))
+            self.assertIsNone(reader._executor)
+            return results
+
+        full, region = asyncio.run(run())
+        self.assertIsInstance(full, sidpy.Dataset)
+        self.assertTrue(np.allclose(full.compute(), self.images[path]))
+        self.assertEqual(full._axes[0].name, 'x')
+        self.assertTrue(np.allclose(region.compute(), self.images[path][2:6]))
+
+    def test_read_all_concurrently(self):
+        async def run():
+            reader = AsyncNSIDReader(self.file_path, max_workers=2,
+                                     max_pending=3)
+            try:
+                results = await asyncio.gather(*[reader.read_all()
+                                                 for _ in range(10)])
+                subset = await reader.read_all(parent='/Measurement_001')
+                # Names are only available while the file handles are open
+                names = [[dataset.h5_dataset.name for dataset in datasets]
+                         for datasets in results + [subset]]
+                return results, names, len(reader._handles)
+            finally:
+                reader.close()
+
+        results, names, num_handles = asyncio.run(run())
+        # At most one file handle per worker thread
+        self.assertGreaterEqual(num_handles, 1)
+        self.assertLessEqual(num_handles, 2)
+        for datasets, paths in zip(results, names):
+            self.assertEqual(sorted(paths), sorted(self.images))
+            for dataset, path in zip(datasets, paths):
+                self.assertTrue(np.allclose(dataset.compute(),
+                                            self.images[path]))
+        self.assertEqual(names[-1], ['/Measurement_001/Image_1/Image_1'])
+
+    def test_read_slice(self):
+        async def run():
+            with AsyncNSIDReader(self.file_path) as reader:
+                return await asyncio.gather(
+                    reader.read_slice('/Measurement_000/Image_0/Image_0',
+                                      {'x': (0.45, 0.85)}, memmap=True),
+                    reader.read_slice('/Measurement_001/Image_1/Image_1',
+                                      (slice(3, 7), 2)))
+
+        mapped, chunked = asyncio.run(run())
+        # Copied out of the memory map by the worker thread
+        self.assertNotIsInstance(mapped, np.memmap)
+        self.assertTrue(np.allclose(
+            mapped, self.images['/Measurement_000/Image_0/Image_0'][5:9]))
+        self.assertEqual(chunked.shape, (4, 1))
+        self.assertTrue(np.allclose(
+            chunked, self.images['/Measurement_001/Image_1/Image_1'][3:7, 2:3]))
+
+    def test_event_loop_not_blocked(self):
+        ticks = []
+
+        async def tick():
+            for _ in range(3):
+                ticks.append(threading.current_thread().name)
+                await asyncio.sleep(0)
+
+        async def run():
+            with AsyncNSIDReader(self.file_path) as reader:
+                await asyncio.gather(reader.read_all(), tick())
+
+        asyncio.run(run())
+        self.assertEqual(ticks, [threading.main_thread().name] * 3)
+
+    def test_open(self):
+        path = '/Measurement_002/Image_2/Image_2'
+
+        async def run():
+            reader = await AsyncNSIDReader.open(self.file_path, max_workers=2)
+            # The file was opened by a worker thread rather than the loop
+            self.assertEqual(len(reader._handles), 1)
+            async with reader:
+                return await reader.read(path)
+
+        dataset = asyncio.run(run())
+        self.assertTrue(np.allclose(dataset.compute(), self.images[path]))
+
+        with open('not_hdf5.h5', mode='w') as text_file:
+            text_file.write('text')
+        try:
+            with self.assertRaises(OSError):
+                asyncio.run(AsyncNSIDReader.open('not_hdf5.h5'))
+        finally:
+            os.remove('not_hdf5.h5')
+        with self.assertRaises(ValueError):
+            asyncio.run(AsyncNSIDReader.open(self.file_path, max_workers=0))
+
+    def test_reused_across_event_loops(self):
+        path = '/Measurement_001/Image_1/Image_1'
+
+        async def run(reader):
+            # More requests than max_pending so that requests wait
+            return await asyncio.gather(*[reader.read_slice(path, (ind, 0))
+                                          for ind in range(6)])
+
+        with AsyncNSIDReader(self.file_path, max_pending=2) as reader:
+            for _ in range(2):
+                values = asyncio.run(run(reader))
+                self.assertTrue(np.allclose(
+                    np.ravel(values), self.images[path][:6, 0]))
+
+    def test_invalid_inputs(self):
+        with self.assertRaises(TypeError):
+            _ = AsyncNSIDReader(1)
+        with self.assertRaises(ValueError):
+            _ = AsyncNSIDReader(self.file_path, max_workers=0)
+        with self.assertRaises(ValueError):
+            _ = AsyncNSIDReader(self.file_path, max_pending=-1)
+
+        async def run(reader, path):
+            return await reader.read(path)
+
+        with AsyncNSIDReader(self.file_path) as reader:
+            with self.assertRaises(KeyError):
+                asyncio.run(run(reader, '/Measurement_000/Nothing'))
+            with self.assertRaises(TypeError):
+                asyncio.run(run(reader, '/Measurement_000'))
+        with self.assertRaises(ValueError):
+            asyncio.run(run(reader, '/Measurement_000/Image_0/Image_0'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,9 @@ import unittest
 import sys
 import h5py
 import numpy as np
-from os import remove
+from os import remove, path
+from unittest import mock
+import dask.array as da
 
 sys.path.insert(0, "../../../sidpy/")
 import sidpy
@@ -68,8 +70,58 @@ class TestCreateEmptyDataset(unittest.TestCase):
     def test_name_kwarg_used_correctly(self):
         pass
 
+    def test_no_data_written(self):
+        h5_f = h5py.File('test_empty.h5', 'w')
+        h5_group = h5_f.create_group('MyGroup')
+        with mock.patch.object(hdf_io, '_stream_to_h5') as stream:
+            empty_dset = hdf_io.create_empty_dataset((1000, 1000, 2000),
+                                                     h5_group, 'big',
+                                                     dtype=np.float32,
+                                                     fillvalue=np.nan)
+            self.assertFalse(stream.called)
+        self.assertEqual(empty_dset.dtype, np.float32)
+        self.assertIsNotNone(empty_dset.chunks)
+        self.assertEqual(empty_dset.id.get_storage_size(), 0)
+        self.assertTrue(np.all(np.isnan(empty_dset[0, :2, :3])))
+        self.assertTrue(pyNSID.hdf_utils.check_if_main(empty_dset))
+        h5_f.close()
+        remove('test_empty.h5')
+
+    def test_many_generic_dimensions(self):
+        h5_f = h5py.File('test_empty.h5', 'w')
+        empty_dset = hdf_io.create_empty_dataset((1,) * 28, h5_f, 'many')
+        self.assertEqual([dim.label for dim in empty_dset.dims][24:],
+                         ['y', 'z', 'dim_26', 'dim_27'])
+        h5_f.close()
+        remove('test_empty.h5')
+
+    def test_dimensions_provided(self):
+        h5_f = h5py.File('test_empty.h5', 'w')
+        h5_group = h5_f.create_group('MyGroup')
+        dims = [sidpy.Dimension(np.arange(3), 'x', units='nm',
+                                dimension_type='spatial'),
+                sidpy.Dimension(np.linspace(0, 1, 4), 'bias', units='V',
+                                dimension_type='spectral')]
+        empty_dset = hdf_io.create_empty_dataset((3, 4), h5_group, 'data',
+                                                 dimensions=dims)
+        self.assertTrue(np.allclose(h5_group['data']['bias'][()],
+                                    dims[1].values))
+        self.assertEqual(h5_group['data']['x'].attrs['units'], 'nm')
+        self.assertTrue(np.allclose(empty_dset[()], 0))
+        with self.assertRaises(ValueError):
+            _ = hdf_io.create_empty_dataset((3, 4), h5_group, 'other',
+                                            dimensions=dims[:1])
+        h5_f.close()
+        remove('test_empty.h5')
+
 #Gerd
 class TestWriteNSIDataset(unittest.TestCase):
+
+    def tearDown(self):
+        # Also removes the file if a test failed before removing it
+        if path.exists('test.h5'):
+            remove('test.h5')
+
     def base_test(self, dims=3, dim_types=['spatial', 'spatial', 'spectral'],
                   data_type='complex', verbose=True):
         h5_f = h5py.File('test.h5', 'w')
@@ -171,10 +223,12 @@ class TestWriteNSIDataset(unittest.TestCase):
 
     def test_h5_file_in_read_only_mode(self):
         data_set = sidpy.Dataset.from_array(np.zeros([5, 6]), name='Image')
+        h5py.File('test.h5', 'w').close()
         h5_file = h5py.File('test.h5', 'r')
 
         with self.assertRaises(ValueError):
             pyNSID.hdf_io.write_nsid_dataset(data_set, h5_file)
+        h5_file.close()
 
     def test_h5_file_closed(self):
         data_set = sidpy.Dataset.from_array(np.zeros([5, 6]), name='Image')
@@ -327,13 +381,264 @@ class TestWriteNSIDataset(unittest.TestCase):
 
     def test_h5_dataset_property_of_sidpy_dataset_populated(self):
         data_set = sidpy.Dataset.from_array(np.zeros([5, 6]), name='Image')
+        data_set.property = {'some': {'some': 'thing'}}
+
+        with h5py.File('test.h5', 'w') as h5_file:
+            h5_group = h5_file.create_group('MyGroup')
+            # Only registered dictionaries are written
+            pyNSID.hdf_io.write_nsid_dataset(data_set, h5_group, 'before')
+            with mock.patch.object(hdf_io, 'METADATA_CONTAINERS',
+                                   list(hdf_io.METADATA_CONTAINERS)):
+                hdf_io.register_metadata_container('property')
+                pyNSID.hdf_io.write_nsid_dataset(data_set, h5_group, 'after')
+
+            self.assertFalse('property' in h5_group['before'])
+            self.assertTrue('property' in h5_group['after'])
+
+    def test_registered_metadata_container_written(self):
+        class CalibratedDataset(sidpy.Dataset):
+            @property
+            def calibration(self):
+                return {'gain': 2}
+
+        data_set = CalibratedDataset.from_array(np.zeros([5, 6]),
+                                                name='Image')
+        with h5py.File('test.h5', 'w') as h5_file:
+            h5_group = h5_file.create_group('MyGroup')
+
+            with mock.patch.object(hdf_io, 'METADATA_CONTAINERS',
+                                   list(hdf_io.METADATA_CONTAINERS)):
+                pyNSID.hdf_io.write_nsid_dataset(data_set, h5_group, 'before')
+                hdf_io.register_metadata_container('calibration')
+                hdf_io.register_metadata_container('calibration')
+                self.assertEqual(
+                    hdf_io.METADATA_CONTAINERS.count('calibration'), 1)
+                pyNSID.hdf_io.write_nsid_dataset(data_set, h5_group, 'after')
+
+            self.assertFalse('calibration' in h5_group['before'])
+            self.assertEqual(h5_group['after/calibration'].attrs['gain'], 2)
+        self.assertFalse('calibration' in hdf_io.METADATA_CONTAINERS)
+
+    def test_register_metadata_container_invalid(self):
+        with self.assertRaises(TypeError):
+            hdf_io.register_metadata_container(['calibration'])
+        with self.assertRaises(ValueError):
+            hdf_io.register_metadata_container('_axes')
+
+    def test_properties_not_scanned_for_metadata(self):
+        data_set = sidpy.Dataset.from_array(np.zeros([5, 6]), name='Image')
+
+        with h5py.File('test.h5', 'w') as h5_file:
+            h5_group = h5_file.create_group('MyGroup')
+            # Computed properties such as the transpose should never be
+            # evaluated
+            with mock.patch.object(sidpy.Dataset, 'T',
+                                   new_callable=mock.PropertyMock) as transpose:
+                pyNSID.hdf_io.write_nsid_dataset(data_set, h5_group)
+            transpose.assert_not_called()
+            self.assertFalse('_axes' in h5_group['Image'])
+
+    def test_in_memory_file(self):
+        data = np.random.normal(size=(12, 7))
+        data_set = sidpy.Dataset.from_array(data, name='Image',
+                                            chunks=(3, 7))
+        h5_file = h5py.File('in_memory.h5', 'w', driver='core',
+                            backing_store=False)
+        h5_group = h5_file.create_group('MyGroup')
+        h5_dset = pyNSID.hdf_io.write_nsid_dataset(data_set, h5_group)
+        self.assertTrue(np.allclose(h5_dset[()], data))
+        h5_file.close()
+
+    def test_streams_into_open_dataset(self):
+        data = np.random.normal(size=(12, 7))
+        data_set = sidpy.Dataset.from_array(data, name='Image',
+                                            chunks=(3, 7))
         h5_file = h5py.File('test.h5', 'w')
         h5_group = h5_file.create_group('MyGroup')
-        data_set.property = {'some': {'some': 'thing'}}
+        with mock.patch.object(da, 'to_hdf5') as to_hdf5:
+            with mock.patch.object(da, 'store', wraps=da.store) as store:
+                h5_dset = pyNSID.hdf_io.write_nsid_dataset(
+                    data_set, h5_group, max_in_flight_chunks=2)
+                self.assertFalse(to_hdf5.called)
+                # Four blocks stored two at a time
+                self.assertEqual(store.call_count, 2)
+                for args, kwargs in store.call_args_list:
+                    self.assertEqual(args[1], [h5_dset] * 2)
+                    self.assertEqual(len(kwargs['regions']), 2)
+                    # The configured scheduler is used
+                    self.assertNotIn('scheduler', kwargs)
+        self.assertTrue(np.allclose(h5_dset[()], data))
+        h5_file.close()
+        remove('test.h5')
 
-        pyNSID.hdf_io.write_nsid_dataset(data_set, h5_group)
+    def test_stream_scheduler(self):
+        data = np.random.normal(size=(12, 7))
+        source = da.from_array(data, chunks=(5, 7))
+        h5_file = h5py.File('test.h5', 'w')
+        h5_dset = h5_file.create_dataset('data', shape=data.shape)
+        with mock.patch.object(da, 'store', wraps=da.store) as store:
+            hdf_io._stream_to_h5([source], [h5_dset], max_in_flight_chunks=5,
+                                 scheduler='synchronous')
+            self.assertEqual(store.call_count, 1)
+            self.assertEqual(store.call_args[1]['scheduler'], 'synchronous')
+        self.assertTrue(np.allclose(h5_dset[()], data))
+        h5_file.close()
+        remove('test.h5')
+
+    def test_automatic_chunks(self):
+        data_set = sidpy.Dataset.from_array(np.zeros((32, 16, 128)),
+                                            name='Image')
+        for ind, dim_type in enumerate(['spatial', 'spatial', 'spectral']):
+            data_set.set_dimension(ind, sidpy.Dimension(
+                np.arange(data_set.shape[ind]), 'dim_{}'.format(ind),
+                dimension_type=dim_type))
+        h5_file = h5py.File('test.h5', 'w')
+        h5_group = h5_file.create_group('MyGroup')
+        h5_dset = pyNSID.hdf_io.write_nsid_dataset(
+            data_set, h5_group, main_data_name='spectra',
+            access_pattern='spectrum', target_chunk_bytes=128 * 8 * 4)
+        self.assertEqual(h5_dset.chunks, (1, 4, 128))
+        h5_dset = pyNSID.hdf_io.write_nsid_dataset(
+            data_set, h5_group, main_data_name='images',
+            access_pattern='image', target_chunk_bytes=32 * 16 * 8 * 2)
+        self.assertEqual(h5_dset.chunks, (32, 16, 2))
+        h5_file.close()
+        remove('test.h5')
+
+    def test_small_datasets_contiguous(self):
+        data_set = sidpy.Dataset.from_array(np.random.random((3, 4)),
+                                            name='Image')
+        h5_file = h5py.File('test.h5', 'w')
+        h5_dset = pyNSID.hdf_io.write_nsid_dataset(data_set, h5_file)
+        self.assertIsNone(h5_dset.chunks)
+        self.assertIsNotNone(pyNSID.hdf_utils.get_memmap(h5_dset))
+        # Chunked when features that need chunks are requested
+        for name, kwargs in [('fast', {'compression_profile': 'fast'}),
+                             ('resizable', {'maxshape': (None, 4)}),
+                             ('large', {'target_chunk_bytes': 3 * 4 * 4})]:
+            h5_dset = pyNSID.hdf_io.write_nsid_dataset(
+                data_set, h5_file.create_group(name), **kwargs)
+            self.assertIsNotNone(h5_dset.chunks)
+            self.assertIsNone(pyNSID.hdf_utils.get_memmap(h5_dset))
+        h5_file.close()
+        remove('test.h5')
+
+    def test_explicit_chunks_override(self):
+        data_set = sidpy.Dataset.from_array(np.zeros((32, 16)), name='Image')
+        h5_file = h5py.File('test.h5', 'w')
+        h5_group = h5_file.create_group('MyGroup')
+        h5_dset = pyNSID.hdf_io.write_nsid_dataset(data_set, h5_group,
+                                                   chunks=(4, 4))
+        self.assertEqual(h5_dset.chunks, (4, 4))
+        h5_dset = pyNSID.hdf_io.write_nsid_dataset(data_set, h5_group,
+                                                   main_data_name='other',
+                                                   access_pattern=None)
+        self.assertIsNone(h5_dset.chunks)
+        h5_file.close()
+        remove('test.h5')
+
+    def test_compression_profiles(self):
+        data_set = sidpy.Dataset.from_array(np.zeros((32, 16)), name='Image')
+        h5_file = h5py.File('test.h5', 'w')
+        h5_group = h5_file.create_group('MyGroup')
+        h5_dset = pyNSID.hdf_io.write_nsid_dataset(
+            data_set, h5_group, main_data_name='balanced',
+            compression_profile='balanced')
+        self.assertEqual(h5_dset.compression, 'gzip')
+        self.assertEqual(h5_dset.compression_opts, 4)
+        self.assertTrue(h5_dset.shuffle)
+        h5_dset = pyNSID.hdf_io.write_nsid_dataset(
+            data_set, h5_group, main_data_name='override',
+            compression_profile='max', compression_opts=1)
+        self.assertEqual(h5_dset.compression_opts, 1)
+        h5_dset = pyNSID.hdf_io.write_nsid_dataset(
+            data_set, h5_group, main_data_name='none',
+            compression_profile='none')
+        self.assertIsNone(h5_dset.compression)
+        with self.assertRaises(ValueError):
+            _ = pyNSID.hdf_io.write_nsid_dataset(
+                data_set, h5_group, main_data_name='bad',
+                compression_profile='tiny')
+        h5_file.close()
+        remove('test.h5')
 
-        self.assertTrue('property' in h5_group['Image'])
+    def test_get_compression_kwargs(self):
+        # Independent of the optional packages that are installed
+        for plugin in [None, mock.Mock()]:
+            with mock.patch('pyNSID.io.hdf_io.hdf5plugin', plugin):
+                self.assertEqual(hdf_io.get_compression_kwargs('fast'),
+                                 {'compression': 'lzf', 'shuffle': True})
+        with mock.patch('pyNSID.io.hdf_io.hdf5plugin', None):
+            with self.assertRaises(ImportError):
+                _ = hdf_io.get_compression_kwargs('lz4')
+        with mock.patch('pyNSID.io.hdf_io.hdf5plugin', mock.Mock()):
+            self.assertEqual(hdf_io.get_compression_kwargs('lz4'),
+                             {'compression': 32004, 'shuffle': True})
+        self.assertEqual(hdf_io.get_compression_kwargs('none'), {})
+        with self.assertRaises(ValueError):
+            _ = hdf_io.get_compression_kwargs('tiny')
+
+    def test_benchmark_compression(self):
+        data_set = sidpy.Dataset.from_array(
+            np.round(np.random.normal(size=(64, 32, 16)) * 10), name='Image')
+        results = hdf_io.benchmark_compression(data_set,
+                                               profiles=['none', 'balanced'],
+                                               sample_bytes=32 * 16 * 8 * 8)
+        self.assertEqual(sorted(results.keys()), ['balanced', 'none'])
+        for vals in results.values():
+            self.assertEqual(sorted(vals.keys()),
+                             ['ratio', 'read_MBps', 'write_MBps'])
+        self.assertAlmostEqual(results['none']['ratio'], 1)
+        self.assertGreater(results['balanced']['ratio'], 1)
+        with self.assertRaises(ValueError):
+            _ = hdf_io.benchmark_compression(data_set, profiles=['tiny'])
+        with mock.patch('pyNSID.io.hdf_io.hdf5plugin', None):
+            results = hdf_io.benchmark_compression(
+                data_set, sample_bytes=32 * 16 * 8 * 8)
+        self.assertEqual(sorted(results.keys()),
+                         ['balanced', 'fast', 'max', 'none'])
+
+    def test_share_dimensions(self):
+        def make_map(offset=0.):
+            data_set = sidpy.Dataset.from_array(np.random.random((4, 5)),
+                                                name='map')
+            data_set.set_dimension(0, sidpy.Dimension(np.arange(4), 'x',
+                                                      units='nm'))
+            data_set.set_dimension(1, sidpy.Dimension(np.arange(5) + offset,
+                                                      'y', units='nm'))
+            return data_set
+
+        with h5py.File('test.h5', 'w') as h5_file:
+            h5_mains = []
+            for ind, offset in enumerate([0, 0, 1]):
+                h5_group = h5_file.create_group('Group_{}'.format(ind))
+                h5_mains.append(pyNSID.hdf_io.write_nsid_dataset(
+                    make_map(offset), h5_group, share_dimensions=True))
+            self.assertEqual(h5_mains[1].dims[0][0], h5_file['Group_0/map/x'])
+            self.assertEqual(h5_mains[1].dims[1][0], h5_file['Group_0/map/y'])
+            self.assertNotIn('x', h5_file['Group_1/map'])
+            self.assertEqual(h5_mains[2].dims[0][0], h5_file['Group_0/map/x'])
+            self.assertEqual(h5_mains[2].dims[1][0], h5_file['Group_2/map/y'])
+            # Not shared unless requested
+            h5_main = pyNSID.hdf_io.write_nsid_dataset(
+                make_map(), h5_file.create_group('Group_3'))
+            self.assertEqual(h5_main.dims[0][0], h5_file['Group_3/map/x'])
+
+        # The shared dimensions are remembered in the file
+        with h5py.File('test.h5', 'r+') as h5_file:
+            del h5_file['Group_2/map']
+            h5_main = pyNSID.hdf_io.write_nsid_dataset(
+                make_map(), h5_file.create_group('Group_4'),
+                share_dimensions=True)
+            self.assertEqual(h5_main.dims[0][0], h5_file['Group_0/map/x'])
+            h5_main = pyNSID.hdf_io.write_nsid_dataset(
+                make_map(1), h5_file.create_group('Group_5'),
+                share_dimensions=True)
+            self.assertEqual(h5_main.dims[1][0], h5_file['Group_5/map/y'])
+            main_dsets = pyNSID.hdf_utils.get_all_main(h5_file)
+            self.assertEqual(len(main_dsets), 5)
+            for h5_main in main_dsets:
+                self.assertTrue(pyNSID.hdf_utils.check_if_main(h5_main))
 
     def test_dim_varied(self):
         for ind in range(1, 10):
@@ -346,6 +651,26 @@ class TestWriteNSIDataset(unittest.TestCase):
                 pass
 
 
+class TestGetMPISlab(unittest.TestCase):
+
+    def test_slabs_cover_dimension(self):
+        for length, size, align in [(10, 4, 1), (10, 4, 3), (3, 4, 1),
+                                    (100, 7, 8)]:
+            slabs = [hdf_io._get_mpi_slab(length, rank, size, align=align)
+                     for rank in range(size)]
+            self.assertEqual(slabs[0][0], 0)
+            self.assertEqual(slabs[-1][1], length)
+            for (_, stop), (start, _) in zip(slabs[:-1], slabs[1:]):
+                self.assertEqual(stop, start)
+            for start, stop in slabs[:-1]:
+                self.assertEqual(stop % align, 0)
+
+    def test_aligned_to_chunks(self):
+        slabs = [hdf_io._get_mpi_slab(10, rank, 4, align=3)
+                 for rank in range(4)]
+        self.assertEqual(slabs, [(0, 3), (3, 6), (6, 9), (9, 10)])
+
+
 class TestWriteResults(unittest.TestCase):
 
     def test_not_h5py_group_obj(self):
@@ -528,6 +853,44 @@ class TestWriteResults(unittest.TestCase):
         h5_file.close()
         remove('test2.h5')
 
+    def test_batched_shares_dims_and_stores_once(self):
+        datasets = []
+        for ind in range(3):
+            dset = sidpy.Dataset.from_array(np.random.random((4, 5)),
+                                            name='map_{}'.format(ind))
+            dset.set_dimension(0, sidpy.Dimension(np.arange(4) * 0.5, 'x',
+                                                  units='nm'))
+            # The last dataset has a different second dimension
+            dset.set_dimension(1, sidpy.Dimension(np.arange(5) + ind // 2,
+                                                  'y', units='nm'))
+            datasets.append(dset)
+        h5_file = h5py.File('test_write_results.h5', 'w')
+        with mock.patch.object(hdf_io, '_stream_to_h5',
+                               wraps=hdf_io._stream_to_h5) as stream:
+            log_group = hdf_io.write_results(h5_file, dataset=datasets,
+                                             process_name='Fit',
+                                             batched=True)
+            self.assertEqual(stream.call_count, 1)
+        h5_mains = [log_group['map_{}/map_{}'.format(ind, ind)]
+                    for ind in range(3)]
+        for dset, h5_main in zip(datasets, h5_mains):
+            self.assertTrue(np.allclose(h5_main[()], np.array(dset)))
+            self.assertTrue(pyNSID.hdf_utils.check_if_main(h5_main))
+            self.assertEqual(dset.h5_dataset, h5_main)
+        x_scales = [h5_main.dims[0][0] for h5_main in h5_mains]
+        self.assertTrue(all([h5_dim == x_scales[0] for h5_dim in x_scales]))
+        self.assertEqual(h5_mains[0].dims[1][0], h5_mains[1].dims[1][0])
+        self.assertNotEqual(h5_mains[0].dims[1][0], h5_mains[2].dims[1][0])
+        self.assertNotIn('x', log_group['map_1'])
+        self.assertIn('y', log_group['map_2'])
+        self.assertIn('machine_id', log_group.attrs)
+        self.assertNotIn('machine_id', h5_mains[1].attrs)
+        read = pyNSID.hdf_utils.read_h5py_dataset(h5_mains[2])
+        self.assertTrue(np.allclose(read._axes[1].values, np.arange(5) + 1))
+        self.assertEqual(len(pyNSID.hdf_utils.get_all_main(h5_file)), 3)
+        h5_file.close()
+        remove('test_write_results.h5')
+
     def test_simple(self):
         h5_f = h5py.File('test_write_results.h5', 'w')
         h5_group = h5_f.create_group('MyGroup')
@@ -539,3 +902,82 @@ class TestWriteResults(unittest.TestCase):
         # TODO: Add some more assertions
         h5_f.close()
         remove('test_write_results.h5')
+
+
+class TestFindResults(unittest.TestCase):
+
+    def setUp(self):
+        self.h5_file = h5py.File('test_find_results.h5', 'w', driver='core',
+                                 backing_store=False)
+        self.h5_group = self.h5_file.create_group('MyGroup')
+        h5_main = pyNSID.hdf_io.write_nsid_dataset(
+            sidpy.Dataset.from_array(np.random.random((4, 5)),
+                                     name='Image'), self.h5_group)
+        self.h5_source = h5_main
+
+    def tearDown(self):
+        self.h5_file.close()
+
+    def __write(self, parms, process_name='Fit', source=None):
+        result = sidpy.Dataset.from_array(np.random.random(4),
+                                          name='Result')
+        return hdf_io.write_results(self.h5_group, dataset=result,
+                                    attributes=parms,
+                                    process_name=process_name,
+                                    source_dataset=source)
+
+    def test_results_hash(self):
+        parms = {'model': 'gauss', 'guess': np.array([1., 2.]),
+                 'bounds': {'low': 0, 'high': 5}}
+        hash_a = hdf_io.get_results_hash('Fit', parms, self.h5_source)
+        self.assertEqual(hash_a, hdf_io.get_results_hash(
+            'Fit', dict(reversed(list(parms.items()))), self.h5_source))
+        h5_other = self.h5_group.create_dataset('Other', data=np.arange(3))
+        for args in [('Fit', parms, None),
+                     ('Fit2', parms, self.h5_source),
+                     ('Fit', dict(parms, guess=np.array([1., 3.])),
+                      self.h5_source),
+                     ('Fit', dict(parms, bounds={'low': 1, 'high': 5}),
+                      self.h5_source),
+                     ('Fit', parms, h5_other)]:
+            self.assertNotEqual(hash_a, hdf_io.get_results_hash(*args))
+
+    def test_find_matching_results(self):
+        h5_log_0 = self.__write({'width': 3}, source=self.h5_source)
+        _ = self.__write({'width': 4}, source=self.h5_source)
+        _ = self.__write({'width': 3})
+        _ = self.__write({'width': 3}, process_name='Other',
+                         source=self.h5_source)
+        h5_log_4 = self.__write({'width': 3}, source=self.h5_source)
+        self.assertEqual(h5_log_0.attrs['source_dataset'],
+                         self.h5_source.name)
+
+        self.assertEqual(hdf_io.find_results(self.h5_group, 'Fit',
+                                             {'width': 3}, self.h5_source),
+                         [h5_log_0, h5_log_4])
+        self.assertEqual(hdf_io.find_results(self.h5_group, 'Fit',
+                                             {'width': 5}, self.h5_source),
+                         [])
+
+    def test_status_attrs_excluded_from_hash(self):
+        h5_log = hdf_io.write_results(
+            self.h5_group, dataset=sidpy.Dataset.from_array(np.zeros(4)),
+            attributes={'width': 3}, process_name='Fit',
+            source_dataset=self.h5_source, status_attrs={'progress': 0})
+        self.assertEqual(h5_log.attrs['progress'], 0)
+        self.assertEqual(hdf_io.find_results(self.h5_group, 'Fit',
+                                             {'width': 3}, self.h5_source),
+                         [h5_log])
+        with self.assertRaises(TypeError):
+            hdf_io.write_results(self.h5_group, attributes={'width': 3},
+                                 status_attrs=[1])
+
+    def test_invalid_inputs(self):
+        with self.assertRaises(TypeError):
+            hdf_io.find_results(self.h5_source, 'Fit')
+        with self.assertRaises(TypeError):
+            hdf_io.get_results_hash('Fit', source_dataset=self.h5_group)
+        with self.assertRaises(TypeError):
+            hdf_io.get_results_hash('Fit', attributes=[1, 2])
+        with self.assertRaises(TypeError):
+            self.__write({'width': 3}, source=self.h5_group)
@@ -0,0 +1,99 @@
+"""
+Tests for writing NSID datasets in parallel with MPI.
+
+These tests are skipped unless mpi4py and h5py built against parallel HDF5
+are installed. Run them on a single machine with:
+
+    mpirun -n 4 python -m pytest -q -p no:cacheprovider tests/io/test_hdf_io_mpi.py
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+import os
+import sys
+import unittest
+import h5py
+import numpy as np
+import dask.array as da
+
+sys.path.insert(0, "../../")
+import sidpy
+from pyNSID.io import hdf_io
+from pyNSID.io.hdf_utils import check_if_main, read_h5py_dataset, \
+    get_all_main, _dataset_from_dask
+
+try:
+    from mpi4py import MPI
+except ImportError:
+    MPI = None
+
+HAS_PARALLEL_H5 = MPI is not None and h5py.get_config().mpi
+
+
+def make_lazy_dataset(shape):
+    data = da.arange(np.prod(shape), chunks=shape[-1],
+                     dtype=np.float64).reshape(shape)
+    dset = _dataset_from_dask(data)
+    dset.title = 'Image'
+    dset.units = 'nA'
+    for ind, name in enumerate(['x', 'y']):
+        dset.set_dimension(ind, sidpy.Dimension(np.arange(shape[ind]) * 0.5,
+                                                name, units='nm',
+                                                dimension_type='spatial'))
+    dset.metadata = {'instrument': 'microscope'}
+    return dset
+
+
+@unittest.skipUnless(HAS_PARALLEL_H5, 'requires mpi4py and parallel h5py')
+class TestWriteNSIDDatasetMPI(unittest.TestCase):
+
+    def setUp(self):
+        self.comm = MPI.COMM_WORLD
+        self.file_path = 'test_hdf_io_mpi.h5'
+
+    def tearDown(self):
+        self.comm.Barrier()
+        if self.comm.rank == 0 and os.path.exists(self.file_path):
+            os.remove(self.file_path)
+        self.comm.Barrier()
+
+    def __validate(self, shape, main_data_name):
+        self.comm.Barrier()
+        if self.comm.rank != 0:
+            return
+        expected = np.arange(np.prod(shape), dtype=np.float64).reshape(shape)
+        with h5py.File(self.file_path, mode='r') as h5_file:
+            h5_main = h5_file['Measurement/{}/{}'.format(main_data_name,
+                                                         main_data_name)]
+            self.assertTrue(check_if_main(h5_main))
+            self.assertTrue(np.allclose(h5_main[()], expected))
+            dset = read_h5py_dataset(h5_main)
+            self.assertEqual(dset.units, 'nA')
+            self.assertEqual(dset._axes[1].units, 'nm')
+            self.assertTrue(np.allclose(dset._axes[0].values,
+                                        np.arange(shape[0]) * 0.5))
+            self.assertEqual(dset.metadata, {'instrument': 'microscope'})
+            self.assertEqual(len(get_all_main(h5_file)), 1)
+
+    def __write(self, shape, main_data_name, **kwargs):
+        with h5py.File(self.file_path, mode='w', driver='mpio',
+                       comm=self.comm) as h5_file:
+            h5_group = h5_file.create_group('Measurement')
+            h5_main = hdf_io.write_nsid_dataset(make_lazy_dataset(shape),
+                                                h5_group,
+                                                main_data_name=main_data_name,
+                                                **kwargs)
+            self.assertEqual(h5_main.shape, shape)
+
+    def test_blocks_from_all_ranks(self):
+        shape = (4 * self.comm.size + 3, 7)
+        self.__write(shape, 'data', chunks=(2, 7))
+        self.__validate(shape, 'data')
+
+    def test_fewer_rows_than_ranks(self):
+        # Some ranks have nothing to write but must join collective I/O
+        shape = (1, 5)
+        self.__write(shape, 'tiny')
+        self.__validate(shape, 'tiny')
+
+
+if __name__ == '__main__':
+    unittest.main()
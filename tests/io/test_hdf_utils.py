@@ -1,6 +1,7 @@
 from __future__ import division, print_function, unicode_literals, absolute_import
 from typing import Tuple, Dict
 import unittest
+from unittest import mock
 import os
 import sys
 import h5py
@@ -14,7 +15,11 @@ flatten_dict = sidpy.dict_utils.flatten_dict
 
 sys.path.append("../../")
 from pyNSID.io.hdf_utils import find_dataset, read_h5py_dataset, \
-    get_all_main, link_as_main, check_if_main
+    get_all_main, link_as_main, check_if_main, write_main_index, \
+    get_tree_checksum, NSID_INDEX_NAME, validate_main, MainValidationReport, \
+    get_h5_chunks, get_region_slices, read_nsid_attrs, DimensionCache, \
+    get_memmap
+from pyNSID.io.hdf_io import write_nsid_dataset, write_results
 
 
 def make_simple_h5_dataset():
@@ -44,11 +49,12 @@ def make_simple_nsid_dataset(*args, **kwargs):
 
     dsetnames = kwargs.get("dsetnames", ['data'])
     dsetshapes = kwargs.get("dsetshapes")
+    chunks = kwargs.get("chunks")
     if dsetshapes is None:
         dsetshapes = [(2, 3) for i in range(len(dsetnames))]
     for i, d in enumerate(dsetnames):
         data = np.random.normal(size=dsetshapes[i])
-        h5_dataset = h5_group.create_dataset(d, data=data)
+        h5_dataset = h5_group.create_dataset(d, data=data, chunks=chunks)
         
         attrs_to_write = {'quantity': 'quantity',
                           'units': 'units',
@@ -141,6 +147,20 @@ def make_nsid_length_dim_wrong():
     return h5_file
 
 
+def make_written_nsid_file(group_names=('group_0', 'group_1')):
+    """
+    h5 file with one main dataset per group written via write_nsid_dataset
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = tmp_dir + 'nsid_written.h5'
+    h5_file = h5py.File(file_path, 'w')
+    for g_name in group_names:
+        h5_group = h5_file.create_group(g_name)
+        dset = Dataset.from_array(np.random.random((3, 4)), name='data')
+        write_nsid_dataset(dset, h5_group, main_data_name='data')
+    return h5_file
+
+
 def get_dim_dict(dims: Tuple[int]
                  ) -> Dict[int, h5py.Dataset]:
     h5_f = h5py.File('test2.h5', 'a')
@@ -241,6 +261,100 @@ class TestReadH5pyDataset(unittest.TestCase):
         self.assertTrue(dset._axes[0].name == 'a0')
         self.assertTrue(dset._axes[1].name == 'b0')
 
+    def test_lazy_values_match(self) -> None:
+        h5file = make_simple_nsid_dataset()
+        h5_dset = h5file['MyGroup']['data']
+        dset = read_h5py_dataset(h5_dset, lazy=True)
+        self.assertIsInstance(dset, sidpy.Dataset)
+        self.assertEqual(dset.shape, h5_dset.shape)
+        self.assertTrue(np.allclose(dset.compute(), h5_dset[()]))
+        self.assertTrue(dset._axes[0].name == 'a0')
+        self.assertTrue(dset._axes[1].name == 'b0')
+
+    def test_lazy_reads_from_file(self) -> None:
+        h5file = make_simple_nsid_dataset()
+        h5_dset = h5file['MyGroup']['data']
+        dset = read_h5py_dataset(h5_dset, lazy=True)
+        # Changes to the file after reading should be visible
+        h5_dset[0, 0] = 123.
+        self.assertEqual(float(dset[0, 0].compute()), 123.)
+
+    def test_lazy_chunks_aligned_with_h5_chunks(self) -> None:
+        h5file = make_simple_nsid_dataset(dsetshapes=[(40, 30)],
+                                          chunks=(8, 10))
+        h5_dset = h5file['MyGroup']['data']
+        dset = read_h5py_dataset(h5_dset, lazy=True, chunks=(16, 20))
+        self.assertEqual(dset.chunksize, (16, 20))
+        dset = read_h5py_dataset(h5_dset, lazy=True)
+        for h5_chunk, dask_chunk in zip(h5_dset.chunks, dset.chunksize):
+            self.assertEqual(dask_chunk % h5_chunk, 0)
+
+    def test_read_metadata_only(self) -> None:
+        _meta = {"units": "nA", "quantity": "Current"}
+        h5file = make_simple_nsid_dataset(_meta, dsetshapes=[(40, 30)],
+                                          chunks=(8, 10))
+        h5_dset = h5file['MyGroup']['data']
+        h5_dset.parent.create_group('metadata').attrs['key'] = 'val'
+
+        orig_getitem = h5py.Dataset.__getitem__
+        main_reads = []
+
+        def _getitem(obj, *args, **kwargs):
+            if obj.name == h5_dset.name:
+                main_reads.append(args)
+            return orig_getitem(obj, *args, **kwargs)
+
+        with mock.patch.object(h5py.Dataset, '__getitem__', new=_getitem):
+            with mock.patch.object(h5py.Dataset, 'read_direct') as read_dir:
+                dset = read_h5py_dataset(h5_dset, read_metadata_only=True)
+                self.assertFalse(read_dir.called)
+        self.assertEqual(main_reads, [])
+
+        self.assertIsInstance(dset, sidpy.Dataset)
+        self.assertEqual(dset.shape, (40, 30))
+        self.assertEqual(dset.dtype, h5_dset.dtype)
+        self.assertEqual(dset.units, 'nA')
+        self.assertEqual(dset.quantity, 'Current')
+        self.assertEqual(dset._axes[0].name, 'a0')
+        self.assertEqual(len(dset._axes[1]), 30)
+        self.assertEqual(dset.metadata, {'key': 'val'})
+        self.assertEqual(dset.h5_dataset, h5_dset)
+
+    def test_region_reads_only_hyperslab(self) -> None:
+        h5file = make_simple_nsid_dataset(dsetshapes=[(40, 30)])
+        h5_dset = h5file['MyGroup']['data']
+        expected = h5_dset[()]
+
+        orig_getitem = h5py.Dataset.__getitem__
+        main_reads = []
+
+        def _getitem(obj, *args, **kwargs):
+            if obj.name == h5_dset.name:
+                main_reads.append(args[0])
+            return orig_getitem(obj, *args, **kwargs)
+
+        with mock.patch.object(h5py.Dataset, '__getitem__', new=_getitem):
+            dset = read_h5py_dataset(h5_dset, region=(slice(4, 12), 3))
+        self.assertEqual(main_reads, [(slice(4, 12, 1), slice(3, 4, 1))])
+        self.assertEqual(dset.shape, (8, 1))
+        self.assertTrue(np.allclose(np.array(dset), expected[4:12, 3:4]))
+        self.assertTrue(np.allclose(dset._axes[0].values, np.arange(4, 12)))
+        self.assertTrue(np.allclose(dset._axes[1].values, [3]))
+        self.assertEqual(dset._axes[0].name, 'a0')
+
+    def test_region_lazy_and_metadata_only(self) -> None:
+        h5file = make_simple_nsid_dataset(dsetshapes=[(40, 30)],
+                                          chunks=(8, 10))
+        h5_dset = h5file['MyGroup']['data']
+        region = {'b0': (10, 19.5)}
+        dset = read_h5py_dataset(h5_dset, lazy=True, region=region)
+        self.assertEqual(dset.shape, (40, 10))
+        self.assertTrue(np.allclose(dset.compute(), h5_dset[:, 10:20]))
+        self.assertTrue(np.allclose(dset._axes[1].values, np.arange(10, 20)))
+        dset = read_h5py_dataset(h5_dset, read_metadata_only=True,
+                                 region=region)
+        self.assertEqual(dset.shape, (40, 10))
+
     def tearDown(self, fname: str = 'test.h5') -> None:
         if os.path.exists(fname):
             os.remove(fname)
@@ -283,11 +397,442 @@ class TestGetAllMain(unittest.TestCase):
     def test_multiple_main_dsets_in_diff_nested_groups(self):
         pass
 
+    def test_search_does_not_write_index(self):
+        h5file = make_written_nsid_file()
+        # Writing into a file without an index does not search the file
+        self.assertFalse(NSID_INDEX_NAME in h5file)
+        with mock.patch('pyNSID.io.hdf_utils.validate_main') as validate:
+            write_nsid_dataset(Dataset.from_array(np.zeros((2, 3))),
+                               h5file.create_group('group_2'))
+            self.assertFalse(validate.called)
+        # Searching a writable file only reads from it
+        self.assertEqual(len(get_all_main(h5file)), 3)
+        self.assertFalse(NSID_INDEX_NAME in h5file)
+
+    def test_index_built_on_request(self):
+        h5file = make_written_nsid_file()
+        write_nsid_dataset(Dataset.from_array(np.zeros((2, 3))),
+                           h5file.create_group('group_2'))
+        # Searching a group does not build the index
+        self.assertEqual(len(get_all_main(h5file['group_1'],
+                                          build_index=True)), 1)
+        self.assertFalse(NSID_INDEX_NAME in h5file)
+
+        self.assertEqual(len(get_all_main(h5file, build_index=True)), 3)
+        h5_index = h5file[NSID_INDEX_NAME]
+        self.assertEqual([item.decode('utf-8') if isinstance(item, bytes)
+                          else item for item in h5_index[()]],
+                         ['/group_0/data/data', '/group_1/data/data',
+                          '/group_2/generic/generic'])
+        self.assertEqual(h5_index.attrs['tree_checksum'],
+                         get_tree_checksum(h5file))
+
+    def test_index_appended_by_write_nsid_dataset(self):
+        h5file = make_written_nsid_file()
+        write_main_index(h5file)
+        dset = Dataset.from_array(np.random.random((3, 4)), name='data')
+        with mock.patch('pyNSID.io.hdf_utils.write_main_index') as write:
+            write_nsid_dataset(dset, h5file.create_group('a_first'),
+                               main_data_name='data')
+            self.assertFalse(write.called)
+        h5_index = h5file[NSID_INDEX_NAME]
+        self.assertEqual(h5_index.shape, (3,))
+        self.assertEqual(h5_index.attrs['tree_checksum'],
+                         get_tree_checksum(h5file))
+        with mock.patch.object(h5py.Group, 'visititems') as visit_items:
+            dset_list = get_all_main(h5file)
+            self.assertFalse(visit_items.called)
+        # Same order as a search of the file
+        self.assertEqual([dset.name for dset in dset_list],
+                         ['/a_first/data/data', '/group_0/data/data',
+                          '/group_1/data/data'])
+
+    def test_index_written_by_write_results(self):
+        h5file = make_written_nsid_file()
+        write_main_index(h5file)
+        dsets = [Dataset.from_array(np.random.random((2, 5)), name='fit_'
+                                    + str(ind)) for ind in range(2)]
+        h5_log = write_results(h5file['group_0'], dataset=dsets,
+                               process_name='Fit')
+        self.assertEqual(h5file[NSID_INDEX_NAME].attrs['tree_checksum'],
+                         get_tree_checksum(h5file))
+        expected = get_all_main(h5file, use_index=False)
+        self.assertEqual(len(expected), 4)
+        with mock.patch.object(h5py.Group, 'visititems') as visit_items:
+            self.assertEqual([dset.name for dset in get_all_main(h5file)],
+                             [dset.name for dset in expected])
+            self.assertFalse(visit_items.called)
+        self.assertEqual(len(get_all_main(h5_log)), 2)
+
+    def test_valid_index_skips_walk(self):
+        h5file = make_written_nsid_file()
+        write_main_index(h5file)
+        with mock.patch.object(h5py.Group, 'visititems') as visit_items:
+            dset_list = get_all_main(h5file)
+            self.assertFalse(visit_items.called)
+        self.assertEqual([dset.name for dset in dset_list],
+                         ['/group_0/data/data', '/group_1/data/data'])
+        # Groups are searched without the index or its checksum
+        with mock.patch('pyNSID.io.hdf_utils.get_tree_checksum') as checksum:
+            dset_list = get_all_main(h5file['group_1'])
+            self.assertFalse(checksum.called)
+        self.assertEqual([dset.name for dset in dset_list],
+                         ['/group_1/data/data'])
+
+    def test_read_only_file_not_indexed(self):
+        h5file = make_written_nsid_file()
+        file_path = h5file.filename
+        h5file.close()
+        with h5py.File(file_path, mode='r') as h5file:
+            self.assertEqual(len(get_all_main(h5file, build_index=True)), 2)
+            self.assertFalse(NSID_INDEX_NAME in h5file)
+        os.remove(file_path)
+
+    def test_link_as_main_updates_index(self):
+        h5file = make_written_nsid_file()
+        h5_group = h5file.create_group('raw')
+        h5_dset = h5_group.create_dataset('m', data=np.zeros((2, 3)))
+        dims = {}
+        for ind, name in enumerate(['a', 'b']):
+            dims[ind] = h5_group.create_dataset(name,
+                                                data=np.arange(h5_dset.shape[ind]))
+            write_simple_attrs(dims[ind],
+                               {'name': name, 'units': 'u', 'quantity': 'q',
+                                'dimension_type': 'UNKNOWN'})
+        write_simple_attrs(h5_dset, {'quantity': 'q', 'units': 'u',
+                                     'main_data_name': 'm',
+                                     'pyNSID_version': 'test',
+                                     'data_type': 'UNKNOWN',
+                                     'modality': 'm', 'source': 's'})
+        # Index built before the dataset becomes main in place
+        write_main_index(h5file)
+        self.assertEqual(len(get_all_main(h5file)), 2)
+        link_as_main(h5_dset, dims)
+        self.assertEqual([dset.name for dset in get_all_main(h5file)],
+                         [dset.name for dset in
+                          get_all_main(h5file, use_index=False)])
+        self.assertTrue('/raw/m' in [dset.name for dset in
+                                     get_all_main(h5file)])
+
+    def test_stale_index_falls_back_to_walk(self):
+        h5file = make_written_nsid_file()
+        write_main_index(h5file)
+        # Main dataset written by something other than pyNSID
+        h5_group = h5file.create_group('other')
+        for name in ['a', 'b']:
+            h5_group.create_dataset(name, data=np.arange(3))
+        h5_dset = h5_group.create_dataset('main', data=np.zeros((3, 3)))
+        write_simple_attrs(h5_dset, {'quantity': 'q', 'units': 'u',
+                                     'main_data_name': 'main',
+                                     'pyNSID_version': 'test',
+                                     'data_type': 'UNKNOWN',
+                                     'modality': 'm', 'source': 's'})
+        for ind, name in enumerate(['a', 'b']):
+            write_simple_attrs(h5_group[name],
+                               {'name': name, 'units': 'u', 'quantity': 'q',
+                                'dimension_type': 'UNKNOWN'})
+            h5_group[name].make_scale(name)
+            h5_dset.dims[ind].label = name
+            h5_dset.dims[ind].attach_scale(h5_group[name])
+        with mock.patch.object(h5py.Group, 'visititems',
+                               wraps=h5file.visititems) as visit_items:
+            dset_list = get_all_main(h5file)
+            self.assertTrue(visit_items.called)
+        self.assertEqual(len(dset_list), 3)
+
+        write_main_index(h5file)
+        with mock.patch.object(h5py.Group, 'visititems') as visit_items:
+            self.assertEqual(len(get_all_main(h5file)), 3)
+            self.assertFalse(visit_items.called)
+
+    def test_deleted_main_dataset_invalidates_index(self):
+        h5file = make_written_nsid_file()
+        write_main_index(h5file)
+        del h5file['group_0']
+        dset_list = get_all_main(h5file)
+        self.assertEqual([dset.name for dset in dset_list],
+                         ['/group_1/data/data'])
+
     def tearDown(self, fname: str = 'test.h5') -> None:
         if os.path.exists(fname):
             os.remove(fname)
 
 
+class TestReadNsidAttrs(unittest.TestCase):
+
+    def test_invalid_input(self):
+        with self.assertRaises(TypeError):
+            _ = read_nsid_attrs(np.arange(3))
+
+    def test_all_attrs_read(self):
+        h5file = make_simple_nsid_dataset({'units': 'nA'})
+        h5_group = h5file['MyGroup']
+        h5_group.create_group('metadata').attrs['key'] = 'val'
+        nsid_attrs = read_nsid_attrs(h5_group['data'])
+        self.assertEqual(nsid_attrs['attrs']['units'], 'nA')
+        self.assertEqual(len(nsid_attrs['dimensions']), 2)
+        h5_dim, label, dim_attrs = nsid_attrs['dimensions'][1]
+        self.assertEqual(h5_dim, h5_group['b0'])
+        self.assertEqual(label, 'b0')
+        self.assertEqual(dim_attrs['units'], 'units')
+        self.assertEqual(nsid_attrs['groups'], {'metadata': {'key': 'val'}})
+        h5file.close()
+
+    def test_no_scale_attached(self):
+        h5file = make_nsid_dataset_no_dim_attached()
+        nsid_attrs = read_nsid_attrs(h5file['MyGroup']['data'])
+        self.assertEqual([item[0] for item in nsid_attrs['dimensions']],
+                         [None, None])
+        h5file.close()
+
+
+def make_shared_dims_file(num_dsets=3):
+    """
+    h5 file with several NSID main datasets that share dimension scales
+    """
+    h5_file = make_simple_nsid_dataset()
+    h5_group = h5_file['MyGroup']
+    h5_main = h5_group['data']
+    for ind in range(1, num_dsets):
+        h5_dset = h5_group.create_dataset('data{}'.format(ind),
+                                          data=np.random.normal(size=(2, 3)))
+        for key, val in h5_main.attrs.items():
+            if key != 'DIMENSION_LIST':
+                h5_dset.attrs[key] = val
+        for dim, name in enumerate(['a0', 'b0']):
+            h5_dset.dims[dim].label = name
+            h5_dset.dims[dim].attach_scale(h5_group[name])
+    return h5_file
+
+
+class TestDimensionCache(unittest.TestCase):
+
+    def test_invalid_inputs(self):
+        with self.assertRaises(ValueError):
+            _ = DimensionCache(max_size=0)
+        h5_file = make_simple_nsid_dataset()
+        with self.assertRaises(TypeError):
+            DimensionCache().put(h5_file['MyGroup']['a0'], np.arange(2))
+        h5_file.close()
+
+    def test_shared_scales_read_once(self):
+        h5_file = make_shared_dims_file()
+        h5_group = h5_file['MyGroup']
+        orig_getitem = h5py.Dataset.__getitem__
+        scale_reads = []
+
+        def _getitem(obj, *args, **kwargs):
+            if obj.name.split('/')[-1] in ['a0', 'b0']:
+                scale_reads.append(obj.name)
+            return orig_getitem(obj, *args, **kwargs)
+
+        dim_cache = DimensionCache()
+        with mock.patch.object(h5py.Dataset, '__getitem__', new=_getitem):
+            dsets = [read_h5py_dataset(h5_group[name], dim_cache=dim_cache)
+                     for name in ['data', 'data1', 'data2']]
+        self.assertEqual(sorted(scale_reads), ['/MyGroup/a0', '/MyGroup/b0'])
+        self.assertEqual(len(dim_cache), 2)
+        self.assertEqual(dim_cache.hits, 4)
+        for dset in dsets:
+            self.assertEqual(dset._axes[0].name, 'a0')
+            self.assertEqual(dset._axes[1].units, 'units')
+            self.assertTrue(np.allclose(dset._axes[1].values, np.arange(3)))
+        # Datasets do not share Dimension objects
+        self.assertIsNot(dsets[0]._axes[0], dsets[1]._axes[0])
+        h5_file.close()
+
+    def test_lru_eviction_and_resize(self):
+        h5_file = make_shared_dims_file()
+        h5_group = h5_file['MyGroup']
+        dim_cache = DimensionCache(max_size=1)
+        _ = read_h5py_dataset(h5_group['data'], dim_cache=dim_cache)
+        self.assertEqual(len(dim_cache), 1)
+        self.assertNotIn(h5_group['a0'], dim_cache)
+        self.assertIn(h5_group['b0'], dim_cache)
+        dim_cache.clear()
+        self.assertEqual(len(dim_cache), 0)
+
+        h5_dim = h5_file.create_dataset('resizable', data=np.arange(3),
+                                        maxshape=(None,))
+        dim_cache = DimensionCache()
+        dim_cache.put(h5_dim, Dimension(np.arange(3), 'x'))
+        self.assertIn(h5_dim, dim_cache)
+        h5_dim.resize((5,))
+        self.assertNotIn(h5_dim, dim_cache)
+        self.assertIsNone(dim_cache.get(h5_dim))
+        h5_file.close()
+
+
+class TestGetRegionSlices(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.h5file = make_simple_nsid_dataset(dsetshapes=[(40, 30)])
+        self.h5_dset = self.h5file['MyGroup']['data']
+
+    def tearDown(self) -> None:
+        self.h5file.close()
+
+    def test_slices_and_ints(self):
+        slices = get_region_slices(self.h5_dset, (slice(None, 10, 2), -1))
+        self.assertEqual(slices, (slice(0, 10, 2), slice(29, 30, 1)))
+        slices = get_region_slices(self.h5_dset, slice(5, None))
+        self.assertEqual(slices, (slice(5, 40, 1), slice(0, 30, 1)))
+
+    def test_value_ranges_by_name_and_index(self):
+        slices = get_region_slices(self.h5_dset, {'b0': (12.5, 5)})
+        self.assertEqual(slices, (slice(0, 40, 1), slice(5, 13, 1)))
+        slices = get_region_slices(self.h5_dset, {0: (3, 5), 1: None})
+        self.assertEqual(slices, (slice(3, 6, 1), slice(0, 30, 1)))
+
+    def test_invalid_regions(self):
+        with self.assertRaises(TypeError):
+            _ = get_region_slices(np.zeros((3, 4)), (slice(1, 2),))
+        with self.assertRaises(TypeError):
+            _ = get_region_slices(self.h5_dset, 'a0')
+        with self.assertRaises(ValueError):
+            _ = get_region_slices(self.h5_dset, (1, 2, 3))
+        with self.assertRaises(KeyError):
+            _ = get_region_slices(self.h5_dset, {'energy': (1, 2)})
+        with self.assertRaises(IndexError):
+            _ = get_region_slices(self.h5_dset, (40,))
+        with self.assertRaises(ValueError):
+            _ = get_region_slices(self.h5_dset, {1: (100, 200)})
+        with self.assertRaises(ValueError):
+            _ = get_region_slices(self.h5_dset, (slice(None, None, -1),))
+        with self.assertRaises(ValueError):
+            _ = get_region_slices(self.h5_dset, (slice(5, 5),))
+
+
+class TestMemmap(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'memmap.h5')
+        self.h5_file = h5py.File(self.file_path, mode='w')
+        self.data = np.random.random((20, 7)).astype('>f4')
+        self.h5_main = write_nsid_dataset(
+            Dataset.from_array(self.data, name='Image'),
+            self.h5_file.create_group('Measurement'), chunks=None)
+
+    def tearDown(self) -> None:
+        self.h5_file.close()
+        os.remove(self.file_path)
+        os.rmdir(self.tmp_dir)
+
+    def test_get_memmap(self):
+        self.assertIsNone(self.h5_main.chunks)
+        mem_map = get_memmap(self.h5_main)
+        self.assertIsInstance(mem_map, np.memmap)
+        self.assertEqual(mem_map.dtype, np.dtype('>f4'))
+        self.assertFalse(mem_map.flags.writeable)
+        self.assertTrue(np.array_equal(mem_map, self.data))
+
+    def test_read_memmap(self):
+        dataset = read_h5py_dataset(self.h5_main, memmap=True)
+        self.assertTrue(np.array_equal(dataset.compute(), self.data))
+        self.assertEqual(dataset._axes[0].name, self.h5_main.dims[0].label)
+        # Slices of a single dask chunk are views into the map
+        self.assertIsInstance(dataset[2:5].compute(), np.memmap)
+
+        dataset = read_h5py_dataset(self.h5_main, memmap=True,
+                                    region=(slice(3, 9), slice(1, 4)))
+        self.assertTrue(np.array_equal(dataset.compute(),
+                                       self.data[3:9, 1:4]))
+        self.assertEqual(len(dataset._axes[0].values), 6)
+
+        dataset = read_h5py_dataset(self.h5_main, memmap=True, chunks=(5, 7))
+        self.assertEqual(dataset.chunks, ((5,) * 4, (7,)))
+        self.assertTrue(np.array_equal(dataset.compute(), self.data))
+
+    def test_not_mappable(self):
+        h5_group = self.h5_file['Measurement']
+        for name, kwargs in [('Chunked', {'chunks': (5, 7)}),
+                             ('Compressed', {'compression': 'gzip'})]:
+            h5_dset = write_nsid_dataset(
+                Dataset.from_array(self.data, name=name), h5_group,
+                **kwargs)
+            self.assertIsNone(get_memmap(h5_dset))
+            # Falls back to reading via HDF5
+            dataset = read_h5py_dataset(h5_dset, memmap=True)
+            self.assertTrue(np.array_equal(dataset, self.data))
+        h5_empty = h5_group.create_dataset('empty', shape=(4, 5))
+        self.assertIsNone(get_memmap(h5_empty))
+        h5_str = h5_group.create_dataset('strings', data=['a', 'bc'],
+                                         dtype=h5py.string_dtype())
+        self.assertIsNone(get_memmap(h5_str))
+        with h5py.File('in_memory.h5', mode='w', driver='core',
+                       backing_store=False) as h5_mem:
+            self.assertIsNone(get_memmap(h5_mem.create_dataset(
+                'x', data=np.arange(4))))
+        with self.assertRaises(TypeError):
+            _ = get_memmap(h5_group)
+
+
+def make_spectral_image(shape=(64, 48, 256), chunks='auto',
+                        dtype=np.float32):
+    dset = Dataset.from_array(np.zeros(shape, dtype=dtype), chunks=chunks)
+    for ind, (name, dim_type) in enumerate([('x', 'spatial'),
+                                            ('y', 'spatial'),
+                                            ('e', 'spectral')]):
+        dset.set_dimension(ind, Dimension(np.arange(shape[ind]), name,
+                                          dimension_type=dim_type))
+    return dset
+
+
+class TestGetH5Chunks(unittest.TestCase):
+
+    def test_invalid_inputs(self):
+        with self.assertRaises(TypeError):
+            _ = get_h5_chunks(np.zeros((3, 4)))
+        with self.assertRaises(ValueError):
+            _ = get_h5_chunks(make_spectral_image(), access_pattern='rows')
+        with self.assertRaises(ValueError):
+            _ = get_h5_chunks(make_spectral_image(), target_bytes=0)
+
+    def test_image(self):
+        chunks = get_h5_chunks(make_spectral_image(), access_pattern='image',
+                               target_bytes=64 * 48 * 4 * 8)
+        self.assertEqual(chunks, (64, 48, 8))
+
+    def test_spectrum(self):
+        chunks = get_h5_chunks(make_spectral_image(),
+                               access_pattern='spectrum',
+                               target_bytes=256 * 4 * 16)
+        self.assertEqual(chunks, (1, 16, 256))
+
+    def test_balanced_within_target(self):
+        chunks = get_h5_chunks(make_spectral_image(),
+                               access_pattern='balanced',
+                               target_bytes=32 * 1024)
+        self.assertLessEqual(np.prod(chunks) * 4, 32 * 1024)
+        self.assertGreater(np.prod(chunks) * 4, 32 * 1024 / 8)
+        self.assertTrue(max(chunks) / min(chunks) <= 4)
+
+    def test_large_dims_split_to_fit_target(self):
+        chunks = get_h5_chunks(make_spectral_image(shape=(512, 512, 8)),
+                               access_pattern='image', target_bytes=4096)
+        self.assertLessEqual(np.prod(chunks) * 4, 4096)
+        self.assertEqual(chunks[-1], 1)
+
+    def test_no_matching_dims_falls_back_to_balanced(self):
+        dset = Dataset.from_array(np.zeros((64, 64)))
+        self.assertEqual(get_h5_chunks(dset, access_pattern='image',
+                                       target_bytes=1024),
+                         get_h5_chunks(dset, access_pattern='balanced',
+                                       target_bytes=1024))
+
+    def test_aligned_with_dask_chunks(self):
+        dset = make_spectral_image(chunks=(16, 16, 256))
+        for pattern in ['image', 'spectrum', 'balanced']:
+            chunks = get_h5_chunks(dset, access_pattern=pattern,
+                                   target_bytes=16 * 1024)
+            for h5_chunk, dask_chunk, length in zip(chunks, dset.chunksize,
+                                                    dset.shape):
+                self.assertTrue(h5_chunk == length or
+                                h5_chunk % dask_chunk == 0 or
+                                dask_chunk % h5_chunk == 0)
+
+
 class TestFindDataset(unittest.TestCase):
     # This function inherits a good portion of the code from sidpy.
     # We don't yet have the functionality to upconvert to sidpy.Dataset yet
@@ -349,6 +894,76 @@ class TestCheckIfMain(unittest.TestCase):
     def test_dset_is_main(self):
         self.assertTrue(check_if_main(self.h5_nsid_simple['MyGroup']['data']))
 
+    def test_truthiness_of_result(self):
+        # Callers of the former bool return value test the truthiness
+        self.assertIs(bool(check_if_main(
+            self.h5_nsid_simple['MyGroup']['data'])), True)
+        self.assertIs(bool(check_if_main(
+            self.h5_simple_file['MyGroup']['data'])), False)
+        self.assertIs(bool(check_if_main(np.arange(3))), False)
+
+    def test_report_for_main(self):
+        report = validate_main(self.h5_nsid_simple['MyGroup']['data'])
+        self.assertIsInstance(report, MainValidationReport)
+        self.assertTrue(report.is_main)
+        self.assertIsNone(report.failed_check)
+        self.assertEqual(report.to_dict()['name'], '/MyGroup/data')
+
+    def test_report_failed_checks(self):
+        expected = [(np.arange(3), 'type'),
+                    (self.h5_simple_file['MyGroup']['data'], 'attributes'),
+                    (make_nsid_length_dim_wrong()['MyGroup']['data'],
+                     'attributes')]
+        for obj, failed_check in expected:
+            report = validate_main(obj)
+            self.assertFalse(report)
+            self.assertEqual(report.failed_check, failed_check)
+
+        h5_dset = self.h5_nsid_simple['MyGroup']['data']
+        h5_dset.attrs['units'] = 1
+        self.assertEqual(validate_main(h5_dset).failed_check,
+                         'attribute_type')
+        h5_dset.attrs['units'] = 'units'
+
+        h5_dim = self.h5_nsid_simple['MyGroup']['b0']
+        del h5_dim.attrs['quantity']
+        report = validate_main(h5_dset)
+        self.assertEqual(report.failed_check, 'dimension_attributes')
+        self.assertEqual(report.dimension, 1)
+
+    def test_dim_not_attached_report(self):
+        h5_file = make_simple_nsid_dataset()
+        h5_dset = h5_file['MyGroup']['data']
+        h5_dset.dims[0].detach_scale(h5_file['MyGroup']['a0'])
+        report = validate_main(h5_dset)
+        self.assertEqual(report.failed_check, 'dimensions')
+        self.assertEqual(report.dimension, 0)
+
+    def test_dim_length_wrong_report(self):
+        h5_file = make_simple_nsid_dataset()
+        h5_group = h5_file['MyGroup']
+        h5_dset = h5_group['data']
+        h5_dset.dims[1].detach_scale(h5_group['b0'])
+        h5_wrong = h5_group.create_dataset('wrong', data=np.arange(7))
+        h5_wrong.make_scale('wrong')
+        h5_dset.dims[1].attach_scale(h5_wrong)
+        report = validate_main(h5_dset)
+        self.assertEqual(report.failed_check, 'dimension_shape')
+        self.assertEqual(report.dimension, 1)
+
+    def test_dimension_values_not_read(self):
+        h5_dset = self.h5_nsid_simple['MyGroup']['data']
+        with mock.patch.object(h5py.Dataset, '__getitem__') as getitem:
+            with mock.patch.object(h5py.Dataset, '__array__') as to_array:
+                self.assertTrue(check_if_main(h5_dset))
+                self.assertFalse(getitem.called)
+                self.assertFalse(to_array.called)
+
+    def test_no_print_on_failure(self):
+        with mock.patch('builtins.print') as mock_print:
+            check_if_main(make_nsid_length_dim_wrong()['MyGroup']['data'])
+            self.assertFalse(mock_print.called)
+
 
 class TestLinkAsMain(unittest.TestCase):
     # Perhaps this function could call the validate function
@@ -0,0 +1,178 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import json
+import sys
+import unittest
+import h5py
+import numpy as np
+import sidpy
+
+sys.path.append("../pyNSID/")
+
+from pyNSID.io import instrumentation
+from pyNSID.io.instrumentation import IOStats, record_call, count_chunks, \
+    register_io_callback, unregister_io_callback
+from pyNSID.io.hdf_io import write_nsid_dataset
+from pyNSID.io.hdf_utils import read_h5py_dataset, get_all_main, \
+    check_if_main
+
+
+def make_in_memory_file():
+    return h5py.File('instrumentation.h5', mode='w', driver='core',
+                     backing_store=False)
+
+
+def write_image(h5_group, chunks=(10, 16)):
+    dataset = sidpy.Dataset.from_array(np.random.random((40, 16)),
+                                       name='Image')
+    dataset.metadata = {'instrument': 'microscope'}
+    return write_nsid_dataset(dataset, h5_group, chunks=chunks)
+
+
+class TestIOStats(unittest.TestCase):
+
+    def setUp(self):
+        self.h5_file = make_in_memory_file()
+
+    def tearDown(self):
+        self.h5_file.close()
+
+    def test_disabled_by_default(self):
+        call = record_call('read_h5py_dataset')
+        self.assertFalse(call)
+        with call.phase('data'):
+            call.add(bytes_read=10)
+
+    def test_write_and_read_recorded(self):
+        with IOStats() as stats:
+            h5_main = write_image(self.h5_file.create_group('Measurement'))
+            _ = read_h5py_dataset(h5_main)
+        self.assertFalse(record_call('read_h5py_dataset'))
+
+        write, read = [record for record in stats.calls
+                       if record['depth'] == 0]
+        self.assertEqual(write['function'], 'write_nsid_dataset')
+        self.assertEqual(write['target'], '/Measurement')
+        self.assertEqual(write['bytes_written'], 40 * 16 * 8)
+        self.assertEqual(write['chunks_touched'], 4)
+        self.assertEqual(set(write['phases']),
+                         {'validation', 'metadata', 'data', 'index'})
+        self.assertIsNone(write['error'])
+
+        self.assertEqual(read['function'], 'read_h5py_dataset')
+        self.assertEqual(read['target'], h5_main.name)
+        # Main data, dimension values
+        self.assertEqual(read['bytes_read'], 40 * 16 * 8 + 40 * 8 + 16 * 8)
+        self.assertEqual(read['chunks_touched'], 4)
+        # Main dataset, 2 dimension scales, metadata group
+        self.assertEqual(read['objects_visited'], 4)
+        self.assertEqual(set(read['phases']),
+                         {'validation', 'data', 'metadata'})
+
+        # Validation calls made by the writer and reader
+        nested = [record for record in stats.calls if record['depth'] > 0]
+        self.assertGreater(len(nested), 0)
+        self.assertEqual(set([record['function'] for record in nested]),
+                         {'check_if_main'})
+
+    def test_region_and_lazy_reads(self):
+        h5_main = write_image(self.h5_file)
+        with IOStats() as stats:
+            _ = read_h5py_dataset(h5_main, region=[slice(12, 25)])
+            _ = read_h5py_dataset(h5_main, lazy=True)
+        region, lazy = [record for record in stats.calls
+                        if record['function'] == 'read_h5py_dataset']
+        self.assertEqual(region['chunks_touched'], 2)
+        self.assertEqual(region['bytes_read'], 13 * 16 * 8 + 40 * 8 + 16 * 8)
+        self.assertEqual(lazy['chunks_touched'], 0)
+
+    def test_get_all_main_and_check_if_main(self):
+        h5_main = write_image(self.h5_file.create_group('Measurement'))
+        with IOStats() as stats:
+            self.assertEqual(len(get_all_main(self.h5_file,
+                                              build_index=True)), 1)
+            self.assertEqual(len(get_all_main(self.h5_file)), 1)
+            self.assertEqual(len(get_all_main(self.h5_file,
+                                              use_index=False)), 1)
+            self.assertFalse(check_if_main(self.h5_file['Measurement']))
+        summary = stats.summary()
+        self.assertEqual(summary['get_all_main']['num_calls'], 3)
+        built, indexed, walked = [record for record in stats.calls
+                                  if record['function'] == 'get_all_main'
+                                  and record['depth'] == 0]
+        self.assertEqual(set(built['phases']), {'index', 'walk'})
+        self.assertEqual(list(indexed['phases']), ['index'])
+        self.assertEqual(indexed['objects_visited'], 2)
+        self.assertEqual(list(walked['phases']), ['walk'])
+        # Contents of the group of the main dataset, the group itself, the
+        # Measurement group and the index of main datasets
+        self.assertEqual(walked['objects_visited'],
+                         len(h5_main.parent) + 3)
+        failed = stats.calls[-1]
+        self.assertEqual(failed['function'], 'check_if_main')
+        self.assertEqual(failed['depth'], 0)
+        self.assertEqual(failed['objects_visited'], 0)
+
+    def test_error_recorded(self):
+        with IOStats() as stats:
+            with self.assertRaises(TypeError):
+                read_h5py_dataset(self.h5_file.create_dataset('x', data=[1]))
+        self.assertEqual(stats.calls[-1]['function'], 'read_h5py_dataset')
+        self.assertEqual(stats.calls[-1]['error'], 'TypeError')
+
+    def test_export(self):
+        with IOStats() as stats:
+            write_image(self.h5_file)
+        self.assertEqual(len(stats), len(stats.calls))
+        exported = json.loads(stats.to_json())
+        self.assertEqual(exported, stats.to_dict())
+        self.assertEqual(exported['summary']['write_nsid_dataset']
+                         ['num_calls'], 1)
+        stats.clear()
+        self.assertEqual(stats.to_dict(), {'calls': [], 'summary': {}})
+
+    def test_unknown_counter(self):
+        with IOStats():
+            with record_call('custom') as call:
+                with self.assertRaises(KeyError):
+                    call.add(bytes_copied=1)
+
+
+class TestIOCallbacks(unittest.TestCase):
+
+    def test_register_and_unregister(self):
+        records = []
+        register_io_callback(records.append)
+        register_io_callback(records.append)
+        try:
+            with make_in_memory_file() as h5_file:
+                write_image(h5_file)
+        finally:
+            unregister_io_callback(records.append)
+        self.assertEqual(len([record for record in records
+                              if record['depth'] == 0]), 1)
+        self.assertEqual(instrumentation._CALLBACKS, [])
+        with self.assertRaises(ValueError):
+            unregister_io_callback(records.append)
+        with self.assertRaises(TypeError):
+            register_io_callback('not callable')
+
+
+class TestCountChunks(unittest.TestCase):
+
+    def test_chunks(self):
+        with make_in_memory_file() as h5_file:
+            h5_dset = h5_file.create_dataset('x', shape=(10, 9),
+                                             chunks=(4, 3))
+            self.assertEqual(count_chunks(h5_dset), 9)
+            self.assertEqual(count_chunks(h5_dset, (slice(3, 5),
+                                                    slice(0, 3))), 2)
+            self.assertEqual(count_chunks(h5_dset, (slice(5, 5),
+                                                    slice(None))), 0)
+            h5_contig = h5_file.create_dataset('y', shape=(10, 9))
+            self.assertEqual(count_chunks(h5_contig), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
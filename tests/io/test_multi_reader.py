@@ -0,0 +1,118 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os
+import sys
+import shutil
+import unittest
+import tempfile
+import h5py
+import numpy as np
+from sidpy import Dataset, Dimension
+
+sys.path.append("../pyNSID/")
+
+from pyNSID.io.hdf_io import write_nsid_dataset
+from pyNSID.io.multi_reader import read_nsid_files
+
+
+def write_nsid_file(file_path, shapes):
+    with h5py.File(file_path, 'w') as h5_file:
+        for ind, shape in enumerate(shapes):
+            h5_group = h5_file.create_group('group_{}'.format(ind))
+            dset = Dataset.from_array(np.random.random(shape), name='new')
+            for dim, length in enumerate(shape):
+                dset.set_dimension(dim, Dimension(np.arange(length),
+                                                  'dim_{}'.format(dim)))
+            dset.metadata = {'index': ind}
+            write_nsid_dataset(dset, h5_group, main_data_name='dset')
+
+
+class TestReadNsidFiles(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.mkdtemp()
+        self.paths = []
+        for ind in range(4):
+            path = os.path.join(self.tmp_dir, 'file_{}.h5'.format(ind))
+            write_nsid_file(path, [(3, 4 + ind)] * (ind % 2 + 1))
+            self.paths.append(path)
+        self.bad_path = os.path.join(self.tmp_dir, 'not_hdf5.h5')
+        with open(self.bad_path, 'w') as file_handle:
+            file_handle.write('not a HDF5 file')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def __validate(self, datasets, paths):
+        self.assertEqual(len(datasets), len(paths))
+        for ind, dsets in enumerate(datasets):
+            self.assertEqual(len(dsets), ind % 2 + 1)
+            for dset in dsets:
+                self.assertIsInstance(dset, Dataset)
+                self.assertEqual(dset.shape, (3, 4 + ind))
+                self.assertEqual(dset._axes[1].name, 'dim_1')
+                self.assertEqual(dset.h5_filename, paths[ind])
+
+    def test_threads_stable_order(self):
+        datasets, errors = read_nsid_files(self.paths, max_workers=3)
+        self.assertEqual(errors, {})
+        self.__validate(datasets, self.paths)
+        # Files are closed once the data are in memory
+        for dsets in datasets:
+            for dset in dsets:
+                self.assertFalse(dset.h5_dataset.id.valid)
+        self.assertEqual(datasets[0][0].h5_dataset_name,
+                         '/group_0/dset/dset')
+        with h5py.File(self.paths[0], 'r') as h5_file:
+            expected = h5_file['group_0/dset/dset'][()]
+        self.assertTrue(np.allclose(datasets[0][0].compute(), expected))
+
+    def test_threads_lazy(self):
+        datasets, errors = read_nsid_files(self.paths, lazy=True)
+        self.assertEqual(errors, {})
+        self.__validate(datasets, self.paths)
+        h5_dset = datasets[2][0].h5_dataset
+        self.assertTrue(h5_dset.id.valid)
+        self.assertTrue(np.allclose(datasets[2][0].compute(), h5_dset[()]))
+        # Left to the caller to close
+        for dsets in datasets:
+            dsets[0].h5_dataset.file.close()
+        self.assertFalse(h5_dset.id.valid)
+
+    def test_processes(self):
+        datasets, errors = read_nsid_files(self.paths, executor='process',
+                                           max_workers=2)
+        self.assertEqual(errors, {})
+        self.__validate(datasets, self.paths)
+        with h5py.File(self.paths[1], 'r') as h5_file:
+            expected = h5_file['group_0/dset/dset'][()]
+        self.assertTrue(np.allclose(datasets[1][0].compute(), expected))
+        self.assertEqual(datasets[1][0].metadata, {'index': 0})
+
+    def test_glob(self):
+        datasets, errors = read_nsid_files(os.path.join(self.tmp_dir,
+                                                        'file_*.h5'))
+        self.assertEqual(errors, {})
+        self.__validate(datasets, self.paths)
+
+    def test_errors_collected(self):
+        for executor in ['thread', 'process']:
+            paths = self.paths[:2] + [self.bad_path] + self.paths[2:]
+            datasets, errors = read_nsid_files(paths, executor=executor)
+            self.assertEqual(list(errors.keys()), [self.bad_path])
+            self.assertIsInstance(errors[self.bad_path], OSError)
+            self.assertIsNone(datasets[2])
+            self.__validate(datasets[:2] + datasets[3:], self.paths)
+
+    def test_invalid_inputs(self):
+        with self.assertRaises(TypeError):
+            _ = read_nsid_files(5)
+        with self.assertRaises(ValueError):
+            _ = read_nsid_files(self.paths, executor='gpu')
+        with self.assertRaises(ValueError):
+            _ = read_nsid_files(self.paths, lazy=True, executor='process')
+
+
+if __name__ == '__main__':
+    unittest.main()
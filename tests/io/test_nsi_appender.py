@@ -0,0 +1,88 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os
+import sys
+import unittest
+import h5py
+import numpy as np
+from sidpy import Dimension
+
+sys.path.append("../pyNSID/")
+
+from pyNSID.io.hdf_utils import check_if_main, read_h5py_dataset
+from pyNSID.io.nsi_appender import NSIDAppender
+
+
+class TestNSIDAppender(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.file_path = 'test_appender.h5'
+        self.h5_file = h5py.File(self.file_path, mode='w')
+
+    def tearDown(self) -> None:
+        self.h5_file.close()
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+
+    def test_append_frames_and_batches(self):
+        frames = np.random.random((7, 3, 4))
+        appender = NSIDAppender(self.h5_file, (3, 4), 'frames',
+                                frames_per_chunk=2)
+        self.assertIsNone(appender.h5_dataset)
+        self.assertEqual(appender.append(frames[0]), 1)
+        self.assertEqual(appender.append(frames[1:3]), 3)
+        # Space is reserved for more frames until flushed
+        self.assertEqual(appender.h5_dataset.shape, (4, 3, 4))
+        appender.flush()
+        self.assertEqual(appender.h5_dataset.shape, (3, 3, 4))
+        self.assertTrue(check_if_main(appender.h5_dataset))
+        appender.append(frames[3:])
+        appender.flush()
+        self.assertEqual(len(appender), 7)
+        self.assertTrue(np.allclose(appender.h5_dataset[()], frames))
+        self.assertTrue(np.allclose(self.h5_file['frames/frame'][()],
+                                    np.arange(7)))
+        self.assertTrue(check_if_main(appender.h5_dataset))
+
+    def test_dimensions_and_axis_values(self):
+        lead = Dimension(np.arange(1), 'time', units='s',
+                         dimension_type='temporal')
+        dims = [Dimension(np.linspace(0, 1, 5), 'bias', units='V',
+                          dimension_type='spectral')]
+        with NSIDAppender(self.h5_file, (5,), 'spectra', dtype=np.float32,
+                          leading_dimension=lead, dimensions=dims,
+                          compression_profile='balanced') as appender:
+            for ind in range(10):
+                appender.append(np.ones(5) * ind, axis_values=0.5 * ind)
+        h5_main = appender.h5_dataset
+        self.assertEqual(h5_main.dtype, np.float32)
+        self.assertEqual(h5_main.compression, 'gzip')
+        dataset = read_h5py_dataset(h5_main)
+        self.assertEqual(dataset.shape, (10, 5))
+        self.assertEqual(dataset._axes[0].name, 'time')
+        self.assertEqual(dataset._axes[0].units, 's')
+        self.assertTrue(np.allclose(dataset._axes[0].values,
+                                    0.5 * np.arange(10)))
+        self.assertTrue(np.allclose(dataset._axes[1].values,
+                                    np.linspace(0, 1, 5)))
+
+    def test_invalid_inputs(self):
+        with self.assertRaises(TypeError):
+            _ = NSIDAppender(np.arange(3), (3, 4))
+        with self.assertRaises(ValueError):
+            _ = NSIDAppender(self.h5_file, (3, -4))
+        with self.assertRaises(ValueError):
+            _ = NSIDAppender(self.h5_file, (3, 4),
+                             dimensions=[Dimension(np.arange(3), 'x')])
+        with self.assertRaises(ValueError):
+            _ = NSIDAppender(self.h5_file, (3, 4), growth_factor=1)
+        appender = NSIDAppender(self.h5_file, (3, 4))
+        with self.assertRaises(ValueError):
+            appender.append(np.zeros((2, 4, 3)))
+        with self.assertRaises(ValueError):
+            appender.append(np.zeros((2, 3, 4)), axis_values=[1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
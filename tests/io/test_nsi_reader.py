@@ -4,6 +4,7 @@ from __future__ import (absolute_import, division, print_function,
 import os
 import sys
 import unittest
+from unittest import mock
 import tempfile
 from typing import Type, Tuple
 import h5py
@@ -13,7 +14,7 @@ from sidpy import Dataset, Dimension
 sys.path.append("../pyNSID/")
 
 from pyNSID.io.hdf_io import write_nsid_dataset
-from pyNSID.io.hdf_utils import find_dataset
+from pyNSID.io.hdf_utils import find_dataset, get_all_main
 from pyNSID.io.nsi_reader import NSIDReader
 
 
@@ -128,6 +129,57 @@ class TestNsidReaderMultipleDatasets(unittest.TestCase):
         pass
 
 
+class TestNsidReaderDeferredScan(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.hf_name = 'test_deferred.hdf5'
+        h5_group = create_h5group(self.hf_name, 'group')
+        for i in range(2):
+            write_dummy_dset(h5_group, (4, 5), 'dset{}'.format(i))
+        h5_group.file.close()
+
+    def tearDown(self) -> None:
+        if os.path.exists(self.hf_name):
+            os.remove(self.hf_name)
+
+    def test_read_only_by_default(self):
+        reader = NSIDReader(self.hf_name)
+        self.assertEqual(reader._h5_file.mode, 'r')
+        reader._h5_file.close()
+        reader = NSIDReader(self.hf_name, mode='r+')
+        self.assertEqual(reader._h5_file.mode, 'r+')
+        reader._h5_file.close()
+
+    def test_no_scan_when_reading_known_dataset(self):
+        with mock.patch('pyNSID.io.nsi_reader.get_all_main',
+                        wraps=get_all_main) as scan:
+            reader = NSIDReader(self.hf_name)
+            dset = reader.read(reader._h5_file['group/dset0/dset0'])
+            self.assertIsInstance(dset, Dataset)
+            self.assertFalse(scan.called)
+        reader._h5_file.close()
+
+    def test_scan_once_and_cached(self):
+        with mock.patch('pyNSID.io.nsi_reader.get_all_main',
+                        wraps=get_all_main) as scan:
+            reader = NSIDReader(self.hf_name)
+            self.assertTrue(reader.can_read())
+            self.assertEqual(len(reader.read_all()), 2)
+            self.assertEqual(len(reader.read()), 2)
+            self.assertEqual(scan.call_count, 1)
+        reader._h5_file.close()
+
+    def test_read_region(self):
+        reader = NSIDReader(self.hf_name)
+        h5_dset = reader._h5_file['group/dset0/dset0']
+        dset = reader.read(h5_dset, region={'1': (1, 2)})
+        self.assertEqual(dset.shape, (4, 2))
+        self.assertTrue(np.allclose(np.array(dset), h5_dset[:, 1:3]))
+        with self.assertRaises(ValueError):
+            _ = reader.read(reader._h5_file['group'], region=(0,))
+        reader._h5_file.close()
+
+
 class TestOldTests(unittest.TestCase):
 
     def test_can_read(self) -> None:
@@ -0,0 +1,258 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os
+import sys
+import unittest
+import h5py
+import numpy as np
+import sidpy
+from sidpy import Dimension
+
+sys.path.append("../pyNSID/")
+
+from pyNSID.io.hdf_io import write_nsid_dataset, write_results
+from pyNSID.io.hdf_utils import check_if_main, read_h5py_dataset
+from pyNSID.processing.process import Process, get_completed_rows, \
+    _merge_ranges
+
+
+def write_spectral_map(h5_group, shape=(6, 5, 16)):
+    data = np.random.random(shape)
+    dataset = sidpy.Dataset.from_array(data, name='Spectra')
+    for ind, (name, dim_type) in enumerate([('x', 'spatial'),
+                                            ('y', 'spatial'),
+                                            ('energy', 'spectral')]):
+        dataset.set_dimension(ind, Dimension(np.arange(shape[ind]), name,
+                                             units='nm',
+                                             dimension_type=dim_type))
+    return write_nsid_dataset(dataset, h5_group, chunks=(2, 5, 16)), data
+
+
+# Memory for two rows of the spectral map
+TWO_ROWS_MB = 2 * 5 * 16 * 8 / 1024 ** 2
+
+
+class PeakFinder(Process):
+    """
+    Finds the position and height of the peak of each spectrum
+    """
+
+    def _create_results_datasets(self):
+        return [self._get_results_placeholder('Peak_Index', dtype=np.int64),
+                self._get_results_placeholder('Peak_Height')]
+
+    @staticmethod
+    def _map_function(spectrum, offset=0):
+        return np.argmax(spectrum), spectrum.max() + offset
+
+
+class Normalizer(Process):
+    """
+    Normalizes all spectra of a chunk at once
+    """
+
+    def _create_results_datasets(self):
+        return self._get_results_placeholder(
+            'Normalized', result_shape=self.spec_shape,
+            dimensions=[self.dataset._axes[self.h5_main.ndim - 1]])
+
+    def _unit_computation(self, data):
+        return [data / data.max(axis=-1, keepdims=True)]
+
+
+class FlakyPeakFinder(PeakFinder):
+    """
+    Crashes upon reaching a given row and counts the computed chunks
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.crash_row = kwargs.pop('crash_row', None)
+        super(FlakyPeakFinder, self).__init__(*args, **kwargs)
+        self.computed = []
+
+    def _read_data_chunk(self, start, stop):
+        if self.crash_row is not None and start >= self.crash_row:
+            raise RuntimeError('Simulated crash')
+        self.computed.append((start, stop))
+        return super(FlakyPeakFinder, self)._read_data_chunk(start, stop)
+
+
+class TestProcess(unittest.TestCase):
+
+    def setUp(self):
+        self.file_path = 'test_process.h5'
+        self.h5_file = h5py.File(self.file_path, mode='w')
+        self.h5_main, self.data = write_spectral_map(
+            self.h5_file.create_group('Measurement'))
+
+    def tearDown(self):
+        self.h5_file.close()
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+
+    def __validate_peaks(self, h5_grp, offset=0):
+        self.assertTrue(h5_grp.name.startswith(
+            self.h5_main.parent.name + '/Log_PeakFinder_'))
+        h5_index = h5_grp['Peak_Index/Peak_Index']
+        h5_height = h5_grp['Peak_Height/Peak_Height']
+        self.assertTrue(check_if_main(h5_height))
+        self.assertEqual(h5_index.dtype, np.int64)
+        self.assertEqual(h5_height.shape, (6, 5))
+        self.assertTrue(np.allclose(h5_index[()],
+                                    np.argmax(self.data, axis=-1)))
+        self.assertTrue(np.allclose(h5_height[()],
+                                    self.data.max(axis=-1) + offset))
+        self.assertEqual(h5_grp.attrs['source_dataset'], self.h5_main.name)
+        results = read_h5py_dataset(h5_height)
+        self.assertEqual(results._axes[0].name, 'x')
+        self.assertEqual(results._axes[1].name, 'y')
+
+    def test_positions_and_chunks(self):
+        proc = PeakFinder(self.h5_main, max_mem_mb=1.5 * TWO_ROWS_MB)
+        self.assertEqual(proc.num_pos_dims, 2)
+        self.assertEqual(proc.pos_shape, (6, 5))
+        self.assertEqual(proc.spec_shape, (16,))
+        # Rounded down to the rows in each HDF5 chunk
+        self.assertEqual(proc.rows_per_chunk, 2)
+        self.assertEqual(proc._get_chunks(), [(0, 2), (2, 4), (4, 6)])
+        proc = PeakFinder(self.h5_main, num_pos_dims=1)
+        self.assertEqual(proc.spec_shape, (5, 16))
+        self.assertEqual(proc.rows_per_chunk, 6)
+
+    def test_compute_threads(self):
+        proc = PeakFinder(self.h5_main, parms_dict={'offset': 1}, cores=3,
+                          max_mem_mb=1E-3)
+        proc._map_kwargs = {'offset': 1}
+        h5_grp = proc.compute()
+        self.__validate_peaks(h5_grp, offset=1)
+        self.assertEqual(h5_grp.attrs['offset'], 1)
+
+    def test_compute_processes(self):
+        proc = PeakFinder(self.h5_main, cores=2, scheduler='processes')
+        self.__validate_peaks(proc.compute())
+
+    def test_compute_dask(self):
+        proc = PeakFinder(self.h5_main, cores=2, scheduler='dask',
+                          max_mem_mb=1E-3)
+        self.__validate_peaks(proc.compute())
+
+    def test_unit_computation(self):
+        h5_grp = Normalizer(self.h5_main, max_mem_mb=1E-3).compute()
+        h5_norm = h5_grp['Normalized/Normalized']
+        self.assertTrue(np.allclose(h5_norm[()], self.data /
+                                    self.data.max(axis=-1, keepdims=True)))
+        self.assertEqual(read_h5py_dataset(h5_norm)._axes[2].name, 'energy')
+
+    def test_resume_after_crash(self):
+        kwargs = {'process_name': 'PeakFinder', 'parms_dict': {'width': 3},
+                  'max_mem_mb': TWO_ROWS_MB}
+        proc = FlakyPeakFinder(self.h5_main, crash_row=4, **kwargs)
+        with self.assertRaises(RuntimeError):
+            proc.compute()
+        h5_partial = proc.h5_results_grp
+        self.assertEqual(get_completed_rows(h5_partial).tolist(), [[0, 4]])
+
+        # Different parameters do not resume from the partial results
+        other = FlakyPeakFinder(self.h5_main, process_name='PeakFinder',
+                                parms_dict={'width': 5})
+        self.assertEqual(other._find_previous_results(), (None, None))
+
+        proc = FlakyPeakFinder(self.h5_main, **kwargs)
+        h5_grp = proc.compute()
+        self.assertEqual(h5_grp, h5_partial)
+        self.assertEqual(proc.computed, [(4, 6)])
+        self.assertEqual(get_completed_rows(h5_grp).tolist(), [[0, 6]])
+        self.__validate_peaks(h5_grp)
+
+    def test_reuse_complete_results(self):
+        kwargs = {'process_name': 'PeakFinder', 'parms_dict': {'width': 3},
+                  'max_mem_mb': TWO_ROWS_MB}
+        h5_grp = FlakyPeakFinder(self.h5_main, **kwargs).compute()
+
+        proc = FlakyPeakFinder(self.h5_main, **kwargs)
+        self.assertEqual(proc.compute(), h5_grp)
+        self.assertEqual(proc.computed, [])
+        self.assertEqual([h5_dset.name for h5_dset in proc.h5_results],
+                         [h5_grp['Peak_Index/Peak_Index'].name,
+                          h5_grp['Peak_Height/Peak_Height'].name])
+
+        proc = FlakyPeakFinder(self.h5_main, **kwargs)
+        h5_new_grp = proc.compute(override=True)
+        self.assertNotEqual(h5_new_grp, h5_grp)
+        self.assertEqual(len(proc.computed), 3)
+        self.__validate_peaks(h5_new_grp)
+
+        proc = FlakyPeakFinder(self.h5_main, process_name='PeakFinder',
+                               parms_dict={'width': 4})
+        self.assertNotIn(proc.compute(), [h5_grp, h5_new_grp])
+        self.assertEqual(len(proc.computed), 1)
+
+    def test_group_without_progress_not_reused(self):
+        kwargs = {'process_name': 'PeakFinder', 'parms_dict': {'width': 3}}
+        # Same hash as the results of compute() but no record of progress,
+        # e.g. interrupted before compute() recorded any progress
+        proc = FlakyPeakFinder(self.h5_main, **kwargs)
+        h5_unknown = write_results(self.h5_main.parent,
+                                   dataset=proc._create_results_datasets(),
+                                   attributes={'width': 3},
+                                   process_name='PeakFinder',
+                                   write_data=False,
+                                   source_dataset=self.h5_main)
+        self.assertEqual(proc._find_previous_results(), (None, None))
+        h5_grp = proc.compute()
+        self.assertNotEqual(h5_grp, h5_unknown)
+        self.__validate_peaks(h5_grp)
+
+    def test_progress_recorded_with_group(self):
+        proc = FlakyPeakFinder(self.h5_main, crash_row=0)
+        with self.assertRaises(RuntimeError):
+            proc.compute()
+        self.assertEqual(get_completed_rows(proc.h5_results_grp).shape,
+                         (0, 2))
+        self.assertEqual(proc._find_previous_results(),
+                         (None, proc.h5_results_grp))
+
+    def test_no_resume(self):
+        proc = FlakyPeakFinder(self.h5_main, crash_row=2, max_mem_mb=TWO_ROWS_MB)
+        with self.assertRaises(RuntimeError):
+            proc.compute()
+        proc = FlakyPeakFinder(self.h5_main, max_mem_mb=TWO_ROWS_MB)
+        h5_grp = proc.compute(resume=False)
+        self.assertEqual(len(proc.computed), 3)
+        self.assertTrue(h5_grp.name.endswith('_001'))
+
+    def test_merge_ranges(self):
+        self.assertEqual(_merge_ranges([[4, 6], [0, 2], [2, 3], [8, 9],
+                                        [5, 7]]).tolist(),
+                         [[0, 3], [4, 7], [8, 9]])
+        self.assertEqual(_merge_ranges([]).shape, (0, 2))
+
+    def test_test_single_position(self):
+        proc = PeakFinder(self.h5_main)
+        index, height = proc.test(7)
+        self.assertEqual(index, np.argmax(self.data[1, 2]))
+        self.assertEqual(proc.test((1, 2)), (index, height))
+        self.assertIsNone(proc.h5_results_grp)
+
+    def test_not_implemented(self):
+        with self.assertRaises(NotImplementedError):
+            Process(self.h5_main).compute()
+
+    def test_invalid_inputs(self):
+        with self.assertRaises(TypeError):
+            _ = PeakFinder(self.h5_file['Measurement'])
+        with self.assertRaises(TypeError):
+            _ = PeakFinder(self.h5_main.parent['x'])
+        with self.assertRaises(ValueError):
+            _ = PeakFinder(self.h5_main, scheduler='mpi')
+        with self.assertRaises(ValueError):
+            _ = PeakFinder(self.h5_main, num_pos_dims=4)
+        with self.assertRaises(TypeError):
+            _ = PeakFinder(self.h5_main, parms_dict=[1, 2])
+        with self.assertRaises(ValueError):
+            _ = PeakFinder(self.h5_main, max_mem_mb=0)
+
+
+if __name__ == '__main__':
+    unittest.main()